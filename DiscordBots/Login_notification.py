@@ -1,13 +1,25 @@
+import csv
 import discord
+import io
 import json
 import pytz
 import asyncio
 from datetime import datetime, time, timedelta
+from presence_log import OFFLINE, ONLINE, PresenceLog, apply_presence_event, new_day_record, roll_over, summarize_day, write_snapshot
+from presence_schedule import ScheduleTable
+from presence_debounce import PresenceDebouncer
+from reminder_delivery import Outbox, pack_messages
 
 # --- CONFIGURATION & DATA MANAGEMENT ---
 
-# File path to store persistent data
+# File path to store persistent data (a periodic snapshot of the day's tracking data)
 DATA_FILE = 'schedule_data.json'
+# Presence transitions are appended to one event log per day in this directory
+PRESENCE_LOG_DIR = 'presence_logs'
+SNAPSHOT_INTERVAL_SECONDS = 300
+# A presence change only counts once it has lasted this long; flapping back inside the window
+# (mobile reconnects, auto-idle) keeps the session going. 0 commits every change right away.
+PRESENCE_DEBOUNCE_SECONDS = 120
 
 # 🚨 TARGET TIMEZONE: Asia/Dhaka is UTC+6
 TARGET_TIMEZONE = pytz.timezone('Asia/Dhaka') 
@@ -30,31 +42,27 @@ SCHEDULED_USERS = {
     }
 }
 
+# Compiled once at startup; call SCHEDULES.compile(SCHEDULED_USERS) after changing SCHEDULED_USERS
+SCHEDULES = ScheduleTable(SCHEDULED_USERS, TARGET_TIMEZONE)
+
 NOTIFICATION_CHANNEL_ID = channel_id_here # Replace with your channel ID
 
+# Midnight report: 'digest' posts one attendance table per channel, 'per_user' one message per user
+REPORT_MODE = 'digest'
+# Send some users' midnight reports to their team's channel: {"user id": channel id}.
+# Everyone else is reported in NOTIFICATION_CHANNEL_ID.
+REPORT_CHANNEL_IDS = {}
+# A digest that would take more messages than this is posted as totals plus an attached CSV
+DIGEST_MAX_MESSAGES = 3
+# !attendance needs the privileged Message Content intent; enable it in the Developer Portal first
+ATTENDANCE_COMMAND_ENABLED = False
+
 # --- Utility Functions ---
 
 def get_local_now():
     """Returns the current datetime object localized to the TARGET_TIMEZONE."""
     return datetime.now(TARGET_TIMEZONE)
 
-def get_schedule_for_user(user_id):
-    """Retrieves the specific in/out schedule for a user based on the current day."""
-    user_id_str = str(user_id)
-    if user_id_str not in SCHEDULED_USERS:
-        return None
-    
-    current_day_name = get_local_now().strftime('%A') # e.g., 'Saturday', 'Monday'
-    user_schedule = SCHEDULED_USERS[user_id_str]
-    
-    # Prioritize specific day, fall back to default
-    if current_day_name in user_schedule:
-        return user_schedule[current_day_name]
-    elif 'default' in user_schedule:
-        return user_schedule['default']
-    
-    return None
-
 def format_elapsed_time(total_seconds):
     """
     Converts total seconds into a human-readable string (e.g., "1 hour and 15 minutes").
@@ -82,47 +90,247 @@ def format_elapsed_time(total_seconds):
 intents = discord.Intents.default()
 intents.members = True
 intents.presences = True 
+intents.message_content = ATTENDANCE_COMMAND_ENABLED # Only requested when !attendance is on
 client = discord.Client(intents=intents)
 
 user_tracker = {}
+PRESENCE_LOG = PresenceLog(PRESENCE_LOG_DIR)
+REPORT_OUTBOX = Outbox() # Paced per channel and bot-wide, so the midnight burst stays clear of 429s
+CURRENT_DAY = None         # 'YYYY-MM-DD' that user_tracker holds
+CURRENT_DAY_START = 0      # its local midnight (epoch seconds)
+FINISHED_DAY = None        # (day, records) of the last day rolled over, kept for the midnight report
+SNAPSHOT_LOCK = None       # asyncio.Lock, created on first use inside the running loop
+BACKGROUND_TASKS = set()   # Archive tasks and the like, referenced until they finish
+
+def capture_snapshot():
+    """
+    Copies user_tracker together with how much of today's event log it already includes.
+    Runs on the event loop; returns a function that writes the copy (fine in a worker thread).
+    """
+    log_offset, sync_log = PRESENCE_LOG.checkpoint(CURRENT_DAY)
+    data = {
+        'day': CURRENT_DAY,
+        'log_offset': log_offset,
+        'users': {user_id_str: dict(user_data) for user_id_str, user_data in user_tracker.items()},
+    }
+
+    def write():
+        sync_log() # The log must be on disk up to log_offset before a snapshot claims it
+        write_snapshot(DATA_FILE, data)
+    return write
 
 def save_data():
-    with open(DATA_FILE, 'w') as f:
-        json.dump(user_tracker, f, indent=4)
+    """Writes the snapshot right away (startup, before the bot handles events)."""
+    capture_snapshot()()
+
+async def save_data_async():
+    """Writes the snapshot from a worker thread, one at a time."""
+    global SNAPSHOT_LOCK
+    if SNAPSHOT_LOCK is None:
+        SNAPSHOT_LOCK = asyncio.Lock()
+    async with SNAPSHOT_LOCK:
+        await asyncio.to_thread(capture_snapshot())
+
+def run_in_background(coro):
+    """Starts a task and keeps a reference until it finishes, so it is not garbage-collected mid-run."""
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(background_task_done)
+    return task
+
+def background_task_done(task):
+    BACKGROUND_TASKS.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background task failed: {task.exception()!r}")
+
+def record_presence(user_id_str, status, timestamp):
+    """Appends a presence transition to today's log and applies it to user_tracker."""
+    PRESENCE_LOG.append(SCHEDULES.day_key(timestamp), user_id_str, status, timestamp)
+    apply_presence_event(user_tracker[user_id_str], status, timestamp)
+
+def day_record(user_id_str, day):
+    """A fresh record for `day` (a date) holding the user's scheduled IN/OUT times that day."""
+    _, scheduled_in_ts, scheduled_out_ts = SCHEDULES.boundaries(int(user_id_str), day)
+    return new_day_record(day.strftime('%Y-%m-%d'), scheduled_in_ts, scheduled_out_ts)
 
 def reset_user_data(user_id_str):
-    current_day = get_local_now().strftime('%Y-%m-%d')
-    user_tracker[user_id_str] = {
-        'last_reset_day': current_day,
-        'online_time_timestamp': None,       
-        'first_online_timestamp': None,       
-        'last_offline_timestamp': None,       
-        'total_time_online': 0,               
-        'online_message_sent': False         
-    }
+    user_tracker[user_id_str] = day_record(user_id_str, get_local_now().date())
 
 def load_data():
-    global user_tracker
+    """Startup only: loads the snapshot, resets stale users and replays today's log tail."""
+    global user_tracker, CURRENT_DAY, CURRENT_DAY_START
+    snapshot_day, log_offset = None, 0
     try:
         with open(DATA_FILE, 'r') as f:
-            user_tracker = json.load(f)
+            data = json.load(f)
             print("Loaded tracking data.")
+        if 'users' in data:
+            user_tracker = data['users']
+            snapshot_day, log_offset = data.get('day'), data.get('log_offset', 0)
+        else:
+            user_tracker = data # Older files held the tracker alone, written after every event
     except (FileNotFoundError, json.JSONDecodeError):
         pass
 
-    current_day = get_local_now().strftime('%Y-%m-%d')
-    for user_id in SCHEDULED_USERS:
+    now_ts = get_local_now().timestamp()
+    current_day = CURRENT_DAY = SCHEDULES.day_key(now_ts)
+    CURRENT_DAY_START = SCHEDULES.day_start(now_ts)
+    for user_id in SCHEDULES.tracked_ids:
         user_id_str = str(user_id)
         if user_id_str not in user_tracker or user_tracker[user_id_str]['last_reset_day'] != current_day:
             print(f"Initializing/Resetting data for user {user_id_str}")
             reset_user_data(user_id_str)
+
+    # Replay the events logged after the snapshot (all of today's if it is from an earlier day)
+    replayed = 0
+    for user_id_str, status, timestamp in PRESENCE_LOG.replay(current_day, log_offset if snapshot_day == current_day else 0):
+        if user_id_str in user_tracker:
+            apply_presence_event(user_tracker[user_id_str], status, timestamp)
+            replayed += 1
+    if replayed:
+        print(f"Replayed {replayed} presence events from today's log.")
             
     save_data()
     return user_tracker
 
+def roll_day(now_ts):
+    """Swaps in a fresh day in memory once `now_ts` is past the current one; no file is read or rewritten.
+
+    Called at midnight by midnight_reporter, or by the first presence change of the
+    new day if that is settled first. Open sessions carry over midnight (see
+    roll_over); the finished day is kept in FINISHED_DAY for the report and
+    archived in the background.
+    """
+    global user_tracker, CURRENT_DAY, CURRENT_DAY_START, FINISHED_DAY
+    new_day = SCHEDULES.day_key(now_ts)
+    if CURRENT_DAY is not None and new_day <= CURRENT_DAY:
+        return
+    boundary_ts = SCHEDULES.day_start(now_ts)
+    finished_day, finished = CURRENT_DAY, user_tracker
+    day = datetime.fromtimestamp(boundary_ts, TARGET_TIMEZONE).date()
+    records = {str(user_id): day_record(str(user_id), day) for user_id in SCHEDULES.tracked_ids}
+    carried = roll_over(finished, records, boundary_ts)
+
+    # Log the split so each day's log still replays to its own totals
+    for user_id_str in carried:
+        PRESENCE_LOG.append(finished_day, user_id_str, OFFLINE, boundary_ts)
+    for user_id_str in carried:
+        PRESENCE_LOG.append(new_day, user_id_str, ONLINE, boundary_ts)
+
+    user_tracker, CURRENT_DAY, CURRENT_DAY_START = records, new_day, boundary_ts
+    FINISHED_DAY = (finished_day, finished)
+    print(f"Rolled over to {new_day} ({len(carried)} session(s) carried over midnight).")
+    if finished_day is not None:
+        run_in_background(archive_day(finished_day, finished))
+
+async def archive_day(day, records):
+    """Keeps the finished day's records next to its log and snapshots the new day, off the event loop."""
+    await asyncio.to_thread(write_snapshot, PRESENCE_LOG.archive_path(day), {'day': day, 'users': records})
+    await save_data_async()
+
+async def snapshot_writer():
+    """Writes a snapshot every SNAPSHOT_INTERVAL_SECONDS so a restart replays only a short log tail."""
+    await client.wait_until_ready()
+    while not client.is_closed():
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        await save_data_async()
+
+# --- Attendance Reports ---
+# Every number comes from the running totals kept in each user's day record
+# (see summarize_day), so a report is a few additions and string formatting.
+
+def format_clock(timestamp):
+    return datetime.fromtimestamp(timestamp, TARGET_TIMEZONE).strftime('%I:%M:%S %p %Z')
+
+def format_arrival(lateness_seconds):
+    if lateness_seconds is None:
+        return "N/A"
+    if lateness_seconds > 60:
+        return f"⏰ {format_elapsed_time(lateness_seconds)} late"
+    if lateness_seconds < -60:
+        return f"⚠️ {format_elapsed_time(-lateness_seconds)} early"
+    return "✅ on time"
+
+def attendance_report(user_id_str, user_data, weekday, title, now_ts=None):
+    """One user's attendance message for a day record; pass `now_ts` for a day still in progress."""
+    summary = summarize_day(user_data, now_ts)
+    user_schedule = SCHEDULES.schedule_for(int(user_id_str), weekday)
+    last_out = summary.last_out if summary.last_out is not None else summary.first_in
+
+    # Duration between first online and last offline, compared with the scheduled window
+    elapsed_seconds = last_out - summary.first_in
+    extra_time_message = ""
+    if summary.scheduled_seconds is not None:
+        time_difference = elapsed_seconds - summary.scheduled_seconds
+        if time_difference > 60:
+            extra_time_message = f"⚠️ **EXTRA TIME:** They exceeded their scheduled `{user_schedule.in_text} - {user_schedule.out_text}` window by **{format_elapsed_time(time_difference)}**."
+        elif time_difference < -60 and now_ts is None:
+            extra_time_message = f"⌛ **MISSING TIME:** They were active for **{format_elapsed_time(-time_difference)}** less than their scheduled `{user_schedule.in_text} - {user_schedule.out_text}` window."
+
+    lines = [
+        title,
+        "---",
+        f"**Scheduled IN:** {(user_schedule and user_schedule.in_text) or 'N/A'} **OUT:** {(user_schedule and user_schedule.out_text) or 'N/A'}",
+        f"**First Online:** {format_clock(summary.first_in)} ({format_arrival(summary.lateness_seconds)})",
+        f"**Last Offline:** {'still online' if summary.still_online and now_ts is not None else format_clock(last_out)}",
+        f"**Total Time Elapsed (First to Last):** **{format_elapsed_time(elapsed_seconds)}**",
+        f"**Active:** {format_elapsed_time(summary.active_seconds)} in {summary.sessions} session{'s' if summary.sessions != 1 else ''}"
+        + (f", away {format_elapsed_time(summary.idle_seconds)} in between" if summary.idle_seconds else ""),
+    ]
+    if extra_time_message:
+        lines.append(extra_time_message)
+    return "\n".join(lines)
+
+def user_label(user_id_str):
+    """Name shown in digests and overviews (a mention would ping everyone listed)."""
+    user = client.get_user(int(user_id_str))
+    return f"**{user.display_name}**" if user else f"`{user_id_str}`"
+
+def attendance_line(label, user_data, now_ts=None):
+    """One-line summary of a user's day record, for digests and the !attendance overview."""
+    summary = summarize_day(user_data, now_ts)
+    last_out = "online now" if summary.still_online and now_ts is not None else format_clock(summary.last_out or summary.first_in)
+    return (f"{label} {format_clock(summary.first_in)} → {last_out} · "
+            f"active {format_elapsed_time(summary.active_seconds)} ({summary.sessions}×) · {format_arrival(summary.lateness_seconds)}")
+
+def attendance_csv(entries):
+    """The day's summaries as CSV bytes, one row per (user id, record) in `entries`."""
+    def local_time(timestamp):
+        return datetime.fromtimestamp(timestamp, TARGET_TIMEZONE).isoformat() if timestamp is not None else ""
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['user_id', 'name', 'first_online', 'last_offline', 'active_seconds', 'away_seconds',
+                     'sessions', 'lateness_seconds', 'scheduled_seconds'])
+    for user_id_str, user_data in entries:
+        summary = summarize_day(user_data)
+        user = client.get_user(int(user_id_str))
+        writer.writerow([user_id_str, user.display_name if user else "", local_time(summary.first_in), local_time(summary.last_out),
+                         round(summary.active_seconds), round(summary.idle_seconds), summary.sessions,
+                         "" if summary.lateness_seconds is None else round(summary.lateness_seconds),
+                         "" if summary.scheduled_seconds is None else round(summary.scheduled_seconds)])
+    return out.getvalue().encode()
+
+def render_digest(day, day_name, entries):
+    """(messages, CSV bytes or None): one channel's midnight digest for its (user id, record) entries."""
+    present = [(user_id_str, user_data) for user_id_str, user_data in entries if user_data['first_online_timestamp'] is not None]
+    absent = sum(1 for _, user_data in entries
+                 if user_data['first_online_timestamp'] is None and user_data.get('scheduled_in_timestamp') is not None)
+    late = sum(1 for _, user_data in present if (summarize_day(user_data).lateness_seconds or 0) > 60)
+    if not present and not absent:
+        return [], None
+
+    header = f"🌙 **MIDNIGHT ATTENDANCE DIGEST ({day_name}, {day})** 🌙"
+    totals = f"{len(present)} came online · {late} late · {absent} scheduled but never online"
+    messages = pack_messages(header, [totals] + [attendance_line(user_label(user_id_str), user_data) for user_id_str, user_data in present])
+    if len(messages) <= DIGEST_MAX_MESSAGES:
+        return messages, None
+    return [f"{header}\n{totals}\n📎 The full table is attached."], attendance_csv(present)
+
 # --- Background Task for Midnight Report (Modified for better clarity) ---
 
 async def midnight_reporter():
+    global FINISHED_DAY
     await client.wait_until_ready()
     channel = client.get_channel(NOTIFICATION_CHANNEL_ID)
     
@@ -147,90 +355,61 @@ async def midnight_reporter():
 
         # --- Report Generation Logic (Fires exactly at 12:00 AM Local Time) ---
         print("Midnight Reporter: Triggered. Generating reports.")
+
+        # Settle changes still inside the debounce window so the report sees them
+        await PRESENCE_DEBOUNCE.flush()
         
-        for user_id_str, user_data in user_tracker.items():
-            
-            # Skip if user never came online today
-            if user_data['first_online_timestamp'] is None:
+        # Swap in the new day (unless a presence change already did) and report the one that ended
+        roll_day(target_time.timestamp())
+        if FINISHED_DAY is None:
+            continue
+        finished_day, finished = FINISHED_DAY
+        FINISHED_DAY = None
+        day_before = datetime.strptime(finished_day, '%Y-%m-%d').date()
+        weekday_before, day_name_before = day_before.weekday(), day_before.strftime('%A')
+
+        # Group the finished day's records by the channel their report goes to
+        report_channels = {}
+        routes = {}
+        for user_id_str, user_data in finished.items():
+            channel_id = REPORT_CHANNEL_IDS.get(user_id_str, NOTIFICATION_CHANNEL_ID)
+            report_channel = report_channels.get(channel_id)
+            if report_channel is None:
+                report_channel = report_channels[channel_id] = client.get_channel(channel_id) or channel
+                if report_channel is channel and channel_id != NOTIFICATION_CHANNEL_ID:
+                    print(f"Error: Report channel (ID: {channel_id}) not found. Reporting those users in the notification channel.")
+            routes.setdefault(report_channel.id, (report_channel, []))[1].append((user_id_str, user_data))
+
+        # Everything is queued at once; the outbox delivers to all channels concurrently
+        started = asyncio.get_running_loop().time()
+        queued = 0
+        for report_channel, entries in routes.values():
+            if REPORT_MODE == 'per_user':
+                for user_id_str, user_data in entries:
+                    # Skip if user never came online today
+                    if user_data['first_online_timestamp'] is None:
+                        continue
+
+                    # Get member to use mention in report
+                    member = client.get_user(int(user_id_str))
+                    if member:
+                        title = f"🌙 **MIDNIGHT ATTENDANCE REPORT for {member.mention} ({day_name_before})** 🌙"
+                        REPORT_OUTBOX.submit(report_channel, attendance_report(user_id_str, user_data, weekday_before, title))
+                        queued += 1
                 continue
 
-            # Load the schedule that was relevant for the day that just ended
-            # NOTE: get_schedule_for_user() uses the current time, but since it's 12:00 AM, 
-            # we need to check the schedule for the DAY BEFORE (now - 1 day)
-            day_before = now.date() - timedelta(days=1)
-            day_name_before = day_before.strftime('%A')
-            
-            # Temporarily override time to check yesterday's schedule
-            temp_schedule_check_time = TARGET_TIMEZONE.localize(datetime.combine(day_before, time(12, 0, 0))) 
-            user_schedule = get_schedule_for_user_on_day(user_id_str, day_name_before)
-
-            first_online = datetime.fromtimestamp(user_data['first_online_timestamp'], tz=TARGET_TIMEZONE)
-            last_offline = datetime.fromtimestamp(user_data['last_offline_timestamp'], tz=TARGET_TIMEZONE)
-            
-            # Calculate duration between first online and last offline
-            total_duration_raw = last_offline - first_online
-            formatted_duration = format_elapsed_time(total_duration_raw.total_seconds())
-            
-            # Get member to use mention in report
-            member = client.get_user(int(user_id_str))
-            
-            # Calculate expected duration and check for "extra time"
-            extra_time_message = ""
-            if user_schedule and user_schedule['in'] and user_schedule['out']:
-                
-                # Combine schedule times with yesterday's date
-                in_time = datetime.strptime(user_schedule['in'], '%H:%M').time()
-                out_time = datetime.strptime(user_schedule['out'], '%H:%M').time()
-                
-                # Assuming the in/out times are within the same day
-                scheduled_start = TARGET_TIMEZONE.localize(datetime.combine(day_before, in_time))
-                scheduled_end = TARGET_TIMEZONE.localize(datetime.combine(day_before, out_time))
-
-                expected_duration_raw = scheduled_end - scheduled_start
-                
-                # Calculate the difference between actual elapsed time and expected time
-                time_difference = total_duration_raw - expected_duration_raw
-                
-                if time_difference.total_seconds() > 60:
-                    formatted_extra_time = format_elapsed_time(time_difference.total_seconds())
-                    extra_time_message = f"\n⚠️ **EXTRA TIME:** They exceeded their scheduled `{user_schedule['in']} - {user_schedule['out']}` window by **{formatted_extra_time}**."
-                elif time_difference.total_seconds() < -60:
-                    formatted_missing_time = format_elapsed_time(abs(time_difference.total_seconds()))
-                    extra_time_message = f"\n⌛ **MISSING TIME:** They were active for **{formatted_missing_time}** less than their scheduled `{user_schedule['in']} - {user_schedule['out']}` window."
-
-            if member:
-                message = f"""
-                🌙 **MIDNIGHT ATTENDANCE REPORT for {member.mention} ({day_name_before})** 🌙
-                ---
-                **Scheduled IN:** {user_schedule.get('in', 'N/A')} **OUT:** {user_schedule.get('out', 'N/A')}
-                **First Online:** {first_online.strftime('%I:%M:%S %p %Z')}
-                **Last Offline:** {last_offline.strftime('%I:%M:%S %p %Z')}
-                **Total Time Elapsed (First to Last):** **{formatted_duration}**
-                {extra_time_message}
-                """
-                await channel.send(message)
-
-            # Reset data for the start of the new day
-            reset_user_data(user_id_str)
+            messages, table = render_digest(finished_day, day_name_before, entries)
+            make_file = None
+            if table is not None:
+                make_file = lambda table=table: discord.File(io.BytesIO(table), filename=f"attendance-{finished_day}.csv")
+            for message in messages:
+                REPORT_OUTBOX.submit(report_channel, message, make_file=make_file)
+                queued += 1
 
-        save_data()
+        await REPORT_OUTBOX.join()
+        print(f"Midnight Reporter: {queued} message(s) to {len(routes)} channel(s) delivered in {asyncio.get_running_loop().time() - started:.1f}s.")
         await asyncio.sleep(1) 
 
-def get_schedule_for_user_on_day(user_id, day_name):
-    """Helper function to look up a schedule for a specific day name."""
-    user_id_str = str(user_id)
-    if user_id_str not in SCHEDULED_USERS:
-        return None
-    
-    user_schedule = SCHEDULED_USERS[user_id_str]
-    
-    if day_name in user_schedule:
-        return user_schedule[day_name]
-    elif 'default' in user_schedule:
-        return user_schedule['default']
-    
-    return None
-
 # --- Core Bot Events ---
 
 @client.event
@@ -238,105 +417,126 @@ async def on_ready():
     print(f'Bot is ready and logged in as {client.user}')
     load_data()
     client.loop.create_task(midnight_reporter())
+    client.loop.create_task(snapshot_writer())
 
 
 @client.event
 async def on_presence_update(old_presence, new_presence):
-    user_id_str = str(new_presence.id)
+    user_id = new_presence.id
 
-    if user_id_str not in SCHEDULED_USERS:
+    if user_id not in SCHEDULES.tracked_ids:
         return
 
-    # Ensure data is loaded/reset for the current day
-    user_data = user_tracker.get(user_id_str)
-    if not user_data or user_data['last_reset_day'] != get_local_now().strftime('%Y-%m-%d'):
-        load_data()
-        user_data = user_tracker.get(user_id_str)
-        if not user_data: return
+    # Only online <-> away (idle/dnd/offline) changes open or close a session
+    was_online = old_presence.status == discord.Status.online
+    is_online = new_presence.status == discord.Status.online
+    if was_online == is_online:
+        return
 
-    old_status = old_presence.status
-    new_status = new_presence.status
-    
-    is_going_online = new_status == discord.Status.online and old_status not in [discord.Status.online, discord.Status.idle, discord.Status.dnd]
-    is_going_offline_or_away = new_status in [discord.Status.offline, discord.Status.idle, discord.Status.dnd] and old_status == discord.Status.online
+    # Held for PRESENCE_DEBOUNCE_SECONDS; commit_presence() only sees changes that were not undone in time
+    PRESENCE_DEBOUNCE.observe(user_id, new_presence.status.value, get_local_now().timestamp())
 
-    if not (is_going_online or is_going_offline_or_away):
-        return
 
-    member = new_presence 
-    channel = client.get_channel(NOTIFICATION_CHANNEL_ID)
+async def commit_presence(user_id, status, timestamp):
+    """Applies a settled presence change (timestamped when it happened) and sends the arrival notice."""
+    user_id_str = str(user_id)
 
-    if not channel:
+    # The first change of a new day rolls the day over in memory; one that settled after midnight counts from it
+    if timestamp >= CURRENT_DAY_START:
+        roll_day(timestamp)
+    else:
+        timestamp = CURRENT_DAY_START
+
+    user_data = user_tracker.get(user_id_str)
+    if not user_data: return
+
+    # --- GOING OFFLINE LOGIC (End session / Record last offline time) ---
+    if status != discord.Status.online.value:
+        if user_data['online_time_timestamp'] is not None:
+            # Log the transition: accumulates the session time and records the last offline time
+            record_presence(user_id_str, status, timestamp)
         return
-    
-    # 🚨 CHANGE 2: Get today's specific schedule
-    current_schedule = get_schedule_for_user(user_id_str)
+
+    # --- GOING ONLINE LOGIC (Start session / Record first online time) ---
+    current_time = datetime.fromtimestamp(timestamp, TARGET_TIMEZONE)
+
+    # 🚨 CHANGE 2: Get today's specific schedule (IN time already localized for today)
+    current_schedule, scheduled_in_ts, _ = SCHEDULES.today(user_id, timestamp)
     if not current_schedule:
         print(f"Warning: No schedule found for {user_id_str} today. Skipping presence update alert.")
         return
-    
-    scheduled_in_time_str = current_schedule.get('in')
 
-    # --- GOING ONLINE LOGIC (Start session / Record first online time) ---
-    if is_going_online:
-        
-        current_time = get_local_now()
-        
-        # 1. Start the current session timestamp
-        user_data['online_time_timestamp'] = current_time.timestamp() 
-        
-        # 2. Record the first online time of the day
-        if user_data['first_online_timestamp'] is None:
-            user_data['first_online_timestamp'] = current_time.timestamp()
+    scheduled_in_time_str = current_schedule.in_text
+    send_arrival_notice = not user_data['online_message_sent'] and scheduled_in_ts is not None
 
-        # 3. Report Lateness/Earlyness (only once per day)
-        if not user_data['online_message_sent'] and scheduled_in_time_str:
-            
-            scheduled_time_24hr = datetime.strptime(scheduled_in_time_str, '%H:%M').time()
-            scheduled_datetime = TARGET_TIMEZONE.localize(
-                datetime.combine(current_time.date(), scheduled_time_24hr)
-            )
-
-            lateness = current_time - scheduled_datetime
-            tz_abbr = current_time.strftime('%Z')
-            formatted_online_time = current_time.strftime(f'%I:%M:%S %p {tz_abbr}')
-            message = f"🟢 **ATTENTION!** {member.mention} has just come **ONLINE** at **{formatted_online_time}**."
-            
-            lateness_seconds = lateness.total_seconds()
-            
-            if lateness_seconds > 60: 
-                # LATE: After scheduled time
-                formatted_lateness = format_elapsed_time(lateness_seconds)
-                message += f"\n⏰ **LATE:** They were **{formatted_lateness}** late for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
-            elif lateness_seconds < -60: 
-                # EARLY: Before scheduled time
-                formatted_earlyness = format_elapsed_time(abs(lateness_seconds))
-                message += f"\n⚠️ **EARLY (Extra Time):** They came **{formatted_earlyness}** early for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+    # 1. Log the transition: starts the session and records the first online time of the day
+    record_presence(user_id_str, status, timestamp)
+
+    # 2. Report Lateness/Earlyness (only once per day)
+    channel = client.get_channel(NOTIFICATION_CHANNEL_ID)
+    if send_arrival_notice and channel:
+
+        tz_abbr = current_time.strftime('%Z')
+        formatted_online_time = current_time.strftime(f'%I:%M:%S %p {tz_abbr}')
+        message = f"🟢 **ATTENTION!** <@{user_id}> has just come **ONLINE** at **{formatted_online_time}**."
+
+        lateness_seconds = timestamp - scheduled_in_ts
+
+        if lateness_seconds > 60:
+            # LATE: After scheduled time
+            formatted_lateness = format_elapsed_time(lateness_seconds)
+            message += f"\n⏰ **LATE:** They were **{formatted_lateness}** late for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+        elif lateness_seconds < -60:
+            # EARLY: Before scheduled time
+            formatted_earlyness = format_elapsed_time(abs(lateness_seconds))
+            message += f"\n⚠️ **EARLY (Extra Time):** They came **{formatted_earlyness}** early for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+        else:
+            message += f"\n✅ **ON TIME:** They were on time for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+
+        await channel.send(message)
+
+
+@client.event
+async def on_message(message):
+    """`!attendance [@user ...]` in the notification channel: today's attendance so far."""
+    if not ATTENDANCE_COMMAND_ENABLED or message.author.bot or message.channel.id != NOTIFICATION_CHANNEL_ID:
+        return
+    if message.content.split(maxsplit=1)[:1] != ['!attendance']:
+        return
+
+    now = get_local_now()
+    now_ts = now.timestamp()
+    as_of = f"{now.strftime('%A')}, as of {now.strftime('%I:%M %p %Z')}"
+
+    if message.mentions:
+        for member in message.mentions:
+            user_data = user_tracker.get(str(member.id))
+            if user_data is None:
+                await message.channel.send(f"ℹ️ {member.mention} is not on the schedule.")
+            elif user_data['first_online_timestamp'] is None:
+                await message.channel.send(f"ℹ️ {member.mention} has not come online today.")
             else:
-                message += f"\n✅ **ON TIME:** They were on time for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+                title = f"📋 **ATTENDANCE SO FAR for {member.mention} ({as_of})**"
+                await message.channel.send(attendance_report(str(member.id), user_data, now.weekday(), title, now_ts))
+        return
 
-            await channel.send(message)
-            user_data['online_message_sent'] = True
-        
-        save_data()
+    lines = [attendance_line(user_label(user_id_str), user_data, now_ts)
+             for user_id_str, user_data in user_tracker.items()
+             if user_data['first_online_timestamp'] is not None]
+    if not lines:
+        await message.channel.send("ℹ️ Nobody on the schedule has come online today.")
+        return
+    for content in pack_messages(f"📋 **Attendance so far ({as_of})**", lines):
+        await message.channel.send(content)
 
 
-    # --- GOING OFFLINE LOGIC (End session / Record last offline time) ---
-    elif is_going_offline_or_away and user_data['online_time_timestamp'] is not None:
-        
-        current_time = get_local_now()
-        
-        # 1. Accumulate session time
-        time_online_session = current_time.timestamp() - user_data['online_time_timestamp']
-        user_data['total_time_online'] += time_online_session
-        
-        # 2. Clear session timestamp
-        user_data['online_time_timestamp'] = None
-        
-        # 3. Record the last offline time (used by the midnight reporter)
-        user_data['last_offline_timestamp'] = current_time.timestamp() 
-        
-        save_data()
+def settled_online(user_id):
+    """True if the user's committed state is online (a session is open)."""
+    user_data = user_tracker.get(str(user_id))
+    return user_data is not None and user_data['online_time_timestamp'] is not None
+
+
+PRESENCE_DEBOUNCE = PresenceDebouncer(PRESENCE_DEBOUNCE_SECONDS, settled_online, commit_presence)
 
 # --- Run the Bot ---
 client.run('bot id here/token')
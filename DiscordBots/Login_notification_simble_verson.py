@@ -3,6 +3,7 @@ import json
 import pytz
 import asyncio
 from datetime import datetime, time, timedelta
+from presence_schedule import ScheduleTable
 
 # --- CONFIGURATION & DATA MANAGEMENT ---
 
@@ -30,6 +31,9 @@ SCHEDULED_USERS = {
 
 }
 
+# Compiled once at startup; call SCHEDULES.compile(SCHEDULED_USERS) after changing SCHEDULED_USERS
+SCHEDULES = ScheduleTable(SCHEDULED_USERS, TARGET_TIMEZONE)
+
 NOTIFICATION_CHANNEL_ID = channel_id_here # Replace with your channel ID
 
 # --- Utility Functions ---
@@ -38,23 +42,6 @@ def get_local_now():
     """Returns the current datetime object localized to the TARGET_TIMEZONE."""
     return datetime.now(TARGET_TIMEZONE)
 
-def get_schedule_for_user(user_id):
-    """Retrieves the specific in/out schedule for a user based on the current day."""
-    user_id_str = str(user_id)
-    if user_id_str not in SCHEDULED_USERS:
-        return None
-    
-    current_day_name = get_local_now().strftime('%A') # e.g., 'Saturday', 'Monday'
-    user_schedule = SCHEDULED_USERS[user_id_str]
-    
-    # Prioritize specific day, fall back to default
-    if current_day_name in user_schedule:
-        return user_schedule[current_day_name]
-    elif 'default' in user_schedule:
-        return user_schedule['default']
-    
-    return None
-
 def format_elapsed_time(total_seconds):
     """
     Converts total seconds into a human-readable string (e.g., "1 hour and 15 minutes").
@@ -112,7 +99,7 @@ def load_data():
         pass
 
     current_day = get_local_now().strftime('%Y-%m-%d')
-    for user_id in SCHEDULED_USERS:
+    for user_id in SCHEDULES.tracked_ids:
         user_id_str = str(user_id)
         # Reset if user not tracked yet OR if the stored day is not the current day
         if user_id_str not in user_tracker or user_tracker[user_id_str]['last_reset_day'] != current_day:
@@ -132,15 +119,19 @@ async def on_ready():
 
 @client.event
 async def on_presence_update(old_presence, new_presence):
-    user_id_str = str(new_presence.id)
+    user_id = new_presence.id
 
     # 1. Check if the user is in our monitored list
-    if user_id_str not in SCHEDULED_USERS:
+    if user_id not in SCHEDULES.tracked_ids:
         return
 
+    user_id_str = str(user_id)
+    current_time = get_local_now()
+    now_ts = current_time.timestamp()
+
     # 2. Daily reset check
     user_data = user_tracker.get(user_id_str)
-    if not user_data or user_data['last_reset_day'] != get_local_now().strftime('%Y-%m-%d'):
+    if not user_data or user_data['last_reset_day'] != SCHEDULES.day_key(now_ts):
         load_data()
         user_data = user_tracker.get(user_id_str)
         if not user_data: return
@@ -166,44 +157,33 @@ async def on_presence_update(old_presence, new_presence):
         print(f"Error: Notification channel (ID: {NOTIFICATION_CHANNEL_ID}) not found.")
         return
     
-    # 🚨 CORE CHANGE: Get the day-specific schedule and calculate status (on time/late/early)
-    current_schedule = get_schedule_for_user(user_id_str)
-    if not current_schedule or not current_schedule.get('in'):
+    # 🚨 CORE CHANGE: Get the day-specific schedule (IN time already localized for today) and calculate status
+    current_schedule, scheduled_in_ts, _ = SCHEDULES.today(user_id, now_ts)
+    if not current_schedule or not current_schedule.in_text:
         # If no 'in' time is defined, we can't check lateness, but still track the first online event
         scheduled_in_time_str = "N/A"
         lateness_message = "⚠️ **NO SCHEDULE:** Could not determine scheduled IN time."
+    elif scheduled_in_ts is None:
+        lateness_message = f"⚠️ **SCHEDULE ERROR:** Scheduled time '{current_schedule.in_text}' is invalid."
     else:
-        scheduled_in_time_str = current_schedule['in']
-        current_time = get_local_now()
-        
-        try:
-            scheduled_time_24hr = datetime.strptime(scheduled_in_time_str, '%H:%M').time()
-            scheduled_datetime = TARGET_TIMEZONE.localize(
-                datetime.combine(current_time.date(), scheduled_time_24hr)
-            )
-
-            lateness = current_time - scheduled_datetime
-            lateness_seconds = lateness.total_seconds()
-            tz_abbr = current_time.strftime('%Z')
-
-            if lateness_seconds > 60:
-                # LATE: After scheduled time by more than 60 seconds
-                formatted_lateness = format_elapsed_time(lateness_seconds)
-                lateness_message = f"⏰ **LATE:** They were **{formatted_lateness}** late for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
-            elif lateness_seconds < -60:
-                # EARLY: Before scheduled time by more than 60 seconds
-                formatted_earlyness = format_elapsed_time(abs(lateness_seconds))
-                lateness_message = f"⚠️ **EARLY:** They came **{formatted_earlyness}** early for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
-            else:
-                # ON TIME: Within +/- 60 seconds
-                lateness_message = f"✅ **ON TIME:** They were on time for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
-                
-        except ValueError:
-            lateness_message = f"⚠️ **SCHEDULE ERROR:** Scheduled time '{scheduled_in_time_str}' is invalid."
+        scheduled_in_time_str = current_schedule.in_text
+        lateness_seconds = now_ts - scheduled_in_ts
+        tz_abbr = current_time.strftime('%Z')
+
+        if lateness_seconds > 60:
+            # LATE: After scheduled time by more than 60 seconds
+            formatted_lateness = format_elapsed_time(lateness_seconds)
+            lateness_message = f"⏰ **LATE:** They were **{formatted_lateness}** late for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+        elif lateness_seconds < -60:
+            # EARLY: Before scheduled time by more than 60 seconds
+            formatted_earlyness = format_elapsed_time(abs(lateness_seconds))
+            lateness_message = f"⚠️ **EARLY:** They came **{formatted_earlyness}** early for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
+        else:
+            # ON TIME: Within +/- 60 seconds
+            lateness_message = f"✅ **ON TIME:** They were on time for their scheduled **IN** time of **{scheduled_in_time_str} {tz_abbr}**."
 
 
     # 4. Send the notification
-    current_time = get_local_now()
     tz_abbr = current_time.strftime('%Z')
     formatted_online_time = current_time.strftime(f'%I:%M:%S %p {tz_abbr}')
     
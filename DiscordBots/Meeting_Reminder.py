@@ -1,11 +1,32 @@
 import discord
 from discord.ext import commands, tasks
+import asyncio
 import datetime
+import itertools
 import pytz
 import re
-import json
 import os 
+import socket
+import sqlite3
+import time
 from pathlib import Path # Import Pathlib for robust path handling
+from reminder_scheduler import ReminderScheduler, split_fire_times
+from reminder_storage import ReminderJournal, WriteBehindWriter, atomic_write_json
+from reminder_lease import ReminderLease
+from reminder_store import Reminder, ReminderStore
+from reminder_search import TopicIndex
+from reminder_delivery import DELIVERY_MODES, DeliveryPreferences, DMFanout, Outbox, pack_messages
+from reminder_recurrence import parse_recurrence_args
+from reminder_offsets import (
+    OffsetPreferences, describe_offsets, format_offset, join_words, offset_label, parse_offset_args, parse_offsets,
+)
+from reminder_views import ListPager, ReminderAction, button_batches, reminder_buttons
+from reminder_metrics import ReminderMetrics
+from reminder_timezones import ZONE_CACHE, TimezonePreferences, find_zone
+from reminder_timeparse import parse_time_expression
+from reminder_import import (
+    MAX_IMPORT_BYTES, parse_attendees, parse_channel_ref, read_import_file, recurrence_args,
+)
 
 # --- Configuration ---
 
@@ -17,309 +38,697 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 # File path for persistent storage, relative to the script's directory
 SCHEDULE_FILE = SCRIPT_DIR / 'reminders.json' 
 
-# Global timezone for all reminders 
+# 'journal': append one compact record per change to reminders.journal and fold it
+#            into reminders.json in the background (O(1) per command).
+# 'snapshot': rewrite the whole reminders.json on every change.
+STORAGE_MODE = 'journal'
+COMPACTION_INTERVAL_MINUTES = 10
+COMPACTION_MIN_RECORDS = 200
+
+# Changes arriving within this window are written together, in a worker thread.
+WRITE_BEHIND_WINDOW_SECONDS = 0.25
+# 'commit': fsync every write (safest); 'interval': fsync at most every FSYNC_INTERVAL_SECONDS.
+PERSISTENCE_DURABILITY = 'interval'
+FSYNC_INTERVAL_SECONDS = 1.0
+
+# High availability: run several instances against the same files and set HA_LEASE_FILE.
+# The instance holding the lease fires reminders and answers commands; the others stay
+# connected as standbys and take over within HA_LEASE_SECONDS + HA_HEARTBEAT_SECONDS
+# when it stops renewing. None = single instance (no lease).
+HA_LEASE_FILE = None # e.g. SCRIPT_DIR / 'reminders.lease'
+HA_LEASE_SECONDS = 8
+HA_HEARTBEAT_SECONDS = 2
+INSTANCE_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+# Delivery metrics: Prometheus text file (None to disable) and an optional local HTTP endpoint.
+METRICS_FILE = SCRIPT_DIR / 'reminder_metrics.prom'
+METRICS_EXPORT_SECONDS = 15
+METRICS_HTTP_HOST = '127.0.0.1'
+METRICS_HTTP_PORT = None # e.g. 9464 to serve http://127.0.0.1:9464/metrics
+# Target shown by !stats: notifications delivered within this many seconds of their scheduled time
+FIRE_LAG_SLO_SECONDS = 5
+
+# Default timezone; users (!tz set) and servers (!tz server) can choose their own
 TIMEZONE_STR = 'Asia/Dhaka' 
 BOT_TZ = pytz.timezone(TIMEZONE_STR)
+TIMEZONE_FILE = SCRIPT_DIR / 'timezones.json'
+# Meeting times are shown in up to this many distinct attendee timezones
+MAX_ZONES_SHOWN = 4
+# Server default reminder offsets (!remind server 60,30,5); meetings can pick their own with --remind
+REMINDER_OFFSETS_FILE = SCRIPT_DIR / 'reminder_offsets.json'
+
+# Where reminders reach attendees by default: 'channel' (mentions in the meeting's channel), 'dm' or 'both'.
+# Users choose for themselves with !delivery; choices are saved in delivery.json.
+DELIVERY_MODE = 'channel'
+DELIVERY_FILE = SCRIPT_DIR / 'delivery.json'
+# Users whose DMs turn out to be closed are pinged in the channel, batched over this many seconds
+DM_FALLBACK_DELAY_SECONDS = 2
+
+# Epoch-seconds time source for all scheduling decisions (bench_reminders.py swaps in a simulated clock)
+CLOCK = time.time
 
 # Initialize the Bot with a command prefix
 BOT_PREFIX = "!"
+# Reminders are confirmed with buttons, which don't need message content. Prefix commands
+# do; with this off, commands still work when addressed to the bot: "@Bot schedule ...".
+MESSAGE_CONTENT_INTENT = True
 intents = discord.Intents.default()
 intents.members = True   
-intents.message_content = True 
-client = commands.Bot(command_prefix=BOT_PREFIX, intents=intents)
+intents.message_content = MESSAGE_CONTENT_INTENT
+client = commands.Bot(command_prefix=commands.when_mentioned_or(BOT_PREFIX), intents=intents)
 
 # --- Reminder Storage ---
-REMINDERS_LIST = [] 
-REMINDER_INTERVALS = [15, 10, 2, 0] 
+REMINDERS = ReminderStore(TopicIndex()) # Active reminders by ID, indexed by attendee, scheduler and topic words
+REMINDER_INTERVALS = [15, 10, 2, 0] # Default offsets (minutes before start), largest first, ending with 0
+REMINDER_IDS = itertools.count(1) # Stable IDs used as journal keys
+JOURNAL = ReminderJournal(SCHEDULE_FILE)
+
+# Pending notifications ordered by fire time; reminder_checker sleeps until the next one is due
+SCHEDULER = ReminderScheduler(clock=lambda: CLOCK())
+
+# Leader lease (HA mode only) and whether this instance currently owns the reminders
+LEASE = ReminderLease(HA_LEASE_FILE, INSTANCE_NAME, HA_LEASE_SECONDS, clock=lambda: CLOCK()) if HA_LEASE_FILE else None
+ACTIVE = False
+
+
+def instance_active():
+    """True if this instance fires reminders and answers commands (always, without HA)."""
+    return LEASE is None or (ACTIVE and LEASE.held())
+
+
+def may_write_storage():
+    """Write fence: a former lease holder must not write over the new owner's files."""
+    return LEASE is None or LEASE.held()
+
+# Outbound messages, queued per channel and paced to stay under Discord's rate limits
+OUTBOX = Outbox()
+# Reminder DMs: DM channels are looked up by a small worker pool, cached, and sent through OUTBOX
+DM_FANOUT = DMFanout(OUTBOX, lambda user_id: open_dm_channel(user_id))
+
+# Fire lag, tick and persistence latency; gauges are read from the live objects at export time
+METRICS = ReminderMetrics(REMINDER_INTERVALS, {
+    'reminder_outbox_depth': ('gauge', "Messages queued but not yet sent.", lambda: OUTBOX.depth),
+    'reminder_messages_sent_total': ('counter', "Messages delivered to Discord.", lambda: OUTBOX.sent),
+    'reminder_send_errors_total': ('counter', "Messages Discord rejected or that failed to send.", lambda: OUTBOX.failed),
+    'reminder_send_retries_total': ('counter', "Sends retried after a rate limit or server error.", lambda: OUTBOX.retried),
+    'reminder_dm_lookups_pending': ('gauge', "Reminder DMs waiting for their DM channel lookup.", lambda: DM_FANOUT.depth),
+    'reminder_dm_refused_total': ('counter', "Reminder DMs refused because the user has DMs closed.", lambda: DM_FANOUT.closed_count),
+    'reminder_scheduled_notifications': ('gauge', "Notifications waiting in the scheduler.", lambda: len(SCHEDULER)),
+    'reminder_active_reminders': ('gauge', "Active reminders.", lambda: len(REMINDERS)),
+    'reminder_persist_pending': ('gauge', "Changes queued for the next write.", lambda: WRITER.pending),
+    'reminder_instance_active': ('gauge', "1 if this instance holds the lease and fires reminders.", lambda: int(instance_active())),
+})
+
+
+# Timezone, reminder offset and delivery preferences, loaded in on_ready
+TIMEZONES = TimezonePreferences(TIMEZONE_FILE, BOT_TZ)
+GUILD_OFFSETS = OffsetPreferences(REMINDER_OFFSETS_FILE)
+DELIVERY = DeliveryPreferences(DELIVERY_FILE, DELIVERY_MODE)
+
+
+def now_local(tz=BOT_TZ):
+    """Current time in `tz`, read from CLOCK."""
+    return ZONE_CACHE.fromtimestamp(CLOCK(), tz)
+
+
+def user_zone(ctx):
+    """Timezone of the command author (their setting, else the server's, else BOT_TZ)."""
+    return TIMEZONES.zone_for(ctx.author.id, ctx.guild.id if ctx.guild else None)
+
+
+def reminder_zone(reminder):
+    """Zone a reminder was scheduled in; recurring meetings keep their wall-clock time there."""
+    return pytz.timezone(reminder.tz) if reminder.tz else BOT_TZ
+
+
+def attendee_zones(reminder):
+    """Distinct timezones of a meeting's attendees, the scheduling zone first."""
+    channel = client.get_channel(reminder.channel_id)
+    guild = getattr(channel, 'guild', None)
+    guild_id = guild.id if guild else None
+
+    zones = [reminder_zone(reminder)]
+    for user_id in reminder.users:
+        tz = TIMEZONES.zone_for(user_id, guild_id)
+        if tz not in zones:
+            zones.append(tz)
+            if len(zones) == MAX_ZONES_SHOWN:
+                break
+    return zones
+
+
+def meeting_time_text(reminder):
+    """Meeting time in every attendee's zone, e.g. '2025-01-06 03:00 PM +06 / 2025-01-06 09:00 AM GMT'."""
+    return " / ".join(reminder.time_text(tz) for tz in attendee_zones(reminder))
+
+
+def notification_offsets(reminder):
+    """Minutes before the start at which a reminder notifies, largest first, ending with 0."""
+    return reminder.offsets or REMINDER_INTERVALS
+
+
+def final_notice_offset(reminder):
+    """The last reminder before the start, which confirmed attendees still get (2 minutes by default)."""
+    return min((offset for offset in notification_offsets(reminder) if offset), default=0)
+
+
+def schedule_notifications(reminder, not_before=None):
+    """
+    Queues the notifications of a reminder (15/10/2/0 minutes by default) that are still ahead of `not_before`.
+    Returns the intervals whose time has already passed without being sent.
+    """
+    if not_before is None:
+        not_before = now_local().replace(second=0, microsecond=0)
+
+    missed, fire_times = split_fire_times(
+        reminder.time, notification_offsets(reminder), not_before.timestamp(), reminder.fired
+    )
+    SCHEDULER.add(reminder, fire_times)
+    return missed
+
+
+def activate_reminder(reminder):
+    """Stores a new reminder (or the next occurrence of a series), schedules it and persists it."""
+    REMINDERS.add(reminder)
+    # Intervals already behind us at scheduling time are settled, not "missed"
+    reminder.fired.extend(schedule_notifications(reminder))
+    record_change('add', reminder=reminder.to_json())
+
+
+def remove_reminder(reminder):
+    """Removes a reminder from the store and drops its pending notifications."""
+    SCHEDULER.discard(reminder)
+    REMINDERS.remove(reminder.id)
 
 # ----------------------------------------------------------------------
 # 2. JSON Persistence Functions (Modified Load)
 # ----------------------------------------------------------------------
 
-def save_reminders():
-    """Saves reminders to the JSON file."""
-    serializable_list = []
-    for reminder in REMINDERS_LIST:
-        temp = reminder.copy()
-        
-        # Serialization: datetime to string, int keys to string keys
-        temp['time'] = temp['time'].isoformat()
-        temp['confirmed_users'] = {str(k): v for k, v in temp['confirmed_users'].items()}
-        
-        # Ensure all IDs are stored as strings for consistency in the JSON
-        temp['users'] = [str(uid) for uid in temp['users']]
-        temp['channel_id'] = str(temp['channel_id'])
-        temp['scheduler_id'] = str(temp['scheduler_id'])
-        
-        serializable_list.append(temp)
-        
-    with open(SCHEDULE_FILE, 'w') as f:
-        json.dump(serializable_list, f, indent=4)
+def deserialize_reminder(item):
+    """Builds a Reminder from JSON. Reminders saved before IDs existed get a fresh one."""
+    reminder_id = None if 'id' in item else next(REMINDER_IDS)
+    return Reminder.from_json(item, reminder_id)
+
+
+def snapshot_reminders():
+    """JSON form of every active reminder."""
+    return [reminder.to_json() for reminder in REMINDERS]
+
+
+# Write-behind persistence: handlers queue changes, a worker thread writes them
+WRITER = WriteBehindWriter(
+    JOURNAL,
+    snapshot_reminders,
+    mode=STORAGE_MODE,
+    window=WRITE_BEHIND_WINDOW_SECONDS,
+    durability=PERSISTENCE_DURABILITY,
+    fsync_interval=FSYNC_INTERVAL_SECONDS,
+    on_commit=METRICS.observe_commit,
+    fence=may_write_storage,
+)
+
+
+def record_change(op, **fields):
+    """
+    Persists a single mutation: 'add', 'confirm', 'decline', 'cancel' or 'fire'.
+    Only queues the change; WRITER commits it shortly after without blocking the event loop.
+    """
+    WRITER.submit(op, **fields)
+
+
+def compact_storage():
+    """Folds the journal into reminders.json synchronously (startup only)."""
+    JOURNAL.compact(snapshot_reminders())
 
 
-def load_reminders():
+@tasks.loop(minutes=COMPACTION_INTERVAL_MINUTES)
+async def journal_compactor():
+    """Periodically folds the journal into the base file, off the event loop."""
+    if JOURNAL.records_since_compaction < COMPACTION_MIN_RECORDS or not may_write_storage():
+        return
+
+    # Pending writes are flushed, then snapshot and journal rotation happen together
+    snapshot = await WRITER.begin_compaction()
+    try:
+        await asyncio.to_thread(JOURNAL.finish_compaction, snapshot)
+        print(f"Compacted reminder journal ({len(snapshot)} reminders).")
+    except OSError as e:
+        print(f"Journal compaction failed, will retry: {e}")
+
+
+def load_reminders(catch_up_seconds=0):
     """
-    Loads reminders from the JSON file. 
-    Returns a list of reminders that expired while the bot was offline.
+    Loads reminders from the JSON file and replays the journal on top of it.
+    Notifications due within the last `catch_up_seconds` are still sent normally (HA takeover).
+    Returns (reminders that expired while the bot was offline,
+             [(active reminder, intervals whose notification was skipped during downtime)]).
     """
-    global REMINDERS_LIST
+    global REMINDER_IDS
     expired_reminders = []
-    
-    if SCHEDULE_FILE.exists(): 
-        with open(SCHEDULE_FILE, 'r') as f:
-            try:
-                data = json.load(f)
-                now = datetime.datetime.now(BOT_TZ).replace(second=0, microsecond=0)
-                
-                for item in data:
-                    # Deserialization of IDs
-                    item['users'] = [int(uid) for uid in item['users']]
-                    item['channel_id'] = int(item['channel_id'])
-                    item['scheduler_id'] = int(item['scheduler_id'])
-                    
-                    # Deserialization of Time and Confirmed Users
-                    time_str = item.pop('time') 
-                    meeting_time = datetime.datetime.fromisoformat(time_str).astimezone(BOT_TZ).replace(second=0, microsecond=0)
-                    item['time'] = meeting_time
-                    
-                    confirmed_users_str = item.pop('confirmed_users')
-                    confirmed_users_int = {int(k): v for k, v in confirmed_users_str.items()}
-                    item['confirmed_users'] = confirmed_users_int
-                    
-                    # 🌟 NEW LOGIC: Check for expired meetings
-                    # We check if the meeting time is within the last minute or in the past.
-                    if meeting_time < now:
-                        expired_reminders.append(item)
-                    else:
-                        REMINDERS_LIST.append(item) # Only load active meetings
-                    
-                print(f"Loaded {len(REMINDERS_LIST)} active reminders.")
-                print(f"Found {len(expired_reminders)} expired reminders.")
-                
-            except json.JSONDecodeError:
-                print(f"Error decoding JSON from {SCHEDULE_FILE.name}. File might be empty or corrupted.")
-                REMINDERS_LIST = []
-    else:
+    skipped_notifications = []
+
+    if not SCHEDULE_FILE.exists() and not JOURNAL.journal_path.exists():
         print(f"No {SCHEDULE_FILE.name} found. Starting with an empty reminder list.")
+        return expired_reminders, skipped_notifications
+
+    data = JOURNAL.load()
+    now = now_local().replace(second=0, microsecond=0)
+    if catch_up_seconds:
+        now = min(now, now_local() - datetime.timedelta(seconds=catch_up_seconds))
+
+    # Continue numbering after the highest stored ID
+    REMINDER_IDS = itertools.count(max((int(item['id']) for item in data if 'id' in item), default=0) + 1)
+
+    for item in data:
+        item = deserialize_reminder(item)
+
+        # 🌟 NEW LOGIC: Check for expired meetings
+        # We check if the meeting time is within the last minute or in the past.
+        if item.time < now.timestamp():
+            expired_reminders.append(item)
+
+            # A recurring series continues with its first occurrence after the outage
+            following = item.next_occurrence(reminder_zone(item), after=now)
+            if following:
+                REMINDERS.add(following)
+                following.fired.extend(schedule_notifications(following, now))
+        else:
+            REMINDERS.add(item) # Only load active meetings
+            missed = schedule_notifications(item, now)
+            if missed:
+                skipped_notifications.append((item, missed))
+
+    print(f"Loaded {len(REMINDERS)} active reminders.")
+    print(f"Found {len(expired_reminders)} expired reminders.")
+    print(f"Found {len(skipped_notifications)} reminders with notifications skipped during downtime.")
         
-    return expired_reminders
+    return expired_reminders, skipped_notifications
 
 
 # ----------------------------------------------------------------------
 # 3. Discord Events and Tasks (Modified on_ready)
 # ----------------------------------------------------------------------
 
-# Background task: check reminders every minute and send notifications
-@tasks.loop(minutes=1) 
+# Background task: sleep until the next notification is due, then send it
+@tasks.loop()
 async def reminder_checker():
-    now = datetime.datetime.now(BOT_TZ).replace(second=0, microsecond=0)
+    due = await SCHEDULER.wait_due()
+    tick_started = time.perf_counter()
     reminders_to_remove = []
 
-    for reminder in REMINDERS_LIST:
-        meeting_time = reminder['time']
-        # Time remaining in minutes, rounded down
-        time_difference = int((meeting_time - now).total_seconds() / 60)
-        
-        channel = client.get_channel(reminder['channel_id'])
-        if not channel:
-            continue
+    # Reminders due together are coalesced per (channel, interval) into as few messages as possible;
+    # each entry is (block, reminder id, scheduled fire time for the fire-lag histogram).
+    # Attendees who get DMs are coalesced the same way per (user, interval): (reminder, scheduled time).
+    groups = {}
+    dm_groups = {}
 
+    for reminder, time_difference in due:
         # --- 1. Handle Final Reminder (Time is NOW) ---
         if time_difference == 0:
-            reminders_to_remove.append(reminder) 
+            reminders_to_remove.append(reminder)
+
+            # Send the final "NOW" message to everyone who hasn't declined
+            if DELIVERY.channel_only:
+                mentions, dm_ids = reminder.mentions, ()
+            else:
+                declined = reminder.declined
+                mentions, dm_ids = route_recipients([uid for uid in reminder.users if uid not in declined])
+            if mentions:
+                block = f"{mentions}, your meeting **'{reminder.message}'** is starting now."
+                groups.setdefault((reminder.channel_id, time_difference), []).append((block, (reminder.id, reminder.occurrence), reminder.time))
+            for user_id in dm_ids:
+                dm_groups.setdefault((user_id, time_difference), []).append((reminder, reminder.time))
+            continue
             
-            # Send the final "NOW" message to *everyone*
-            mentions = " ".join([f"<@{uid}>" for uid in reminder['users']])
-            message = (
-                f"⏰ **MEETING TIME IS NOW!** 🔔\n"
-                f"{mentions}, your meeting **'{reminder['message']}'** is starting now."
+        # --- 2. Handle the reminders before the start (15, 10, 2 minutes by default) ---
+        reminder.fired.append(time_difference)
+        record_change('fire', id=reminder.id, interval=time_difference)
+
+        # Users who confirmed only get the last reminder before the start
+        confirmed = reminder.confirmed_users if time_difference != final_notice_offset(reminder) else {}
+        if not confirmed and not SNOOZES and DELIVERY.channel_only:
+            # Nobody to leave out: reuse the cached mentions (declined attendees are never in them)
+            mentions, dm_ids = reminder.mentions, ()
+        else:
+            # A pending snooze stands in for this ping; its own re-ping is about due
+            declined = reminder.declined
+            mentions, dm_ids = route_recipients([
+                uid for uid in reminder.users
+                if uid not in confirmed and uid not in declined and (reminder.id, uid) not in SNOOZES
+            ])
+
+        scheduled = reminder.time - time_difference * 60
+        if mentions:
+            block = (
+                f"{mentions}, you have a meeting scheduled by <@{reminder.scheduler_id}>:\n"
+                f"**Topic:** {reminder.message}\n"
+                f"**Time:** {meeting_time_text(reminder)}" # 12hr format, every attendee's zone
             )
-            await channel.send(message)
+            groups.setdefault((reminder.channel_id, time_difference), []).append((block, (reminder.id, reminder.occurrence), scheduled))
+        for user_id in dm_ids:
+            dm_groups.setdefault((user_id, time_difference), []).append((reminder, scheduled))
+
+    for (channel_id, time_difference), entries in groups.items():
+        channel = client.get_channel(channel_id)
+        if not channel:
             continue
-            
-        # --- 2. Handle 15, 10, 2 Minute Reminders ---
-        if time_difference in REMINDER_INTERVALS:
-            
-            users_to_remind = []
-            
-            for user_id in reminder['users']:
-                
-                # Users who confirmed are stored in the dictionary
-                is_confirmed = user_id in reminder.get('confirmed_users', {})
-                
-                if not is_confirmed:
-                    # If user has NOT confirmed, they get all 15, 10, and 2 min reminders
-                    users_to_remind.append(user_id)
-                
-                elif time_difference == 2:
-                    # If user HAS confirmed, they ONLY get the 2-minute reminder
-                    users_to_remind.append(user_id)
-            
-            
-            if users_to_remind:
-                mentions = " ".join([f"<@{uid}>" for uid in users_to_remind])
-                final_time_msg = f"Meeting starts in **{time_difference} minutes!**"
-                
-                message = (
-                    f"⏰ **MEETING REMINDER!** 📢\n"
-                    f"{mentions}, you have a meeting scheduled by {client.get_user(reminder['scheduler_id']).mention}:\n"
-                    f"**Topic:** {reminder['message']}\n"
-                    f"**Time:** {meeting_time.strftime('%Y-%m-%d %I:%M %p %Z')}\n" # 12hr format in reminder
-                    f"{final_time_msg}\n"
-                    f"Reply with `!ok` to silence the next reminder."
+
+        if time_difference == 0:
+            batches = [entries]
+        else:
+            # The buttons name every reminder of their message, so a message holds
+            # only as many reminders as fit in one custom_id
+            by_meeting = {entry[1]: entry for entry in entries}
+            batches = [[by_meeting[meeting] for meeting in batch] for batch in button_batches(list(by_meeting))]
+
+        for batch in batches:
+            blocks = [block for block, _, _ in batch]
+            if time_difference == 0:
+                messages = pack_messages("⏰ **MEETING TIME IS NOW!** 🔔", blocks)
+                view = None
+            else:
+                messages = pack_messages(
+                    "⏰ **MEETING REMINDER!** 📢",
+                    blocks,
+                    f"Meeting starts in **{format_offset(time_difference)}!**\n"
+                    f"Press **Got it** to silence the next reminder."
                 )
-                await channel.send(message)
+                view = reminder_buttons([meeting for _, meeting, _ in batch])
+            # A notification counts as delivered once the last message of its batch went out
+            on_sent = lag_recorder(time_difference, [scheduled for _, _, scheduled in batch])
+            for index, message in enumerate(messages, 1):
+                last = index == len(messages)
+                OUTBOX.submit(channel, message, on_sent if last else None, view if last else None)
+
+    # DMs go out after the channel messages; lookups run in DM_FANOUT's pool, not in this tick
+    for (user_id, time_difference), entries in dm_groups.items():
+        send_reminder_dms(user_id, time_difference, entries)
 
+    if OUTBOX.depth > 1:
+        print(f"Outbound queue depth: {OUTBOX.depth} messages across {len(OUTBOX.route_depths())} channels.")
 
-    # Clean up finished reminders
+    # Clean up finished reminders; recurring meetings get their next occurrence only now
     for reminder in reminders_to_remove:
-        if reminder in REMINDERS_LIST:
-            REMINDERS_LIST.remove(reminder)
+        if REMINDERS.get(reminder.id) is reminder:
+            REMINDERS.remove(reminder.id)
+
+        following = reminder.next_occurrence(reminder_zone(reminder))
+        if following:
+            activate_reminder(following)
+        else:
+            record_change('fire', id=reminder.id, interval=0)
             
     if reminders_to_remove:
         print(f"Removed {len(reminders_to_remove)} finished reminders.")
 
+    METRICS.observe_tick(time.perf_counter() - tick_started, len(due))
+
+
+async def open_dm_channel(user_id):
+    """DM channel of a user; fetches the user if they are not cached (e.g. left every shared server)."""
+    user = client.get_user(user_id) or await client.fetch_user(user_id)
+    return user.dm_channel or await user.create_dm()
+
+
+def route_recipients(user_ids):
+    """Splits attendees by their delivery setting into (channel mentions, user IDs to DM)."""
+    mentioned = []
+    dm_ids = []
+    for user_id in user_ids:
+        mode = DELIVERY.mode_for(user_id)
+        # Users with closed DMs are mentioned in the channel until DM_FANOUT tries them again
+        if mode != 'channel' and not DM_FANOUT.dm_closed(user_id):
+            dm_ids.append(user_id)
+            if mode == 'dm':
+                continue
+        mentioned.append(f"<@{user_id}>")
+    return " ".join(mentioned), dm_ids
+
+
+def send_reminder_dms(user_id, interval, entries):
+    """Queues one user's DMs for the reminders [(reminder, scheduled time)] that came due together."""
+    guild = getattr(client.get_channel(entries[0][0].channel_id), 'guild', None)
+    tz = TIMEZONES.zone_for(user_id, guild.id if guild else None)
+
+    if interval == 0:
+        batches = [entries]
+    else:
+        by_meeting = {(reminder.id, reminder.occurrence): (reminder, scheduled) for reminder, scheduled in entries}
+        batches = [[by_meeting[meeting] for meeting in batch] for batch in button_batches(list(by_meeting))]
+
+    for batch in batches:
+        if interval == 0:
+            messages = pack_messages(
+                "⏰ **MEETING TIME IS NOW!** 🔔",
+                [f"Your meeting **'{reminder.message}'** in <#{reminder.channel_id}> is starting now." for reminder, _ in batch],
+            )
+            view = None
+        else:
+            messages = pack_messages(
+                "⏰ **MEETING REMINDER!** 📢",
+                [
+                    f"**Topic:** {reminder.message}\n"
+                    f"**Time:** {reminder.time_text(tz)} (scheduled by <@{reminder.scheduler_id}> in <#{reminder.channel_id}>)"
+                    for reminder, _ in batch
+                ],
+                f"Meeting starts in **{format_offset(interval)}!**\n"
+                f"Press **Got it** to silence the next reminder."
+            )
+            view = reminder_buttons([(reminder.id, reminder.occurrence) for reminder, _ in batch])
+        on_sent = lag_recorder(interval, [scheduled for _, scheduled in batch])
+        DM_FANOUT.submit(user_id, messages, view, on_sent, dm_fallback(interval, [reminder for reminder, _ in batch]))
+
+
+# (channel id, interval, reminder id) -> (topic, user IDs who couldn't be DMed), flushed together
+DM_FALLBACKS = {}
+
+
+def dm_fallback(interval, reminders):
+    """DM_FANOUT callback for a refused DM: mention the user in the meetings' channels instead."""
+    def fallback(user_id):
+        if not DM_FALLBACKS:
+            asyncio.get_running_loop().call_later(DM_FALLBACK_DELAY_SECONDS, flush_dm_fallbacks)
+        for reminder in reminders:
+            key = (reminder.channel_id, interval, reminder.id)
+            DM_FALLBACKS.setdefault(key, (reminder.message, []))[1].append(user_id)
+    return fallback
+
+
+def flush_dm_fallbacks():
+    """Sends the batched channel pings for everyone whose DMs were refused."""
+    blocks_by_channel = {}
+    for (channel_id, interval, _), (message, user_ids) in DM_FALLBACKS.items():
+        when = "is starting now" if interval == 0 else f"starts in **{format_offset(interval)}**"
+        mentions = " ".join(f"<@{uid}>" for uid in dict.fromkeys(user_ids))
+        blocks_by_channel.setdefault(channel_id, []).append(f"{mentions}, your meeting **'{message}'** {when}.")
+    DM_FALLBACKS.clear()
+
+    for channel_id, blocks in blocks_by_channel.items():
+        channel = client.get_channel(channel_id)
+        if not channel:
+            continue
+        for message in pack_messages("📪 **Couldn't DM you** (your DMs are closed), so here is your reminder:", blocks):
+            OUTBOX.submit(channel, message)
+
+
+def lag_recorder(interval, scheduled_times):
+    """Returns an Outbox callback that records the fire lag of every notification in a group."""
+    def record():
+        now_ts = CLOCK()
+        for scheduled in scheduled_times:
+            METRICS.observe_fire_lag(interval, now_ts - scheduled)
+    return record
+
+
+@tasks.loop(seconds=METRICS_EXPORT_SECONDS)
+async def metrics_exporter():
+    """Writes the Prometheus text file; rendering stays on the loop, the write goes to a thread."""
+    if not instance_active():
+        return # The active instance owns the shared file
+    try:
+        await asyncio.to_thread(ReminderMetrics.write_textfile, METRICS_FILE, METRICS.render_prometheus())
+    except OSError as e:
+        print(f"Failed to write metrics file: {e}")
+
 
 
 @client.event
 async def on_ready():
-    # 🌟 NEW: Load data and get list of expired reminders
-    expired_reminders = load_reminders()
-    
-    # 🌟 NEW: Process Expired Reminders
-    if expired_reminders:
-        await process_expired_reminders(expired_reminders)
-        # Save after cleanup to remove expired items from the JSON file
-        save_reminders() 
-    
     print(f'Bot is ready and logged in as {client.user}')
     print(f'Using Timezone: {TIMEZONE_STR}')
-    reminder_checker.start()
+
+    # on_ready fires again after reconnects; reminders are only loaded once
+    if LEASE is None:
+        if not ACTIVE:
+            await activate_instance()
+    elif not lease_keeper.is_running():
+        print(f"HA mode: instance {INSTANCE_NAME} waiting for the lease in {Path(HA_LEASE_FILE).name}")
+        lease_keeper.start()
+
+    if METRICS_FILE and not metrics_exporter.is_running():
+        metrics_exporter.start()
+    if METRICS_HTTP_PORT and getattr(client, 'metrics_server', None) is None:
+        client.metrics_server = await METRICS.serve(METRICS_HTTP_HOST, METRICS_HTTP_PORT)
+        print(f"Serving metrics on http://{METRICS_HTTP_HOST}:{METRICS_HTTP_PORT}/metrics")
     await client.change_presence(activity=discord.Game(name=f'{BOT_PREFIX}schedule | {BOT_PREFIX}ok'))
 
 
-async def process_expired_reminders(expired_reminders):
-    """Sends a message about expired meetings found on startup."""
-    
+async def activate_instance(catch_up_seconds=0):
+    """Loads the shared reminder files and starts firing reminders."""
+    global ACTIVE
+    ACTIVE = True
+
+    # 🌟 NEW: Load data and get the notifications missed while offline
+    JOURNAL.close() # Another instance may have rotated the files since we last wrote
+    TIMEZONES.load()
+    GUILD_OFFSETS.load()
+    DELIVERY.load()
+    expired_reminders, skipped_notifications = load_reminders(catch_up_seconds)
+
+    # Fold the replayed journal (and drop expired items) into a fresh base file. Items from
+    # before reminder IDs existed must be written back too: journal records refer to the IDs
+    # they were just given, and would match nothing on the next replay otherwise.
+    if expired_reminders or JOURNAL.records_since_compaction or JOURNAL.legacy_items:
+        compact_storage()
+
+    # Live reminders start first; the catch-up digest is queued behind them
+    reminder_checker.start()
+    if expired_reminders or skipped_notifications:
+        send_catch_up_digest(expired_reminders, skipped_notifications)
+    if STORAGE_MODE == 'journal' and not journal_compactor.is_running():
+        journal_compactor.start()
+
+
+async def deactivate_instance():
+    """Stops firing and forgets the in-memory reminders; the new lease holder owns them now."""
+    global ACTIVE
+    ACTIVE = False
+    for loop in (reminder_checker, journal_compactor):
+        task = loop.get_task()
+        loop.cancel()
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    WRITER.discard()
+    for handle in SNOOZES.values():
+        handle.cancel()
+    SNOOZES.clear()
+    SCHEDULER.clear()
+    REMINDERS.clear()
+
+
+@tasks.loop(seconds=HA_HEARTBEAT_SECONDS)
+async def lease_keeper():
+    """HA heartbeat: renew or try to take the lease, and start/stop firing to match."""
+    try:
+        held = await asyncio.to_thread(LEASE.acquire)
+    except sqlite3.Error as e:
+        # Can't reach the lease right now: keep going only while the last renewal lasts
+        print(f"Lease heartbeat failed: {e}")
+        held = LEASE.held()
+
+    if held and not ACTIVE:
+        print(f"Instance {INSTANCE_NAME} took the lease (epoch {LEASE.epoch}); now active.")
+        # Notifications that came due while nobody held the lease are sent late, not reported missed
+        await activate_instance(catch_up_seconds=HA_LEASE_SECONDS + 2 * HA_HEARTBEAT_SECONDS)
+    elif not held and ACTIVE:
+        print(f"Instance {INSTANCE_NAME} lost the lease; standing by.")
+        await deactivate_instance()
+
+
+@client.check
+async def active_instance_only(ctx):
+    """Standby instances stay silent; the lease holder answers every command."""
+    return instance_active()
+
+
+def send_catch_up_digest(expired_reminders, skipped_notifications):
+    """
+    Queues one digest per channel covering everything missed while the bot was offline:
+    meetings that already started, and upcoming meetings whose 15/10/2 minute pings were skipped.
+    Delivery goes through OUTBOX, so startup never waits on these sends.
+    """
+    now_ts = CLOCK()
+    blocks_by_channel = {}
+
     for reminder in expired_reminders:
-        channel = client.get_channel(reminder['channel_id'])
-        if channel:
-            mentions = " ".join([f"<@{uid}>" for uid in reminder['users']])
-            
-            # The time the meeting was scheduled for
-            meeting_time_str = reminder['time'].strftime('%Y-%m-%d %I:%M %p %Z')
-            
-            # Message explaining the missed event
-            message = (
-                f"⚠️ **MISSED MEETING ALERT - Bot Restarted** ⚠️\n"
-                f"The meeting **'{reminder['message']}'** scheduled for `{meeting_time_str}` "
-                f"was missed while the bot was offline.\n"
-                f"**Participants:** {mentions}\n"
-                f"This schedule has been automatically removed."
-            )
-            await channel.send(message)
-    
-    print(f"Successfully notified channels about {len(expired_reminders)} missed meetings.")
+        following = REMINDERS.get(reminder.id)
+        status = f"next: `{meeting_time_text(following)}`" if following else "removed"
+        blocks_by_channel.setdefault(reminder.channel_id, []).append(
+            f"❌ **'{reminder.message}'** scheduled for `{meeting_time_text(reminder)}` was missed. "
+            f"**Participants:** {reminder.mentions} ({status})"
+        )
+
+    for reminder, missed in skipped_notifications:
+        minutes_left = max(0, int((reminder.time - now_ts) / 60))
+        missed_text = "/".join(str(interval) for interval in missed)
+        blocks_by_channel.setdefault(reminder.channel_id, []).append(
+            f"⏰ {reminder.mentions}, **'{reminder.message}'** at `{meeting_time_text(reminder)}` "
+            f"starts in **{minutes_left} minutes** (missed the {missed_text}-minute reminder{'s' if len(missed) > 1 else ''})."
+        )
+
+        # The digest stands in for the skipped pings; don't report them again after another restart
+        for interval in missed:
+            reminder.fired.append(interval)
+            record_change('fire', id=reminder.id, interval=interval)
+
+    queued = 0
+    for channel_id, blocks in blocks_by_channel.items():
+        channel = client.get_channel(channel_id)
+        if not channel:
+            continue
+        for message in pack_messages("⚠️ **MISSED NOTIFICATIONS - Bot Restarted** ⚠️", blocks):
+            OUTBOX.submit(channel, message)
+            queued += 1
+
+    print(f"Queued {queued} catch-up digest messages for {len(expired_reminders)} missed meetings "
+          f"and {len(skipped_notifications)} skipped reminders.")
 
 
 # ----------------------------------------------------------------------
-# 4. Command Logic (Modified to include save_reminders())
+# 4. Command Logic (Changes persisted via record_change())
 # ----------------------------------------------------------------------
 
-# --- !SCHEDULE command (ADDED save_reminders) ---
-@client.command(name='schedule', help='Schedule a meeting reminder. Format: !schedule "<YYYY-MM-DD HH:MM AM/PM>" or "<HH:M>" or "<HH:MM AM/PM>" <@user1 @user2...> <Meeting Topic>')
+# --- !SCHEDULE command ---
+@client.command(name='schedule', help='Schedule a meeting reminder. Format: !schedule "<YYYY-MM-DD HH:MM AM/PM>" or "<HH:M>" or "<HH:MM AM/PM>" or "tomorrow 3pm" or "in 45m" <@user1 @user2...> <Meeting Topic> [--repeat daily|weekdays|weekly|mon,wed,fri|3d] [--until YYYY-MM-DD] [--count N] [--remind 60,30,5]')
 async def schedule_meeting(ctx, date_time_str: str, *args):
     scheduler_id = ctx.author.id
-    now = datetime.datetime.now(BOT_TZ).replace(second=0, microsecond=0)
-    meeting_time = None
-    
-    # 1. Attempt to Parse Date and Time (Parsing logic remains unchanged)
-    try:
-        # A. Full format: "YYYY-MM-DD HH:MM AM/PM"
-        naive_dt = datetime.datetime.strptime(date_time_str, '%Y-%m-%d %I:%M %p')
-        meeting_time = BOT_TZ.localize(naive_dt).replace(second=0, microsecond=0)
-        
-    except ValueError:
-        # B. Smart Time-Only Parsing (HH:M AM/PM or HH:M)
-        time_only_match = re.match(r'^(\d{1,2}:\d{1,2})( (AM|PM))?$', date_time_str, re.IGNORECASE)
-        
-        if time_only_match:
-            time_raw = time_only_match.group(1) 
-            ampm_part = time_only_match.group(2) 
-            
-            # --- NORMALIZATION STEP ---
-            try:
-                hour_str, minute_str = time_raw.split(':')
-                if len(minute_str) == 1:
-                    minute_str = '0' + minute_str
-                time_part = f"{hour_str}:{minute_str}" 
-            except ValueError:
-                return await ctx.send(f"❌ **Error:** Time format issue encountered during normalization. Please check your time input.")
-            # --------------------------
-            
-            date_today = now.date()
-            
-            if ampm_part:
-                # Case 1: Format: "HH:MM AM/PM" (Explicit AM/PM)
-                try:
-                    time_with_ampm = time_part + ampm_part 
-                    time_obj = datetime.datetime.strptime(time_with_ampm, '%I:%M %p').time()
-                    naive_dt = datetime.datetime.combine(date_today, time_obj)
-                    meeting_time = BOT_TZ.localize(naive_dt).replace(second=0, microsecond=0)
-                    
-                    if meeting_time <= now:
-                        date_tomorrow = date_today + datetime.timedelta(days=1)
-                        naive_dt = datetime.datetime.combine(date_tomorrow, time_obj)
-                        meeting_time = BOT_TZ.localize(naive_dt).replace(second=0, microsecond=0)
-                        
-                except ValueError:
-                    pass 
+    tz = user_zone(ctx)
+    now = now_local(tz).replace(second=0, microsecond=0)
+
+    # "tomorrow 3pm" and "in 45m" also work without quotes
+    if date_time_str.lower() in ('today', 'tomorrow', 'in') and args:
+        date_time_str = f"{date_time_str} {args[0]}"
+        args = args[1:]
+        if args and args[0].lower().rstrip('.') in ('am', 'pm', 'a.m', 'p.m'):
+            date_time_str = f"{date_time_str} {args[0]}"
+            args = args[1:]
+
+    # 1. Parse the date and time in the author's timezone
+    meeting_time, _, error = parse_time_expression(date_time_str, now, tz)
 
-            else:
-                # Case 2: Format: "HH:MM" (Naked Time - AM/PM must be guessed)
-                try:
-                    # 1. Try PM first
-                    time_with_pm = time_part + " PM"
-                    time_obj_pm = datetime.datetime.strptime(time_with_pm, '%I:%M %p').time()
-                    naive_dt_pm = datetime.datetime.combine(date_today, time_obj_pm)
-                    meeting_time_pm = BOT_TZ.localize(naive_dt_pm).replace(second=0, microsecond=0)
-
-                    if meeting_time_pm > now:
-                        meeting_time = meeting_time_pm
-                    else:
-                        # 2. If PM is in the past, try AM for tomorrow
-                        time_with_am = time_part + " AM"
-                        time_obj_am = datetime.datetime.strptime(time_with_am, '%I:%M %p').time()
-                        
-                        date_tomorrow = date_today + datetime.timedelta(days=1)
-                        naive_dt_am = datetime.datetime.combine(date_tomorrow, time_obj_am)
-                        meeting_time = BOT_TZ.localize(naive_dt_am).replace(second=0, microsecond=0)
-
-                except ValueError:
-                    # Fallback: If 12-hour parsing fails (e.g., input was "13:30"), try 24-hour parsing
-                    try:
-                        time_obj = datetime.datetime.strptime(time_part, '%H:%M').time()
-                        naive_dt = datetime.datetime.combine(date_today, time_obj)
-                        meeting_time = BOT_TZ.localize(naive_dt).replace(second=0, microsecond=0)
-
-                        if meeting_time <= now:
-                            date_tomorrow = date_today + datetime.timedelta(days=1)
-                            naive_dt = datetime.datetime.combine(date_tomorrow, time_obj)
-                            meeting_time = BOT_TZ.localize(naive_dt).replace(second=0, microsecond=0)
-                    except ValueError:
-                        pass 
-        
-        
     if not meeting_time:
-        return await ctx.send(
-            f"❌ **Error:** Invalid date/time format. Use `\"YYYY-MM-DD HH:MM AM/PM\"`, `\"HH:MM AM/PM\"`, or just `\"HH:M\"` (e.g., `\"11:2\"` for 11:02 PM/AM, which smartly picks the next occurrence)."
-        )
+        return await ctx.send(f"❌ **Error:** {error}")
 
     # 2. Check if the meeting is in the past
     if meeting_time < now + datetime.timedelta(minutes=1):
         return await ctx.send("❌ **Error:** Cannot schedule a meeting in the past or immediately. Please choose a future time.")
 
-    # 3. Separate Mentions from the Message Topic
+    # 3. Pull out reminder offsets (--remind) and repeat options (--repeat/--until/--count)
+    try:
+        offsets, args = parse_offset_args(args)
+        recurrence, args = parse_recurrence_args(args, meeting_time.weekday())
+    except ValueError as e:
+        return await ctx.send(f"❌ **Error:** {e}")
+    if offsets is None:
+        offsets = GUILD_OFFSETS.offsets_for(ctx.guild.id if ctx.guild else None)
+
+    if recurrence:
+        meeting_time = recurrence.first_occurrence(meeting_time, tz)
+        if recurrence.until is not None and meeting_time.date() > recurrence.until:
+            return await ctx.send("❌ **Error:** The `--until` date is before the first occurrence.")
+
+    # 4. Separate Mentions from the Message Topic
     mentioned_ids = []
     message_parts = []
     
@@ -342,118 +751,479 @@ async def schedule_meeting(ctx, date_time_str: str, *args):
     elif not mentioned_ids:
         return await ctx.send("❌ **Error:** Please mention at least one other user for the meeting, or include a topic.")
 
-    # 4. Store the new reminder
-    new_reminder = {
-        'time': meeting_time,
-        'users': mentioned_ids,
-        'message': meeting_topic,
-        'channel_id': ctx.channel.id, 
-        'scheduler_id': scheduler_id,
-        'confirmed_users': {} # Key: user_id, Value: datetime_confirmed (Not used for JSON here, just the ID is key)
-    }
-    REMINDERS_LIST.append(new_reminder)
+    # 5. Store the new reminder (a recurring series is stored once, as its next occurrence)
+    new_reminder = Reminder(
+        next(REMINDER_IDS),
+        meeting_time.timestamp(),
+        mentioned_ids,
+        meeting_topic,
+        ctx.channel.id,
+        scheduler_id,
+        recurrence=recurrence,
+        tz=tz.zone,
+        offsets=offsets,
+    )
     
     # 🌟 NEW: Save data after successful scheduling
-    save_reminders() 
+    activate_reminder(new_reminder)
     
-    # 5. Confirmation Message
-    user_mentions_str = " ".join([f"<@{uid}>" for uid in mentioned_ids])
+    # 6. Confirmation Message
+    user_mentions_str = new_reminder.mentions
+    repeat_line = f"**Repeats:** {recurrence.describe()}\n" if recurrence else ""
     
     confirmation_message = (
         f"✅ **Reminder Set!**\n"
         f"**Topic:** {meeting_topic}\n"
-        f"**Time:** {meeting_time.strftime('%Y-%m-%d %I:%M %p %Z')}\n"
+        f"**Time:** {meeting_time_text(new_reminder)}\n"
+        f"{repeat_line}"
         f"**Participants:** {user_mentions_str}\n"
         f"Type `!list` to see your active scheduled meetings\n"
-        f"Reminders will be sent at 15, 10, and 2 minutes. Use `!ok` to skip 15/10 min reminders."
+        f"{reminder_plan_text(new_reminder)}"
     )
     await ctx.send(confirmation_message)
 
-# --- !OK Command (ADDED save_reminders) ---
+def reminder_plan_text(reminder):
+    """'Reminders will be sent 15, 10 and 2 minutes before the start. ...' for a reminder's offsets."""
+    final = final_notice_offset(reminder)
+    text = f"Reminders will be sent {describe_offsets(notification_offsets(reminder))} before the start."
+    earlier = [offset for offset in notification_offsets(reminder) if offset > final]
+    if earlier:
+        text += f" Use `!ok` to skip the {join_words(offset_label(offset) for offset in earlier)} reminder{'s' if len(earlier) > 1 else ''}."
+    return text
+
+# --- !IMPORT command ---
+MAX_LISTED_REJECTIONS = 15
+
+
+def build_imported_reminder(ctx, row, now, tz):
+    """Validates one import row like a !schedule command. Raises ValueError with the reason it was rejected."""
+    if row is None:
+        raise ValueError("not an object")
+    if not row.get('time'):
+        raise ValueError("missing `time`")
+
+    meeting_time, code, _ = parse_time_expression(row['time'], now, tz)
+    if not meeting_time:
+        raise ValueError(f"invalid time `{row['time']}` ({code.replace('_', ' ')})")
+    if meeting_time < now + datetime.timedelta(minutes=1):
+        raise ValueError(f"`{row['time']}` is in the past")
+
+    recurrence, _ = parse_recurrence_args(recurrence_args(row), meeting_time.weekday())
+    if row.get('remind'):
+        offsets = parse_offsets(row['remind'])
+    else:
+        offsets = GUILD_OFFSETS.offsets_for(ctx.guild.id if ctx.guild else None)
+    if recurrence:
+        meeting_time = recurrence.first_occurrence(meeting_time, tz)
+        if recurrence.until is not None and meeting_time.date() > recurrence.until:
+            raise ValueError("the `until` date is before the first occurrence")
+
+    def resolve_member(name):
+        member = ctx.guild.get_member_named(name) if ctx.guild else None
+        return member.id if member else None
+
+    mentioned_ids = parse_attendees(row.get('attendees'), resolve_member)
+    if ctx.author.id not in mentioned_ids:
+        mentioned_ids.append(ctx.author.id)
+
+    channel_ref = parse_channel_ref(row.get('channel'))
+    if channel_ref is None:
+        channel = ctx.channel
+    elif isinstance(channel_ref, int):
+        channel = client.get_channel(channel_ref)
+    else:
+        channel = discord.utils.get(ctx.guild.text_channels, name=channel_ref) if ctx.guild else None
+    # Imports may only target channels of the server they were run in
+    if channel is None or getattr(channel, 'guild', None) != ctx.guild:
+        raise ValueError(f"unknown channel `{row['channel']}`")
+
+    return Reminder(
+        next(REMINDER_IDS),
+        meeting_time.timestamp(),
+        mentioned_ids,
+        row.get('topic') or "Untitled Meeting",
+        channel.id,
+        ctx.author.id,
+        recurrence=recurrence,
+        tz=tz.zone,
+        offsets=offsets,
+    )
+
+
+@client.command(name='import', help='Schedules many meetings at once from an attached CSV or JSON file with time, attendees, topic and channel columns (optional: repeat, until, count, remind).')
+async def import_meetings(ctx):
+    if not ctx.message.attachments:
+        return await ctx.send(
+            "❌ **Import Failed:** Attach a `.csv` or `.json` file with `time`, `attendees`, `topic` and `channel` columns "
+            "(`repeat`, `until`, `count` and `remind` are optional)."
+        )
+
+    attachment = ctx.message.attachments[0]
+    if attachment.size > MAX_IMPORT_BYTES:
+        return await ctx.send(f"❌ **Import Failed:** The file is larger than {MAX_IMPORT_BYTES // 1000} KB.")
+
+    try:
+        rows = read_import_file(attachment.filename, await attachment.read())
+    except ValueError as e:
+        return await ctx.send(f"❌ **Import Failed:** {e}")
+
+    # 1. Validate every row first; nothing is stored while the batch is being checked
+    tz = user_zone(ctx)
+    now = now_local(tz).replace(second=0, microsecond=0)
+    imported = []
+    rejected = []
+    for number, row in rows:
+        try:
+            imported.append(build_imported_reminder(ctx, row, now, tz))
+        except ValueError as e:
+            rejected.append(f"Row {number}: {e}")
+
+    # 2. Store the accepted rows and persist them as one batch
+    for reminder in imported:
+        activate_reminder(reminder)
+    if imported:
+        await WRITER.flush()
+
+    # 3. One summary reply
+    message = (
+        f"{'✅' if imported else '❌'} **Import Complete!**\n"
+        f"Scheduled **{len(imported)}** of {len(rows)} meetings from `{attachment.filename}`."
+    )
+    if imported:
+        first, last = min(r.time for r in imported), max(r.time for r in imported)
+        message += (
+            f"\n**From:** {ZONE_CACHE.fromtimestamp(first, tz).strftime('%Y-%m-%d %I:%M %p')} "
+            f"**to** {ZONE_CACHE.fromtimestamp(last, tz).strftime('%Y-%m-%d %I:%M %p %Z')}"
+        )
+    if rejected:
+        message += f"\n\n⚠️ **Rejected {len(rejected)} row{'s' if len(rejected) > 1 else ''}:**\n" + "\n".join(
+            line[:150] for line in rejected[:MAX_LISTED_REJECTIONS]
+        )
+        if len(rejected) > MAX_LISTED_REJECTIONS:
+            message += f"\n...and {len(rejected) - MAX_LISTED_REJECTIONS} more."
+    if imported:
+        message += "\nType `!list` to see your meetings."
+    await ctx.send(message)
+
+
+def confirmation_skip_message(reminder, now_ts):
+    """Which notifications a confirmation made at `now_ts` skips."""
+    minutes_until_meeting = int((reminder.time - now_ts) / 60)
+    final = final_notice_offset(reminder)
+    skipped = [
+        offset for offset in notification_offsets(reminder)
+        if final < offset < minutes_until_meeting and offset not in reminder.fired
+    ]
+
+    if skipped:
+        labels = join_words(offset_label(offset) for offset in skipped)
+        return f"You will skip the **{labels}** reminder{'s' if len(skipped) > 1 else ''}."
+    elif minutes_until_meeting > final:
+        return f"You have confirmed the next reminders. You will only receive the **{offset_label(final)}** reminder."
+    return "Only the **'Meeting is NOW'** reminder will be sent to you."
+
+
+# --- !OK Command ---
 @client.command(name='ok', help='Acknowledges the meeting reminder to silence the next notification.')
 async def confirm_meeting(ctx):
     user_id = ctx.author.id
-    now = datetime.datetime.now(BOT_TZ)
+    now = now_local()
     
     # 1. Find the NEXT meeting the user is attending and is NOT YET started.
-    relevant_reminders = sorted([
-        r for r in REMINDERS_LIST 
-        if user_id in r['users'] and r['time'] > now
-    ], key=lambda r: r['time']) 
+    reminder = REMINDERS.next_for_attendee(user_id, now.timestamp())
 
-    if not relevant_reminders:
+    if not reminder:
         return await ctx.send("ℹ️ You have no active meetings scheduled to confirm.")
-
-    reminder = relevant_reminders[0]
     
     # Check if the user has already confirmed the next reminder
-    if user_id in reminder['confirmed_users']:
-        return await ctx.send(f"ℹ️ You have already confirmed the next reminder for **'{reminder['message']}'**.")
+    if user_id in reminder.confirmed_users:
+        return await ctx.send(f"ℹ️ You have already confirmed the next reminder for **'{reminder.message}'**.")
 
     # 2. Update the reminder status (Note: The datetime value stored here doesn't matter for persistence, only the key)
-    reminder['confirmed_users'][user_id] = now
+    reminder.confirmed_users[user_id] = now.isoformat()
     
     # 🌟 NEW: Save data after successful confirmation
-    save_reminders()
+    record_change('confirm', id=reminder.id, user=str(user_id), at=reminder.confirmed_users[user_id])
     
     # 3. Determine skip message based on current time
-    minutes_until_meeting = int((reminder['time'] - now).total_seconds() / 60)
-    
-    skip_message = ""
-    
-    if minutes_until_meeting > 15:
-        skip_message = "You will skip the **15-minute and 10-minute** reminders."
-    elif minutes_until_meeting > 10:
-        skip_message = "You will skip the **10-minute** reminder."
-    elif minutes_until_meeting > 2:
-        skip_message = "You have confirmed the next reminders. You will only receive the **2-minute** reminder."
-    else:
-        skip_message = "Only the **'Meeting is NOW'** reminder will be sent to you."
+    skip_message = confirmation_skip_message(reminder, now.timestamp())
 
 
     # 4. Send Confirmation
     await ctx.send(
         f"✅ **Confirmation Received!**\n"
-        f"For meeting **'{reminder['message']}'** at `{reminder['time'].strftime('%I:%M %p %Z')}`.\n"
+        f"For meeting **'{reminder.message}'** at `{reminder.local_time(user_zone(ctx)).strftime('%I:%M %p %Z')}`.\n"
         f"{skip_message}\n"
         f"You will still receive the final **'Meeting is NOW'** reminder."
     )
 
 
-# --- !LIST command (Unchanged) ---
-@client.command(name='list', help='Lists all currently scheduled meeting reminders by you.')
-async def list_meetings(ctx):
+# --- Reminder buttons (Got it / Snooze 5m / Can't attend) ---
+SNOOZE_MINUTES = 5
+SNOOZES = {} # (reminder id, user id) -> asyncio.TimerHandle; in memory only, a restart drops pending snoozes
+
+
+def send_snoozed_reminder(reminder, user_id):
+    """Re-pings one attendee after a snooze, unless the meeting was cancelled or declined meanwhile."""
+    SNOOZES.pop((reminder.id, user_id), None)
+    if REMINDERS.get(reminder.id) is not reminder or user_id in reminder.declined:
+        return
+    channel = client.get_channel(reminder.channel_id)
+    if not channel:
+        return
+
+    minutes_left = max(0, round((reminder.time - CLOCK()) / 60))
+    tz = TIMEZONES.zone_for(user_id, getattr(getattr(channel, 'guild', None), 'id', None))
+    message = (
+        f"⏰ <@{user_id}>, snoozed reminder: **'{reminder.message}'** at `{reminder.time_text(tz)}` "
+        f"starts in **{minutes_left} minutes**."
+    )
+    if DELIVERY.mode_for(user_id) != 'channel' and not DM_FANOUT.dm_closed(user_id):
+        DM_FANOUT.submit(user_id, [message], on_closed=lambda _: OUTBOX.submit(channel, message))
+    else:
+        OUTBOX.submit(channel, message)
+
+
+def snooze_reminder(reminder, user_id):
+    """Schedules a personal re-ping; snoozing again restarts the timer."""
+    key = (reminder.id, user_id)
+    if key in SNOOZES:
+        SNOOZES[key].cancel()
+    SNOOZES[key] = asyncio.get_running_loop().call_later(
+        SNOOZE_MINUTES * 60, send_snoozed_reminder, reminder, user_id
+    )
+
+
+async def handle_reminder_action(interaction, action, meetings):
+    """Handles a click on a reminder button; every answer is ephemeral."""
+    if not instance_active():
+        return # Standby instance: the active one answers
+    user_id = interaction.user.id
+    now_ts = CLOCK()
+    tz = TIMEZONES.zone_for(user_id, interaction.guild_id)
+
+    # A message can cover several meetings; the click applies to the ones this user attends.
+    # A recurring series keeps its ID, so the button must name the occurrence that is live now
+    # (buttons without one predate occurrence numbers and only count for one-off meetings).
+    reminders = []
+    stale = False
+    for reminder_id, occurrence in meetings:
+        reminder = REMINDERS.get(reminder_id)
+        if reminder is None:
+            continue
+        if occurrence is None:
+            live = reminder.recurrence is None
+        else:
+            live = reminder.occurrence == occurrence
+        if not live:
+            stale = True
+            continue
+        if reminder.time > now_ts and user_id in reminder.users:
+            reminders.append(reminder)
+    if not reminders and stale:
+        return await interaction.response.send_message(
+            "ℹ️ This reminder is for an earlier occurrence of the meeting. Use the buttons on its latest reminder.",
+            ephemeral=True,
+        )
+    if not reminders:
+        return await interaction.response.send_message(
+            "ℹ️ None of these meetings are waiting on you: they started, were cancelled, or you're not an attendee.",
+            ephemeral=True,
+        )
+
+    lines = []
+    for reminder in reminders:
+        meeting = f"**'{reminder.message}'** at `{reminder.local_time(tz).strftime('%I:%M %p %Z')}`"
+        if user_id in reminder.declined:
+            lines.append(f"ℹ️ You already said you can't attend {meeting}.")
+
+        elif action == 'ok':
+            if user_id in reminder.confirmed_users:
+                lines.append(f"ℹ️ You have already confirmed {meeting}.")
+                continue
+            reminder.confirmed_users[user_id] = now_local().isoformat()
+            record_change('confirm', id=reminder.id, user=str(user_id), at=reminder.confirmed_users[user_id])
+            lines.append(f"✅ Got it: {meeting}. {confirmation_skip_message(reminder, now_ts)}")
+
+        elif action == 'snooze':
+            if reminder.time - now_ts <= SNOOZE_MINUTES * 60:
+                lines.append(f"ℹ️ {meeting} starts in under {SNOOZE_MINUTES} minutes; the next reminder is already close.")
+                continue
+            snooze_reminder(reminder, user_id)
+            lines.append(f"💤 I'll remind you about {meeting} again in {SNOOZE_MINUTES} minutes.")
+
+        else:
+            reminder.decline(user_id)
+            record_change('decline', id=reminder.id, user=user_id)
+            lines.append(f"🚫 You won't get more reminders for {meeting}.")
+
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+
+ReminderAction.handler = handle_reminder_action
+client.add_dynamic_items(ReminderAction)
+
+
+# --- !LIST command ---
+LIST_PAGE_SIZE = 8
+LIST_ATTENDEES_SHOWN = 15
+USER_MENTION_RE = re.compile(r'^<@!?(\d+)>$')
+CHANNEL_MENTION_RE = re.compile(r'^<#(\d+)>$')
+
+
+def parse_list_filters(args, tz):
+    """
+    Reads !list filters: from:YYYY-MM-DD, to:YYYY-MM-DD (inclusive, in `tz`), with:@user and in:#channel.
+    A bare @mention or #channel works too. Raises ValueError with a user-facing message.
+    """
+    query = {'start': None, 'end': None, 'attendee_id': None, 'channel_id': None}
+    for arg in args:
+        key, _, value = arg.partition(':') if not arg.startswith('<') else ('', '', arg)
+        key = key.lower()
+
+        if key in ('from', 'to'):
+            try:
+                day = datetime.date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"`{arg}`: dates look like `{key}:2025-12-31`.")
+            if key == 'to':
+                day += datetime.timedelta(days=1)
+            midnight = ZONE_CACHE.localize(tz, datetime.datetime.combine(day, datetime.time.min)).timestamp()
+            query['start' if key == 'from' else 'end'] = midnight
+            continue
+
+        user_match = USER_MENTION_RE.match(value)
+        channel_match = CHANNEL_MENTION_RE.match(value)
+        if key in ('', 'with') and (user_match or (key == 'with' and value.isdigit())):
+            query['attendee_id'] = int(user_match.group(1) if user_match else value)
+        elif key in ('', 'in') and (channel_match or (key == 'in' and value.isdigit())):
+            query['channel_id'] = int(channel_match.group(1) if channel_match else value)
+        else:
+            raise ValueError(
+                f"Unknown filter `{arg}`. Use `from:YYYY-MM-DD`, `to:YYYY-MM-DD`, `with:@user` or `in:#channel`."
+            )
+    return query
+
+
+def meeting_list_page(user_id, tz, query, cursor, page_number):
+    """Builds one !list page from the scheduler index. Returns (embed, cursor of the next page or None)."""
+    channel_id = query['channel_id']
+    reminders, next_cursor = REMINDERS.page_for_scheduler(
+        user_id,
+        after=cursor,
+        limit=LIST_PAGE_SIZE,
+        start=query['start'],
+        end=query['end'],
+        attendee_id=query['attendee_id'],
+        predicate=(lambda reminder: reminder.channel_id == channel_id) if channel_id else None,
+    )
+
+    embed = discord.Embed(title="📅 Your Active Scheduled Meetings", color=discord.Color.blurple())
+    for reminder in reminders:
+        attendees = [uid for uid in reminder.users if uid != user_id]
+        attendee_mentions = " ".join([f"<@{uid}>" for uid in attendees[:LIST_ATTENDEES_SHOWN]])
+        if len(attendees) > LIST_ATTENDEES_SHOWN:
+            attendee_mentions += f" +{len(attendees) - LIST_ATTENDEES_SHOWN} more"
+        repeat_line = f"**Repeats:** {reminder.recurrence.describe()}\n" if reminder.recurrence else ""
+        remind_line = f"**Reminders:** {describe_offsets(reminder.offsets)} before\n" if reminder.offsets else ""
+        declined_text = f", {len(reminder.declined)} can't attend" if reminder.declined else ""
+
+        embed.add_field(
+            name=f"ID {reminder.id} · {reminder.time_text(tz)} ({len(reminder.confirmed_users)}/{len(reminder.users)} confirmed{declined_text})",
+            value=(
+                f"**Topic:** {reminder.message[:300]}\n"
+                f"{repeat_line}"
+                f"{remind_line}"
+                f"**Channel:** <#{reminder.channel_id}>\n"
+                f"**Attendees:** {attendee_mentions if attendees else 'Just you'}"
+            )[:1024],
+            inline=False,
+        )
+
+    if not reminders:
+        embed.description = "No more meetings."
+    embed.set_footer(text=f"Page {page_number} · Times in {tz.zone} · {BOT_PREFIX}cancel <ID> to cancel, {BOT_PREFIX}cancel all for everything")
+    return embed, next_cursor
+
+
+@client.command(name='list', help='Lists the meetings you scheduled, page by page. Optional filters: from:YYYY-MM-DD to:YYYY-MM-DD with:@user in:#channel')
+async def list_meetings(ctx, *filters):
     user_id = ctx.author.id
-    
-    user_reminders = [r for r in REMINDERS_LIST if r['scheduler_id'] == user_id]
-    
-    if not user_reminders:
+    tz = user_zone(ctx)
+
+    try:
+        query = parse_list_filters(filters, tz)
+    except ValueError as e:
+        return await ctx.send(f"❌ **Error:** {e}")
+
+    # Pages are built on demand as the buttons are clicked
+    pager = ListPager(user_id, lambda cursor, page_number: meeting_list_page(user_id, tz, query, cursor, page_number))
+    embed = pager.render()
+
+    if not embed.fields:
+        pager.stop()
+        if filters:
+            return await ctx.send("ℹ️ None of your active meetings match those filters.")
         return await ctx.send("ℹ️ You have no active meeting reminders scheduled.")
 
-    message = "📅 **Your Active Scheduled Meetings:**\n\n"
-    
-    for i, reminder in enumerate(user_reminders):
-        temp_id = i + 1
-        
-        attendees = [uid for uid in reminder['users'] if uid != user_id]
-        attendee_mentions = " ".join([f"<@{uid}>" for uid in attendees])
-        
-        confirmed_count = len(reminder.get('confirmed_users', {}))
-        status = f" ({confirmed_count}/{len(reminder['users'])} confirmed)"
-        
-        message += (
-            f"**ID:** `{temp_id}` {status}\n"
-            f"**Time:** {reminder['time'].strftime('%Y-%m-%d %I:%M %p %Z')}\n" # 12hr format
-            f"**Topic:** {reminder['message']}\n"
-            f"**Attendees:** {attendee_mentions if attendees else 'Just you'}\n"
-            f"---------------------------------\n"
+    if pager.next_cursor is None:
+        pager.stop()
+        return await ctx.send(embed=embed)
+    pager.message = await ctx.send(embed=embed, view=pager)
+
+
+# --- !FIND command ---
+FIND_RESULTS = 10
+
+
+@client.command(name='find', help='Searches the upcoming meetings you attend by topic, e.g. !find budget review, or by attendee: !find @user')
+async def find_meetings(ctx, *, query: str = ""):
+    user_id = ctx.author.id
+    tz = user_zone(ctx)
+
+    # Mentions narrow the search to meetings with those attendees; the rest is topic text
+    words, with_users = [], []
+    for token in query.split():
+        match = USER_MENTION_RE.match(token)
+        if match:
+            with_users.append(int(match.group(1)))
+        else:
+            words.append(token)
+    if not words and not with_users:
+        return await ctx.send(f"ℹ️ Usage: `{BOT_PREFIX}find <topic words>` and/or `@attendee`, e.g. `{BOT_PREFIX}find budget @alice`.")
+
+    # Only meetings the user attends (schedulers are always attendees) that haven't started
+    now_ts = CLOCK()
+    candidate_ids = REMINDERS.ids_for_attendee(user_id, now_ts)
+    for other_id in with_users:
+        shared = set(REMINDERS.ids_for_attendee(other_id, now_ts))
+        candidate_ids = [reminder_id for reminder_id in candidate_ids if reminder_id in shared]
+
+    if words:
+        result_ids = REMINDERS.topic_index.search(" ".join(words), candidate_ids, FIND_RESULTS)
+    else:
+        result_ids = candidate_ids[:FIND_RESULTS]
+
+    if not result_ids:
+        return await ctx.send(f"ℹ️ None of your upcoming meetings match `{query.strip()}`.")
+
+    embed = discord.Embed(title=f"🔎 Meetings matching \"{query.strip()[:200]}\"", color=discord.Color.blurple())
+    for reminder_id in result_ids:
+        reminder = REMINDERS.get(reminder_id)
+        embed.add_field(
+            name=f"ID {reminder.id} · {reminder.time_text(tz)}",
+            value=(
+                f"**Topic:** {reminder.message[:300]}\n"
+                f"**Channel:** <#{reminder.channel_id}> · **Scheduled by:** <@{reminder.scheduler_id}>"
+            )[:1024],
+            inline=False,
         )
-        
-    message += f"\nTo cancel a meeting, use: `!cancel <ID>` (e.g., `!cancel 1`) also you can use `!cancel all` or `!cancel .` to cancel all meetings."
-    await ctx.send(message)
+    order = " (best matches first)" if words else ""
+    embed.set_footer(text=f"{len(result_ids)} result{'s' if len(result_ids) != 1 else ''}{order} · Times in {tz.zone}")
+    await ctx.send(embed=embed)
 
 
-# --- !CANCEL command (ADDED save_reminders) ---
+# --- !CANCEL command ---
 @client.command(name='cancel', help='Cancels a scheduled meeting. Use !list to find the ID, or use "!cancel all" or "!cancel ." to cancel all your meetings.')
 async def cancel_meeting(ctx, meeting_id_or_command: str):
     user_id = ctx.author.id
@@ -461,22 +1231,23 @@ async def cancel_meeting(ctx, meeting_id_or_command: str):
     # Check for 'all' or '.' command
     if meeting_id_or_command.lower() in ['all', '.']:
         
-        user_reminders_to_cancel = [r for r in REMINDERS_LIST if r['scheduler_id'] == user_id]
+        user_reminders_to_cancel = REMINDERS.for_scheduler(user_id)
         
         if not user_reminders_to_cancel:
             return await ctx.send("❌ **Cancellation Failed:** You have no active meetings to cancel.")
             
-        count = 0
+        cancelled_ids = []
         for reminder in user_reminders_to_cancel:
             try:
-                REMINDERS_LIST.remove(reminder)
-                count += 1
-            except ValueError:
+                remove_reminder(reminder)
+                cancelled_ids.append(reminder.id)
+            except KeyError:
                 pass
 
+        count = len(cancelled_ids)
         if count > 0:
             # 🌟 NEW: Save data after batch cancellation
-            save_reminders() 
+            record_change('cancel', ids=cancelled_ids)
             await ctx.send(
                 f"✅ **Batch Cancellation Complete!**\n"
                 f"Successfully cancelled **{count}** active meetings scheduled by you."
@@ -493,32 +1264,198 @@ async def cancel_meeting(ctx, meeting_id_or_command: str):
     except ValueError:
         return await ctx.send(f"❌ **Cancellation Failed:** Invalid input. Use the meeting ID (e.g., `!cancel 1`), or use `!cancel all` / `!cancel .` to cancel everything.")
 
-    user_reminders = [r for r in REMINDERS_LIST if r['scheduler_id'] == user_id]
-    
-    if not user_reminders:
-        return await ctx.send("❌ **Cancellation Failed:** You have no active meetings to cancel.")
-
-    list_index = meeting_id - 1
+    reminder_to_remove = REMINDERS.get(meeting_id)
     
-    if not (0 <= list_index < len(user_reminders)):
+    # Only the scheduler may cancel a meeting
+    if not reminder_to_remove or reminder_to_remove.scheduler_id != user_id:
         return await ctx.send(f"❌ **Cancellation Failed:** Invalid Meeting ID `{meeting_id}`. Use `!list` to see your IDs.")
     
-    reminder_to_remove = user_reminders[list_index]
-    
     try:
-        REMINDERS_LIST.remove(reminder_to_remove)
+        remove_reminder(reminder_to_remove)
         
         # 🌟 NEW: Save data after single cancellation
-        save_reminders() 
+        record_change('cancel', ids=[reminder_to_remove.id])
         
         await ctx.send(
             f"✅ **Meeting Cancelled!**\n"
-            f"The meeting **'{reminder_to_remove['message']}'** scheduled for "
-            f"`{reminder_to_remove['time'].strftime('%Y-%m-%d %I:%M %p %Z')}` has been removed."
+            f"The meeting **'{reminder_to_remove.message}'** scheduled for "
+            f"`{reminder_to_remove.time_text(user_zone(ctx))}` has been removed."
         )
-    except ValueError:
+    except KeyError:
         await ctx.send("❌ **Cancellation Error:** Could not find the meeting in the active list.")
 
+# --- !TZ command ---
+@client.command(name='tz', help='Shows or sets your timezone. Usage: !tz, !tz set <Area/City>, !tz clear, !tz server <Area/City>|clear (admins).')
+async def timezone_command(ctx, action: str = None, zone_name: str = None):
+    user_id = ctx.author.id
+    guild_id = ctx.guild.id if ctx.guild else None
+
+    if action is None:
+        tz = TIMEZONES.zone_for(user_id, guild_id)
+        return await ctx.send(
+            f"🌍 **Your timezone:** `{tz.zone}` ({TIMEZONES.source_for(user_id, guild_id)}). "
+            f"It is now `{now_local(tz).strftime('%Y-%m-%d %I:%M %p %Z')}`.\n"
+            f"Change it with `{BOT_PREFIX}tz set <Area/City>` (e.g. `{BOT_PREFIX}tz set America/New_York`)."
+        )
+
+    action = action.lower()
+    if action == 'clear':
+        TIMEZONES.users.pop(user_id, None)
+        message = f"✅ **Timezone cleared.** You now use `{TIMEZONES.zone_for(user_id, guild_id).zone}`."
+
+    elif action in ('set', 'server'):
+        if not zone_name:
+            return await ctx.send(f"❌ **Missing Timezone:** Use an IANA name, e.g. `{BOT_PREFIX}tz {action} Europe/London`.")
+
+        if action == 'server':
+            if not ctx.guild or not ctx.author.guild_permissions.administrator:
+                return await ctx.send("❌ **Permission Denied:** Only server administrators can set the server timezone.")
+            if zone_name.lower() == 'clear':
+                TIMEZONES.guilds.pop(guild_id, None)
+                zone_name = None
+
+        tz = find_zone(zone_name) if zone_name else None
+        if zone_name and tz is None:
+            return await ctx.send(
+                f"❌ **Unknown Timezone:** `{zone_name}`. Use an IANA name like `Asia/Dhaka` or `America/New_York`."
+            )
+
+        if action == 'set':
+            TIMEZONES.users[user_id] = tz.zone
+            message = f"✅ **Timezone set to `{tz.zone}`.** Times you type and see are now in this zone."
+        elif tz is not None:
+            TIMEZONES.guilds[guild_id] = tz.zone
+            message = f"✅ **Server timezone set to `{tz.zone}`** for members without their own setting."
+        else:
+            message = f"✅ **Server timezone cleared.** Members without their own setting use `{BOT_TZ.zone}`."
+
+    else:
+        return await ctx.send(f"❌ **Unknown Option:** Use `{BOT_PREFIX}tz`, `{BOT_PREFIX}tz set <Area/City>` or `{BOT_PREFIX}tz clear`.")
+
+    # Serialized on the loop, written in a thread
+    await asyncio.to_thread(atomic_write_json, TIMEZONE_FILE, TIMEZONES.to_json(), 4)
+    await ctx.send(message)
+
+# --- !REMIND command ---
+@client.command(name='remind', help='Shows or sets when this server is reminded of new meetings. Usage: !remind, !remind server 60,30,5|clear (admins).')
+async def remind_command(ctx, action: str = None, *, offsets_text: str = None):
+    guild_id = ctx.guild.id if ctx.guild else None
+    default_text = describe_offsets(REMINDER_INTERVALS)
+
+    if action is None:
+        offsets = GUILD_OFFSETS.offsets_for(guild_id)
+        source = "server default" if offsets else "bot default"
+        return await ctx.send(
+            f"🔔 **Reminders** are sent {describe_offsets(offsets or REMINDER_INTERVALS)} before a meeting ({source}).\n"
+            f"Pick other times for one meeting with `{BOT_PREFIX}schedule ... --remind 60,30,5`, "
+            f"or for the whole server with `{BOT_PREFIX}remind server 60,30,5` (admins)."
+        )
+
+    if action.lower() != 'server':
+        return await ctx.send(f"❌ **Unknown Option:** Use `{BOT_PREFIX}remind` or `{BOT_PREFIX}remind server <offsets>|clear`.")
+    if not ctx.guild or not ctx.author.guild_permissions.administrator:
+        return await ctx.send("❌ **Permission Denied:** Only server administrators can set the server reminders.")
+    if not offsets_text:
+        return await ctx.send(f"❌ **Missing Offsets:** Use minutes before the start, e.g. `{BOT_PREFIX}remind server 60,30,5`.")
+
+    if offsets_text.lower() == 'clear':
+        GUILD_OFFSETS.guilds.pop(guild_id, None)
+        message = f"✅ **Server reminders cleared.** New meetings are reminded {default_text} before the start."
+    else:
+        try:
+            offsets = parse_offsets(offsets_text)
+        except ValueError as e:
+            return await ctx.send(f"❌ **Error:** {e}")
+        GUILD_OFFSETS.guilds[guild_id] = offsets
+        message = (
+            f"✅ **Server reminders set.** New meetings are reminded {describe_offsets(offsets)} before the start. "
+            f"Meetings already scheduled keep their reminders."
+        )
+
+    # Serialized on the loop, written in a thread
+    await asyncio.to_thread(atomic_write_json, REMINDER_OFFSETS_FILE, GUILD_OFFSETS.to_json(), 4)
+    await ctx.send(message)
+
+# --- !DELIVERY command ---
+DELIVERY_DESCRIPTIONS = {
+    'channel': "as mentions in the meeting's channel",
+    'dm': "as direct messages",
+    'both': "in the meeting's channel and as direct messages",
+}
+
+
+@client.command(name='delivery', help='Shows or sets where your reminders reach you. Usage: !delivery, !delivery channel|dm|both, !delivery clear.')
+async def delivery_command(ctx, mode: str = None):
+    user_id = ctx.author.id
+
+    if mode is None:
+        source = "your setting" if user_id in DELIVERY.users else "bot default"
+        closed_note = (
+            "\n⚠️ Your DMs were closed the last time I tried, so you're mentioned in the channel for now."
+            if DM_FANOUT.dm_closed(user_id) else ""
+        )
+        return await ctx.send(
+            f"📬 **Reminders reach you** {DELIVERY_DESCRIPTIONS[DELIVERY.mode_for(user_id)]} ({source}).{closed_note}\n"
+            f"Change it with `{BOT_PREFIX}delivery channel`, `{BOT_PREFIX}delivery dm` or `{BOT_PREFIX}delivery both`."
+        )
+
+    mode = mode.lower()
+    if mode == 'clear':
+        DELIVERY.clear(user_id)
+        message = f"✅ **Delivery reset.** Reminders reach you {DELIVERY_DESCRIPTIONS[DELIVERY.default]}."
+    elif mode in DELIVERY_MODES:
+        DELIVERY.set_mode(user_id, mode)
+        message = f"✅ **Delivery set.** Reminders reach you {DELIVERY_DESCRIPTIONS[mode]}."
+        if mode != 'channel':
+            DM_FANOUT.reopen(user_id) # Try DMs again right away, they may have been opened meanwhile
+            message += " Make sure you allow direct messages from server members, or you'll be mentioned in the channel instead."
+    else:
+        return await ctx.send(f"❌ **Unknown Option:** Use `{BOT_PREFIX}delivery channel`, `dm`, `both` or `clear`.")
+
+    # Serialized on the loop, written in a thread
+    await asyncio.to_thread(atomic_write_json, DELIVERY_FILE, DELIVERY.to_json(), 4)
+    await ctx.send(message)
+
+
+# --- !STATS command ---
+def format_seconds(value):
+    if value is None:
+        return "n/a"
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.2f} s"
+
+
+@client.command(name='stats', help='Shows reminder delivery latency, persistence timing and queue health (admins only).')
+@commands.has_permissions(administrator=True)
+async def show_stats(ctx):
+    lines = [f"📊 **Reminder Delivery Stats** (SLO: within {FIRE_LAG_SLO_SECONDS}s)\n", "**Fire lag by interval:**"]
+
+    for interval, histogram in sorted(METRICS.fire_lag.items(), reverse=True):
+        label = "start" if interval == 0 else format_offset(interval)
+        if not histogram.count:
+            lines.append(f"• {label}: no notifications sent yet")
+            continue
+        within = histogram.fraction_below(FIRE_LAG_SLO_SECONDS) * 100
+        lines.append(
+            f"• {label}: p50 {format_seconds(histogram.quantile(0.5))}, "
+            f"p99 {format_seconds(histogram.quantile(0.99))}, "
+            f"{within:.1f}% within SLO ({histogram.count} sent)"
+        )
+
+    tick = METRICS.tick_duration
+    persist = METRICS.persist_duration
+    lines += [
+        "",
+        f"**Checker tick:** p50 {format_seconds(tick.quantile(0.5))}, p99 {format_seconds(tick.quantile(0.99))} "
+        f"({tick.count} ticks, {METRICS.notifications_fired} notifications)",
+        f"**Persistence:** p50 {format_seconds(persist.quantile(0.5))}, p99 {format_seconds(persist.quantile(0.99))} "
+        f"({persist.count} writes, {METRICS.persisted_records} changes, {WRITER.pending} pending)",
+        f"**Outbound queue:** {OUTBOX.depth} queued, {OUTBOX.sent} sent, {OUTBOX.failed} send errors, {OUTBOX.retried} retries",
+        f"**DMs:** {DM_FANOUT.depth} awaiting lookup, {DM_FANOUT.closed_count} refused (closed DMs)",
+        f"**Active reminders:** {len(REMINDERS)} ({len(SCHEDULER)} notifications scheduled)",
+    ]
+    await ctx.send("\n".join(lines))
+
+
 @client.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.MissingRequiredArgument):
@@ -528,6 +1465,10 @@ async def on_command_error(ctx, error):
             await ctx.send(f"❌ **Missing Arguments:** Please use the full format. Type `{BOT_PREFIX}help {ctx.command.name}` for usage.")
     elif isinstance(error, commands.CommandNotFound):
         pass
+    elif isinstance(error, commands.CheckFailure) and not instance_active():
+        pass # Standby instance: the active one answers
+    elif isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ **Permission Denied:** Only server administrators can use this command.")
     else:
         print(f"An unexpected error occurred: {error}")
 
@@ -535,6 +1476,12 @@ async def on_command_error(ctx, error):
 
 
 
-# end. Run the Bot
-client.run('Your bot token goes here') 
-# NOTE: Replace 'Your bot token goes here' with your actual bot token to run it.
\ No newline at end of file
+# end. Run the Bot (guarded so bench_reminders.py can import the module without connecting)
+if __name__ == '__main__':
+    client.run('Your bot token goes here') 
+    # NOTE: Replace 'Your bot token goes here' with your actual bot token to run it.
+
+    # The bot has shut down: write out anything still queued, then let a standby take over
+    WRITER.flush_sync()
+    if LEASE is not None:
+        LEASE.release()
\ No newline at end of file
@@ -0,0 +1,570 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import Meeting_Reminder as bot
+from reminder_delivery import Outbox
+from reminder_metrics import ReminderMetrics
+from reminder_scheduler import ReminderScheduler
+from reminder_storage import ReminderJournal, WriteBehindWriter
+from reminder_search import TopicIndex
+from reminder_store import ReminderStore
+from reminder_timeparse import parse_time_expression
+
+# ----------------------------------------------------------------------
+# Fake-clock benchmark harness for the meeting reminder engine
+# ----------------------------------------------------------------------
+# Drives the real command handlers, reminder_checker, persistence and
+# load_reminders from Meeting_Reminder.py with a simulated clock and stub
+# Discord objects, so a whole day of traffic runs in seconds and offline.
+#
+# Usage (from DiscordBots/):
+#   python bench_reminders.py                          # 1k, 10k and 100k reminders
+#   python bench_reminders.py --sizes 1000 --output bench.json
+#   python bench_reminders.py --compare bench.json     # exit 1 on a regression
+#   python bench_reminders.py --sizes ""               # time parser only
+#
+# Results are JSON (stdout or --output); a short summary goes to stderr.
+# The outbox runs without rate limits here: the numbers measure the bot's own
+# overhead, not Discord's pacing.
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DAY_START = datetime.datetime(2030, 1, 7) # A Monday, naive local time in BOT_TZ
+CHANNELS = 50
+COMMANDS_PER_REMINDER = 0.1                # !ok / !list / !find traffic interleaved with the simulated day
+TOPIC_WORDS = (
+    'budget', 'review', 'sync', 'weekly', 'retro', 'sprint', 'planning', 'design', 'hiring', 'standup',
+    'kickoff', 'roadmap', 'demo', 'customer', 'incident', 'postmortem', 'onboarding', 'training', 'launch', 'security',
+)
+FIND_QUERIES = ('budget', 'plan', 'design review', 'hirign', 'sprint retro', 'launch', 'incident postmortem', 'sync')
+REGRESSION_THRESHOLD = 1.25                # Slower than baseline by more than this factor fails --compare
+
+
+class FakeClock:
+    """Epoch-seconds clock that only moves when told to."""
+
+    def __init__(self, start):
+        self.now = float(start)
+
+    def __call__(self):
+        return self.now
+
+
+class StubUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class StubChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content, view=None):
+        self.sent += 1
+
+
+class StubContext:
+    """Just enough of commands.Context for the command handlers."""
+
+    def __init__(self, user_id, channel):
+        self.author = StubUser(user_id)
+        self.channel = channel
+        self.guild = None
+        self.replies = 0
+
+    async def send(self, content=None, **kwargs):
+        self.replies += 1
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'total_s': round(total, 4),
+        'per_second': round(len(ordered) / total, 1) if total else None,
+        'p50_ms': round(pick(0.50), 4),
+        'p99_ms': round(pick(0.99), 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+
+# --- Workload -----------------------------------------------------------
+
+def generate_commands(count, seed):
+    """
+    Builds `count` !schedule invocations spread over DAY_START, clustered like real calendars:
+    most meetings start on the hour or half hour during working hours.
+    Returns [(scheduler id, channel id, date/time string, args)].
+    """
+    rng = random.Random(seed)
+    users = max(10, count // 5)
+    hours = list(range(8, 20))
+    hour_weights = [2, 6, 8, 8, 6, 3, 6, 8, 7, 5, 3, 1]
+
+    workload = []
+    for index in range(count):
+        hour = rng.choices(hours, hour_weights)[0]
+        roll = rng.random()
+        if roll < 0.6:
+            minute = 0
+        elif roll < 0.8:
+            minute = 30
+        elif roll < 0.9:
+            minute = rng.choice((15, 45))
+        else:
+            minute = rng.randrange(60)
+
+        start = DAY_START.replace(hour=hour, minute=minute)
+        form = rng.random()
+        if form < 0.7:
+            when = start.strftime('%Y-%m-%d %I:%M %p')
+        elif form < 0.9:
+            when = start.strftime('%I:%M %p')            # Today, explicit AM/PM
+        else:
+            when = f"{start.hour}:{start.minute}"         # Naked H:M, 24-hour past noon
+
+        scheduler_id = rng.randrange(users) + 1
+        attendees = rng.sample(range(1, users + 1), rng.randint(1, min(8, users)))
+        topic = [TOPIC_WORDS[index % 20], TOPIC_WORDS[index * 7 // 20 % 20], f"#{index}"]
+        args = [f"<@{uid}>" for uid in attendees] + topic
+        if rng.random() < 0.05:
+            args += ['--repeat', 'weekdays']
+        workload.append((scheduler_id, rng.randrange(CHANNELS) + 1, when, args))
+    return workload, users
+
+
+# --- Bot state ----------------------------------------------------------
+
+def reset_bot(workdir, clock, channels):
+    """Points Meeting_Reminder at fresh in-memory state, a scratch data dir and stub Discord objects."""
+    bot.CLOCK = clock
+    bot.SCHEDULE_FILE = Path(workdir) / 'reminders.json'
+    bot.REMINDERS = ReminderStore(TopicIndex())
+    bot.SCHEDULER = ReminderScheduler(clock=clock)
+    bot.OUTBOX = Outbox(route_rate=1e9, route_burst=1e9, global_rate=1e9, global_burst=1e9, max_in_flight=1000)
+    bot.METRICS = ReminderMetrics(bot.REMINDER_INTERVALS)
+    bot.JOURNAL = ReminderJournal(bot.SCHEDULE_FILE)
+    bot.WRITER = WriteBehindWriter(
+        bot.JOURNAL,
+        bot.snapshot_reminders,
+        mode=bot.STORAGE_MODE,
+        window=bot.WRITE_BEHIND_WINDOW_SECONDS,
+        durability=bot.PERSISTENCE_DURABILITY,
+        fsync_interval=bot.FSYNC_INTERVAL_SECONDS,
+        on_commit=bot.METRICS.observe_commit,
+    )
+    bot.client.get_channel = channels.get
+
+
+# --- Phases -------------------------------------------------------------
+
+async def bench_schedule(workload, channels):
+    """Every workload row through the real !schedule handler (parse, store, schedule, confirm)."""
+    samples = []
+    for scheduler_id, channel_id, when, args in workload:
+        ctx = StubContext(scheduler_id, channels[channel_id])
+        started = time.perf_counter()
+        await bot.schedule_meeting.callback(ctx, when, *args)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def bench_persist():
+    """Write-behind commit of everything scheduled so far, then a full compaction."""
+    started = time.perf_counter()
+    await bot.WRITER.flush()
+    flush_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    snapshot = await bot.WRITER.begin_compaction()
+    bot.JOURNAL.finish_compaction(snapshot)
+    compact_s = time.perf_counter() - started
+
+    return {
+        'journal_flush_s': round(flush_s, 4),
+        'compaction_s': round(compact_s, 4),
+        'base_file_bytes': bot.SCHEDULE_FILE.stat().st_size,
+    }
+
+
+def bench_load(clock, workdir, channels):
+    """load_reminders() from the compacted base file into an empty bot."""
+    reset_bot(workdir, clock, channels)
+    started = time.perf_counter()
+    bot.load_reminders()
+    seconds = time.perf_counter() - started
+    return {'seconds': round(seconds, 4), 'reminders': len(bot.REMINDERS), 'notifications': len(bot.SCHEDULER)}
+
+
+async def bench_day(clock, users, seed):
+    """
+    Runs reminder_checker tick by tick through the simulated day, with !ok, !list and !find
+    commands interleaved at random times. Outbox delivery is drained after each tick.
+    """
+    rng = random.Random(seed)
+    day_end = clock.now + 24 * 3600
+    command_count = int(len(bot.REMINDERS) * COMMANDS_PER_REMINDER)
+    pending = sorted((clock.now + rng.random() * 24 * 3600, rng.randrange(users) + 1, rng.random())
+                     for _ in range(command_count))
+    channel = StubChannel(0)
+
+    tick_samples, ok_samples, list_samples, find_samples, delivery_samples = [], [], [], [], []
+    notifications = 0
+    commands_run = 0
+    wall_started = time.perf_counter()
+
+    while True:
+        deadline = bot.SCHEDULER.next_deadline()
+        if deadline is None or deadline > day_end:
+            break
+
+        # Commands that arrive before the next notification run first
+        while commands_run < len(pending) and pending[commands_run][0] < deadline:
+            at, user_id, roll = pending[commands_run]
+            commands_run += 1
+            clock.now = at
+            ctx = StubContext(user_id, channel)
+            started = time.perf_counter()
+            if roll < 0.7:
+                await bot.confirm_meeting.callback(ctx)
+                ok_samples.append(time.perf_counter() - started)
+            elif roll < 0.85:
+                await bot.list_meetings.callback(ctx)
+                list_samples.append(time.perf_counter() - started)
+            else:
+                await bot.find_meetings.callback(ctx, query=FIND_QUERIES[commands_run % len(FIND_QUERIES)])
+                find_samples.append(time.perf_counter() - started)
+
+        clock.now = deadline
+        fired_before = bot.METRICS.notifications_fired
+        started = time.perf_counter()
+        await bot.reminder_checker.coro()
+        tick_samples.append(time.perf_counter() - started)
+        notifications += bot.METRICS.notifications_fired - fired_before
+
+        started = time.perf_counter()
+        await bot.OUTBOX.join()
+        delivery_samples.append(time.perf_counter() - started)
+
+    await bot.WRITER.flush()
+    wall_s = time.perf_counter() - wall_started
+
+    return {
+        'wall_s': round(wall_s, 4),
+        'notifications': notifications,
+        'notifications_per_second': round(notifications / wall_s, 1) if wall_s else None,
+        'messages_sent': bot.OUTBOX.sent,
+        'tick': summarize(tick_samples),
+        'delivery': summarize(delivery_samples),
+        'ok_command': summarize(ok_samples),
+        'list_command': summarize(list_samples),
+        'find_command': summarize(find_samples),
+        'persist_batches': bot.METRICS.persist_duration.count,
+        'persisted_records': bot.METRICS.persisted_records,
+    }
+
+
+def bench_memory(clock, workdir, channels):
+    """Memory held by the loaded reminders, and the peak while loading (separate pass: tracing skews timings)."""
+    reset_bot(workdir, clock, channels)
+    gc.collect()
+    tracemalloc.start()
+    bot.load_reminders()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'resident_mb': round(current / 2**20, 2),
+        'peak_traced_mb': round(peak / 2**20, 2),
+        'bytes_per_reminder': round(current / max(1, len(bot.REMINDERS))),
+    }
+
+
+async def run_size(size, seed):
+    workload, users = generate_commands(size, seed)
+    channels = {cid: StubChannel(cid) for cid in range(1, CHANNELS + 1)}
+    # Commands are issued just after midnight, before the first meeting of the day
+    start = bot.BOT_TZ.localize(DAY_START).timestamp() + 60
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clock = FakeClock(start)
+        reset_bot(workdir, clock, channels)
+        result = {'schedule': await bench_schedule(workload, channels)}
+        result['reminders'] = len(bot.REMINDERS)
+        result['persist'] = await bench_persist()
+        bot.JOURNAL.close()
+
+        result['memory'] = bench_memory(clock, workdir, channels)
+        result['load'] = bench_load(clock, workdir, channels)
+        result['day'] = await bench_day(clock, users, seed)
+        bot.JOURNAL.close()
+
+    return result
+
+
+# --- Time parser ---------------------------------------------------------
+
+def legacy_parse_meeting_time(date_time_str, now, tz):
+    """
+    The trial-and-error !schedule parser that reminder_timeparse replaced, kept verbatim
+    as the reference for agreement checks and the before/after timing.
+    """
+    meeting_time = None
+
+    try:
+        # A. Full format: "YYYY-MM-DD HH:MM AM/PM"
+        naive_dt = datetime.datetime.strptime(date_time_str, '%Y-%m-%d %I:%M %p')
+        meeting_time = tz.localize(naive_dt).replace(second=0, microsecond=0)
+        
+    except ValueError:
+        # B. Smart Time-Only Parsing (HH:M AM/PM or HH:M)
+        time_only_match = re.match(r'^(\d{1,2}:\d{1,2})( (AM|PM))?$', date_time_str, re.IGNORECASE)
+        
+        if time_only_match:
+            time_raw = time_only_match.group(1) 
+            ampm_part = time_only_match.group(2) 
+            
+            # --- NORMALIZATION STEP ---
+            try:
+                hour_str, minute_str = time_raw.split(':')
+                if len(minute_str) == 1:
+                    minute_str = '0' + minute_str
+                time_part = f"{hour_str}:{minute_str}" 
+            except ValueError:
+                return None
+            # --------------------------
+            
+            date_today = now.date()
+            
+            if ampm_part:
+                # Case 1: Format: "HH:MM AM/PM" (Explicit AM/PM)
+                try:
+                    time_with_ampm = time_part + ampm_part 
+                    time_obj = datetime.datetime.strptime(time_with_ampm, '%I:%M %p').time()
+                    naive_dt = datetime.datetime.combine(date_today, time_obj)
+                    meeting_time = tz.localize(naive_dt).replace(second=0, microsecond=0)
+                    
+                    if meeting_time <= now:
+                        date_tomorrow = date_today + datetime.timedelta(days=1)
+                        naive_dt = datetime.datetime.combine(date_tomorrow, time_obj)
+                        meeting_time = tz.localize(naive_dt).replace(second=0, microsecond=0)
+                        
+                except ValueError:
+                    pass 
+
+            else:
+                # Case 2: Format: "HH:MM" (Naked Time - AM/PM must be guessed)
+                try:
+                    # 1. Try PM first
+                    time_with_pm = time_part + " PM"
+                    time_obj_pm = datetime.datetime.strptime(time_with_pm, '%I:%M %p').time()
+                    naive_dt_pm = datetime.datetime.combine(date_today, time_obj_pm)
+                    meeting_time_pm = tz.localize(naive_dt_pm).replace(second=0, microsecond=0)
+
+                    if meeting_time_pm > now:
+                        meeting_time = meeting_time_pm
+                    else:
+                        # 2. If PM is in the past, try AM for tomorrow
+                        time_with_am = time_part + " AM"
+                        time_obj_am = datetime.datetime.strptime(time_with_am, '%I:%M %p').time()
+                        
+                        date_tomorrow = date_today + datetime.timedelta(days=1)
+                        naive_dt_am = datetime.datetime.combine(date_tomorrow, time_obj_am)
+                        meeting_time = tz.localize(naive_dt_am).replace(second=0, microsecond=0)
+
+                except ValueError:
+                    # Fallback: If 12-hour parsing fails (e.g., input was "13:30"), try 24-hour parsing
+                    try:
+                        time_obj = datetime.datetime.strptime(time_part, '%H:%M').time()
+                        naive_dt = datetime.datetime.combine(date_today, time_obj)
+                        meeting_time = tz.localize(naive_dt).replace(second=0, microsecond=0)
+
+                        if meeting_time <= now:
+                            date_tomorrow = date_today + datetime.timedelta(days=1)
+                            naive_dt = datetime.datetime.combine(date_tomorrow, time_obj)
+                            meeting_time = tz.localize(naive_dt).replace(second=0, microsecond=0)
+                    except ValueError:
+                        pass
+
+    return meeting_time
+
+
+def generate_time_inputs(count, seed):
+    """Random inputs in the legacy grammar (valid and invalid) plus the newer forms."""
+    rng = random.Random(seed)
+    legacy, extended = [], []
+    for _ in range(count):
+        hour, minute = rng.randrange(0, 26), rng.randrange(0, 62)
+        day = DAY_START + datetime.timedelta(days=rng.randrange(0, 400))
+        ampm = rng.choice(['AM', 'PM', 'am', 'pm'])
+        legacy.append(rng.choice([
+            f"{day:%Y-%m-%d} {hour:02d}:{minute:02d} {ampm}",
+            f"{day.year}-{rng.randrange(1, 14)}-{rng.randrange(1, 33)} {hour}:{minute:02d} {ampm}",
+            f"{hour:02d}:{minute:02d} {ampm}",
+            f"{hour}:{minute}",
+            f"{hour}:{minute:02d}",
+            rng.choice(["noon", "25:00", "10-30", "", "3", "12:30 XM"]),
+        ]))
+        extended.append(rng.choice([
+            f"tomorrow {rng.randrange(1, 13)}{ampm.lower()}",
+            f"today {hour}:{minute:02d}",
+            f"in {rng.randrange(1, 240)}m",
+            f"in {rng.randrange(1, 5)}h{rng.randrange(0, 60)}m",
+            f"{day:%Y-%m-%d} {hour}:{minute:02d}",
+        ]))
+    return legacy, extended
+
+
+def bench_parser(count, seed):
+    """Checks the compiled parser against the legacy one and times both on the same inputs."""
+    tz = bot.BOT_TZ
+    legacy_inputs, extended_inputs = generate_time_inputs(count, seed)
+    now = bot.ZONE_CACHE.localize(tz, DAY_START.replace(hour=13, minute=7))
+    # Accepted by the new grammar only (whitespace/AM-PM spacing, 24-hour full dates); not a disagreement
+    superset = re.compile(r'^\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{1,2}$')
+
+    mismatches = []
+    for text in legacy_inputs:
+        old = legacy_parse_meeting_time(text, now, tz)
+        new = parse_time_expression(text, now, tz).when
+        if old != new and not (old is None and superset.match(text)):
+            mismatches.append({'input': text, 'legacy': str(old), 'parser': str(new)})
+
+    results = {'inputs': len(legacy_inputs), 'mismatches': len(mismatches), 'examples': mismatches[:5]}
+    for name, parse, inputs in (
+        ('legacy', legacy_parse_meeting_time, legacy_inputs),
+        ('parser', lambda text, now, tz: parse_time_expression(text, now, tz), legacy_inputs),
+        ('parser_extended', lambda text, now, tz: parse_time_expression(text, now, tz), extended_inputs),
+    ):
+        started = time.perf_counter()
+        for text in inputs:
+            parse(text, now, tz)
+        seconds = time.perf_counter() - started
+        results[f'{name}_us'] = round(seconds / len(inputs) * 1e6, 3)
+    return results
+
+
+# --- Regression check ---------------------------------------------------
+
+# (phase path, metric) pairs compared by --compare; all are "lower is better"
+TRACKED = [
+    (('schedule',), 'p50_ms'), (('schedule',), 'p99_ms'),
+    (('persist',), 'journal_flush_s'), (('persist',), 'compaction_s'),
+    (('load',), 'seconds'),
+    (('day', 'tick'), 'p50_ms'), (('day', 'tick'), 'p99_ms'),
+    (('day', 'ok_command'), 'p99_ms'), (('day', 'list_command'), 'p99_ms'), (('day', 'find_command'), 'p99_ms'),
+    (('memory',), 'bytes_per_reminder'),
+]
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of human-readable regressions against a previous results file."""
+    regressions = []
+    parser, previous_parser = results.get('parser', {}), baseline.get('parser', {})
+    if parser.get('mismatches'):
+        regressions.append(f"parser: {parser['mismatches']} inputs parse differently from the legacy parser")
+    if previous_parser.get('parser_us') and parser['parser_us'] > previous_parser['parser_us'] * threshold:
+        regressions.append(f"parser: parser_us {previous_parser['parser_us']} -> {parser['parser_us']}")
+
+    for size, current in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if previous is None:
+            continue
+        for path, metric in TRACKED:
+            new, old = current, previous
+            for key in path:
+                new, old = new.get(key, {}), old.get(key, {})
+            new, old = new.get(metric), old.get(metric)
+            if new is None or not old:
+                continue
+            if new > old * threshold:
+                regressions.append(f"{size}: {'.'.join(path)}.{metric} {old} -> {new} ({new / old:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the meeting reminder engine with a simulated clock.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated reminder counts (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--parse-inputs', type=int, default=20000, help="Inputs for the time parser benchmark")
+    parser.add_argument('--output', help="Write JSON results here instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON from an earlier run; exit 1 on a regression")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    options = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timezone': bot.TIMEZONE_STR,
+        'storage_mode': bot.STORAGE_MODE,
+        'seed': options.seed,
+        'sizes': {},
+    }
+
+    print(f"Benchmarking time parser ({options.parse_inputs} inputs)...", file=sys.stderr)
+    results['parser'] = bench_parser(options.parse_inputs, options.seed)
+    print(
+        f"  legacy {results['parser']['legacy_us']} us, parser {results['parser']['parser_us']} us per input, "
+        f"{results['parser']['mismatches']} mismatches",
+        file=sys.stderr,
+    )
+
+    for size in (int(s) for s in options.sizes.split(',') if s):
+        print(f"Benchmarking {size} reminders...", file=sys.stderr)
+        # The bot's own progress prints would drown the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = asyncio.run(run_size(size, options.seed))
+        results['sizes'][str(size)] = result
+        print(
+            f"  schedule p50 {result['schedule']['p50_ms']} ms / p99 {result['schedule']['p99_ms']} ms, "
+            f"load {result['load']['seconds']} s, tick p99 {result['day']['tick']['p99_ms']} ms, "
+            f"!find p99 {result['day']['find_command'].get('p99_ms')} ms, "
+            f"{result['day']['notifications_per_second']} notifications/s, "
+            f"{result['memory']['bytes_per_reminder']} B/reminder",
+            file=sys.stderr,
+        )
+
+    # Peak RSS covers the whole process (ru_maxrss is KiB on Linux, bytes on macOS)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['max_rss_mb'] = round(max_rss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+    text = json.dumps(results, indent=2)
+    if options.output:
+        Path(options.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if options.compare:
+        baseline = json.loads(Path(options.compare).read_text())
+        regressions = compare(results, baseline, options.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
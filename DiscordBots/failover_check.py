@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from reminder_lease import ReminderLease
+from reminder_store import Reminder
+
+# ----------------------------------------------------------------------
+# Two-process failover check for HA mode (reminder_lease.py)
+# ----------------------------------------------------------------------
+# Starts two real Meeting_Reminder.py instances ("a" and "b") on the same
+# scratch directory and lease file, with stub channels and a fake clock
+# shared through a file. The parent advances the clock in lockstep with
+# both children (each acknowledges every tick), stops the active instance
+# halfway through a block of meetings and checks that:
+#   - every 15/10/2/0-minute notification was sent exactly once,
+#   - nothing was sent by "a" after "b" took over (no split brain),
+#   - "b" took over within HA_LEASE_SECONDS + HA_HEARTBEAT_SECONDS.
+#
+# Usage (from DiscordBots/):
+#   python failover_check.py                 # crash (SIGKILL) and clean-shutdown handover
+#   python failover_check.py --scenario crash --meetings 200
+#
+# Results are JSON on stdout; exit status 1 if any check failed.
+
+T0 = datetime.datetime(2030, 1, 7, 9, 0, tzinfo=datetime.timezone.utc).timestamp()
+TICK_SECONDS = 2.0              # Fake seconds per lockstep tick
+FIRST_MEETING_MINUTES = 20      # Meetings start this long after T0 ...
+MEETING_SPACING_SECONDS = 30    # ... one every 30 seconds
+STOP_AFTER_SECONDS = 30 * 60 - 4 # When the active instance is stopped: just before a minute's notifications
+CHANNELS = 3
+ACK_TIMEOUT_SECONDS = 10        # Real seconds a child may take to process one tick
+QUIET_SECONDS = 0.6             # Real pause before a crash, longer than the write-behind window
+
+TOPIC_RE = re.compile(r"HA check #(\d+)")
+INTERVAL_RE = re.compile(r"starts in \*\*(\d+) minutes!\*\*")
+
+
+# --- Child process ------------------------------------------------------
+
+class SharedClock:
+    """Fake epoch clock the parent advances by rewriting a file; refreshed once per child iteration."""
+
+    def __init__(self, path):
+        self.path = path
+        self.now = None
+
+    def refresh(self):
+        try:
+            self.now = float(self.path.read_text())
+        except (OSError, ValueError):
+            pass # Caught mid-replace: keep the previous value
+        return self.now
+
+    def __call__(self):
+        return self.now
+
+
+class LoggedChannel:
+    """Records every message an instance sends, with the fake time it was sent at."""
+
+    def __init__(self, channel_id, instance, clock, log_path):
+        self.id = channel_id
+        self.instance = instance
+        self.clock = clock
+        self.log_path = log_path
+
+    async def send(self, content, view=None):
+        line = json.dumps({'instance': self.instance, 'channel': self.id, 'at': self.clock(), 'content': content})
+        with open(self.log_path, 'a') as f:
+            f.write(line + '\n')
+
+
+async def run_child(name, workdir):
+    import Meeting_Reminder as bot
+    from reminder_delivery import Outbox
+    from reminder_scheduler import ReminderScheduler
+    from reminder_search import TopicIndex
+    from reminder_storage import ReminderJournal, WriteBehindWriter
+    from reminder_store import ReminderStore
+    from reminder_timezones import TimezonePreferences
+
+    workdir = Path(workdir)
+    clock = SharedClock(workdir / 'clock')
+    clock.refresh()
+    channels = {cid: LoggedChannel(cid, name, clock, workdir / 'sent.jsonl') for cid in range(1, CHANNELS + 1)}
+
+    bot.CLOCK = clock
+    bot.SCHEDULE_FILE = workdir / 'reminders.json'
+    bot.TIMEZONE_FILE = workdir / 'timezones.json'
+    bot.TIMEZONES = TimezonePreferences(bot.TIMEZONE_FILE, bot.BOT_TZ)
+    bot.REMINDERS = ReminderStore(TopicIndex())
+    bot.SCHEDULER = ReminderScheduler(clock=clock)
+    bot.OUTBOX = Outbox(route_rate=1e9, route_burst=1e9, global_rate=1e9, global_burst=1e9)
+    bot.JOURNAL = ReminderJournal(bot.SCHEDULE_FILE)
+    bot.LEASE = ReminderLease(workdir / 'lease.db', name, bot.HA_LEASE_SECONDS, clock=clock)
+    bot.WRITER = WriteBehindWriter(
+        bot.JOURNAL,
+        bot.snapshot_reminders,
+        mode=bot.STORAGE_MODE,
+        window=bot.WRITE_BEHIND_WINDOW_SECONDS,
+        durability=bot.PERSISTENCE_DURABILITY,
+        fsync_interval=bot.FSYNC_INTERVAL_SECONDS,
+        on_commit=bot.METRICS.observe_commit,
+        fence=bot.may_write_storage,
+    )
+    bot.client.get_channel = channels.get
+
+    stop_path = workdir / f'{name}.stop'
+    seen_path = workdir / f'{name}.seen'
+    last_seen = last_beat = None
+    while not stop_path.exists():
+        now = clock.refresh()
+        if now != last_seen:
+            if last_beat is None or now - last_beat >= bot.HA_HEARTBEAT_SECONDS:
+                await bot.lease_keeper.coro()
+                last_beat = now
+            # Let the checker see the new time, then wait for its messages to go out
+            bot.SCHEDULER.wake()
+            await asyncio.sleep(0.002)
+            await bot.OUTBOX.join()
+            last_seen = now
+            seen_path.write_text(repr(now))
+        await asyncio.sleep(0.002)
+
+    # Clean shutdown, as after client.run() returns
+    await bot.WRITER.flush()
+    await bot.deactivate_instance()
+    bot.LEASE.release()
+    seen_path.write_text('stopped')
+
+
+# --- Parent -------------------------------------------------------------
+
+def seed_reminders(path, count):
+    """Writes `count` one-off meetings, one every MEETING_SPACING_SECONDS, as the shared base file."""
+    reminders = []
+    for reminder_id in range(1, count + 1):
+        start = T0 + FIRST_MEETING_MINUTES * 60 + (reminder_id - 1) * MEETING_SPACING_SECONDS
+        start -= start % 60 # Meetings start on the minute, like scheduled ones
+        reminder = Reminder(reminder_id, start, [1, 2], f"HA check #{reminder_id}",
+                            (reminder_id % CHANNELS) + 1, 1)
+        reminders.append(reminder.to_json())
+    path.write_text(json.dumps(reminders))
+    return {item['id']: item['ts'] for item in reminders}
+
+
+def set_clock(workdir, now):
+    tmp = workdir / 'clock.tmp'
+    tmp.write_text(repr(now))
+    os.replace(tmp, workdir / 'clock')
+
+
+def wait_for_ack(workdir, names, now):
+    deadline = time.monotonic() + ACK_TIMEOUT_SECONDS
+    for name in names:
+        path = workdir / f'{name}.seen'
+        while True:
+            try:
+                if path.read_text() == repr(now):
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"instance {name} did not process tick {now - T0:.0f}s in time")
+            time.sleep(0.001)
+
+
+def wait_for_ack_text(path, text):
+    deadline = time.monotonic() + ACK_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if path.read_text() == text:
+                return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path.name} never reported {text!r}")
+
+
+def spawn(name, workdir):
+    log = open(workdir / f'{name}.log', 'w')
+    return subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), '--child', name, '--workdir', str(workdir)],
+        cwd=Path(__file__).resolve().parent, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def run_scenario(scenario, meetings):
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        meeting_times = seed_reminders(workdir / 'reminders.json', meetings)
+        lease_view = ReminderLease(workdir / 'lease.db', 'observer', 1, clock=lambda: 0)
+        end = max(meeting_times.values()) + 2 * 60
+        stop_at = T0 + STOP_AFTER_SECONDS
+
+        now = T0
+        set_clock(workdir, now)
+        processes = {'a': spawn('a', workdir)}
+        wait_for_ack(workdir, ['a'], now)
+        processes['b'] = spawn('b', workdir) # Starts second, so "a" is the first lease holder
+        live = ['a', 'b']
+
+        stopped_at = takeover_at = None
+        holder_before = None
+        try:
+            while now < end:
+                now += TICK_SECONDS
+                set_clock(workdir, now)
+                wait_for_ack(workdir, live, now)
+
+                holder = lease_view.holder()
+                if holder_before is None and holder is not None:
+                    holder_before = holder[0]
+                if stopped_at is not None and takeover_at is None and holder and holder[0] == 'b' and holder[1] > now:
+                    takeover_at = now
+
+                if stopped_at is None and now >= stop_at:
+                    if scenario == 'crash':
+                        time.sleep(QUIET_SECONDS)
+                        processes['a'].kill()
+                    else:
+                        (workdir / 'a.stop').touch()
+                        wait_for_ack_text(workdir / 'a.seen', 'stopped')
+                    processes['a'].wait()
+                    live = ['b']
+                    stopped_at = now
+        finally:
+            (workdir / 'b.stop').touch()
+            for process in processes.values():
+                try:
+                    process.wait(timeout=ACK_TIMEOUT_SECONDS)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            lease_view.close()
+
+        result = check_deliveries(workdir / 'sent.jsonl', meeting_times, takeover_at)
+        result.update({
+            'scenario': scenario,
+            'meetings': meetings,
+            'first_holder': holder_before,
+            'stopped_at_s': round(stopped_at - T0, 1) if stopped_at else None,
+            'takeover_s': round(takeover_at - stopped_at, 1) if takeover_at and stopped_at else None,
+        })
+        if result['takeover_s'] is None:
+            result['failures'].append("standby never took over")
+        return result
+
+
+def check_deliveries(log_path, meeting_times, takeover_at):
+    """Counts sends per (reminder id, interval) and measures lateness against the fake clock."""
+    sends = collections.Counter()
+    lateness = []
+    missed_digests = 0
+    split_brain = 0
+
+    lines = log_path.read_text().splitlines() if log_path.exists() else []
+    for line in lines:
+        entry = json.loads(line)
+        content = entry['content']
+        if 'MISSED NOTIFICATIONS' in content:
+            missed_digests += len(TOPIC_RE.findall(content))
+            continue
+        if entry['instance'] == 'a' and takeover_at is not None and entry['at'] >= takeover_at:
+            split_brain += 1
+        match = INTERVAL_RE.search(content)
+        interval = int(match.group(1)) if match else 0
+        for reminder_id in map(int, TOPIC_RE.findall(content)):
+            sends[(reminder_id, interval)] += 1
+            lateness.append(entry['at'] - (meeting_times[reminder_id] - interval * 60))
+
+    expected = [(reminder_id, interval) for reminder_id in meeting_times for interval in (15, 10, 2, 0)]
+    duplicates = sum(1 for key in expected if sends[key] > 1)
+    missing = sum(1 for key in expected if sends[key] == 0)
+
+    failures = []
+    if duplicates:
+        failures.append(f"{duplicates} notifications sent more than once")
+    if missing:
+        failures.append(f"{missing} notifications never sent")
+    if missed_digests:
+        failures.append(f"{missed_digests} notifications went to the missed digest")
+    if split_brain:
+        failures.append(f"{split_brain} messages sent by the old instance after takeover")
+
+    lateness.sort()
+    return {
+        'expected_notifications': len(expected),
+        'sent_notifications': sum(sends.values()),
+        'duplicates': duplicates,
+        'missing': missing,
+        'missed_digest_entries': missed_digests,
+        'split_brain_messages': split_brain,
+        'lateness_p50_s': round(lateness[len(lateness) // 2], 1) if lateness else None,
+        'lateness_max_s': round(lateness[-1], 1) if lateness else None,
+        'failures': failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-process failover check for the meeting reminder bot.")
+    parser.add_argument('--scenario', choices=('crash', 'handover', 'all'), default='all')
+    parser.add_argument('--meetings', type=int, default=60)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        asyncio.run(run_child(options.child, options.workdir))
+        return
+
+    scenarios = ('crash', 'handover') if options.scenario == 'all' else (options.scenario,)
+    results = []
+    for scenario in scenarios:
+        print(f"Running {scenario} scenario ({options.meetings} meetings)...", file=sys.stderr)
+        result = run_scenario(scenario, options.meetings)
+        print(f"  takeover {result['takeover_s']} s, {result['duplicates']} duplicates, "
+              f"{result['missing']} missing, max lateness {result['lateness_max_s']} s", file=sys.stderr)
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if any(result['failures'] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
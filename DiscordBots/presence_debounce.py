@@ -0,0 +1,90 @@
+import asyncio
+
+# ----------------------------------------------------------------------
+# Debounce stage for presence changes (Login_notification.py)
+# ----------------------------------------------------------------------
+# Mobile clients and auto-idle flip users between online and idle/offline
+# many times an hour. Each change is held here for `window` seconds before
+# it is committed. If the user flips back inside the window, both changes
+# are dropped and the session simply continues. Only a change that outlasts
+# the window reaches `commit`, stamped with the time it really happened, so
+# session totals stay exact while momentary idles leave no trace:
+#
+#   online 10:00 ... idle 10:20:05, online 10:20:40  ->  one session from 10:00
+#   online 10:00 ... idle 10:20:05 (stays idle)      ->  session ends at 10:20:05
+#
+# A user is either online (status 'online') or away (idle, dnd or offline);
+# changes between the away states never open or close a session.
+
+ONLINE = 'online'
+
+
+class PresenceDebouncer:
+    """Holds presence changes per user until they have lasted `window` seconds."""
+
+    def __init__(self, window, settled_online, commit):
+        self.window = window
+        self._settled_online = settled_online   # user id -> True if their committed state is online
+        self._commit = commit                   # async (user id, status, timestamp), called once settled
+        self._pending = {}                      # user id -> (status, timestamp, TimerHandle)
+        self._handed_over = {}                  # user id -> online?, as last passed to `commit` (it may still be running)
+        self._commits = set()                   # commit tasks still running, referenced so none is collected mid-run
+        self.observed = 0                       # changes seen
+        self.committed = 0                      # changes that settled and were committed
+        self.coalesced = 0                      # changes undone inside the window (counted in pairs)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def observe(self, user_id, status, timestamp):
+        """Feeds one presence change; commits it later unless it is reversed first."""
+        self.observed += 1
+        online = status == ONLINE
+        pending = self._pending.get(user_id)
+
+        if pending is not None:
+            if (pending[0] == ONLINE) == online:
+                return # e.g. idle -> offline while already going away: keep the first time
+            # Back to the settled state inside the window: neither change happened
+            pending[2].cancel()
+            del self._pending[user_id]
+            self.coalesced += 2
+            return
+
+        settled = self._handed_over.get(user_id)
+        if settled is None:
+            settled = self._settled_online(user_id)
+        if online == settled:
+            return # Already the committed state (e.g. the first event after a restart)
+
+        if self.window <= 0:
+            self._start_commit(user_id, status, timestamp)
+            return
+        handle = asyncio.get_running_loop().call_later(self.window, self._settle, user_id)
+        self._pending[user_id] = (status, timestamp, handle)
+
+    def _settle(self, user_id):
+        status, timestamp, _ = self._pending.pop(user_id)
+        self._start_commit(user_id, status, timestamp)
+
+    def _start_commit(self, user_id, status, timestamp):
+        self.committed += 1
+        self._handed_over[user_id] = status == ONLINE
+        task = asyncio.get_running_loop().create_task(self._commit(user_id, status, timestamp))
+        self._commits.add(task)
+        task.add_done_callback(self._commit_done)
+
+    def _commit_done(self, task):
+        self._commits.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Presence commit failed: {task.exception()!r}")
+
+    async def flush(self):
+        """Commits every held change now (e.g. before the midnight report), in the order they happened."""
+        pending = sorted(self._pending.items(), key=lambda item: item[1][1])
+        self._pending.clear()
+        for user_id, (status, timestamp, handle) in pending:
+            handle.cancel()
+            self.committed += 1
+            self._handed_over[user_id] = status == ONLINE
+            await self._commit(user_id, status, timestamp)
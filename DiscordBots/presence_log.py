@@ -0,0 +1,247 @@
+import argparse
+import collections
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pytz
+
+# ----------------------------------------------------------------------
+# Presence event log for Login_notification.py
+# ----------------------------------------------------------------------
+# Every qualifying presence transition is appended as one compact JSON line
+# to a per-day file (presence_logs/presence-YYYY-MM-DD.jsonl):
+#
+#   {"u":"121exampleid1","s":"online","t":1730606400.0}
+#
+# Appending is O(1) per event no matter how many users are tracked. The
+# per-user day records (user_tracker) are a projection of the day's events:
+# apply_presence_event() is the only code that changes them, both live and
+# on replay. A snapshot of the projection is written now and then together
+# with the log offset it covers, so a restart loads the snapshot and replays
+# only the tail. At midnight the finished day's records are archived next to
+# its log (summary-YYYY-MM-DD.json). The log itself stays the exact session
+# history of the day:
+#
+#   python presence_log.py 2025-11-03           # sessions per user
+#   python presence_log.py 2025-11-03 --events  # raw transitions
+
+ONLINE = 'online'
+OFFLINE = 'offline'
+LOG_SEPARATORS = (',', ':')
+
+
+# Day totals read off a record in O(1); see summarize_day()
+DaySummary = collections.namedtuple(
+    'DaySummary',
+    'first_in last_out active_seconds idle_seconds sessions lateness_seconds scheduled_seconds still_online')
+
+
+def apply_presence_event(user_data, status, ts):
+    """Updates one user's day record for a presence transition to `status` at `ts`."""
+    if status == ONLINE:
+        # Start the current session; the first one of the day also triggers the arrival notice
+        if user_data['online_time_timestamp'] is None:
+            user_data['session_count'] = user_data.get('session_count', 0) + 1
+            if user_data['last_offline_timestamp'] is not None:
+                # Time away between two sessions
+                user_data['idle_seconds'] = user_data.get('idle_seconds', 0) + ts - user_data['last_offline_timestamp']
+        user_data['online_time_timestamp'] = ts
+        if user_data['first_online_timestamp'] is None:
+            user_data['first_online_timestamp'] = ts
+        user_data['online_message_sent'] = True
+
+    elif user_data['online_time_timestamp'] is not None:
+        # End the session: accumulate it and record the last offline time (used by the midnight report)
+        user_data['total_time_online'] += ts - user_data['online_time_timestamp']
+        user_data['online_time_timestamp'] = None
+        user_data['last_offline_timestamp'] = ts
+
+
+def new_day_record(day, scheduled_in_ts=None, scheduled_out_ts=None):
+    """A user's empty record for `day` ('YYYY-MM-DD'), with that day's scheduled IN/OUT times if any."""
+    return {
+        'last_reset_day': day,
+        'online_time_timestamp': None,
+        'first_online_timestamp': None,
+        'last_offline_timestamp': None,
+        'total_time_online': 0,
+        'idle_seconds': 0,
+        'session_count': 0,
+        'scheduled_in_timestamp': scheduled_in_ts,
+        'scheduled_out_timestamp': scheduled_out_ts,
+        'online_message_sent': False
+    }
+
+
+def roll_over(users, records, boundary_ts):
+    """Carries sessions still open in `users` into the new day's `records`.
+
+    Each open session is split at `boundary_ts` (the local midnight starting the
+    new day): closed there in the finished day's record and reopened there in the
+    new one, so time online across midnight counts on both days and a carried
+    user gets no second arrival notice. Returns the carried user ids.
+    """
+    carried = []
+    for user_id, record in records.items():
+        user_data = users.get(user_id)
+        if user_data is not None and user_data['online_time_timestamp'] is not None:
+            apply_presence_event(user_data, OFFLINE, boundary_ts)
+            apply_presence_event(record, ONLINE, boundary_ts)
+            carried.append(user_id)
+    return carried
+
+
+def summarize_day(user_data, now_ts=None):
+    """DaySummary of a record. With `now_ts`, an open session counts up to then (a partial-day report).
+
+    Times are epoch seconds, None where unknown; lateness is negative when early.
+    """
+    first_in = user_data['first_online_timestamp']
+    last_out = user_data['last_offline_timestamp']
+    active = user_data['total_time_online']
+    still_online = user_data['online_time_timestamp'] is not None
+    if still_online and now_ts is not None:
+        active += now_ts - user_data['online_time_timestamp']
+        last_out = now_ts
+
+    in_ts = user_data.get('scheduled_in_timestamp')
+    out_ts = user_data.get('scheduled_out_timestamp')
+    return DaySummary(
+        first_in, last_out, active, user_data.get('idle_seconds', 0), user_data.get('session_count', 0),
+        first_in - in_ts if first_in is not None and in_ts is not None else None,
+        out_ts - in_ts if in_ts is not None and out_ts is not None else None,
+        still_online)
+
+
+def write_snapshot(path, data):
+    """Writes JSON to a temp file and swaps it in, so a crash never leaves a half-written snapshot."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=LOG_SEPARATORS)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PresenceLog:
+    """Append-only per-day presence event files."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._day = None
+        self._file = None
+
+    def path_for(self, day):
+        return self.directory / f"presence-{day}.jsonl"
+
+    def archive_path(self, day):
+        """Where the finished day's per-user records are kept after midnight."""
+        return self.directory / f"summary-{day}.json"
+
+    def _open(self, day):
+        self.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(day)
+        self._file = open(path, 'a')
+        # A crash can leave a torn last line; start on a fresh one so it stays the only bad line
+        if self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+        self._day = day
+
+    def append(self, day, user_id, status, ts):
+        """Records one transition. Flushed to the OS right away; fsynced with each snapshot."""
+        if day != self._day:
+            self._open(day)
+        self._file.write(json.dumps({'u': user_id, 's': status, 't': ts}, separators=LOG_SEPARATORS) + '\n')
+        self._file.flush()
+
+    def offset(self, day):
+        """Current size of the day's log, stored with a snapshot as the point it covers."""
+        if day == self._day:
+            return self._file.tell()
+        path = self.path_for(day)
+        return path.stat().st_size if path.exists() else 0
+
+    def checkpoint(self, day):
+        """
+        (offset, sync) for a snapshot of `day`: the log size right now, and a function
+        that fsyncs the log up to at least that point. Call it on the event loop; `sync`
+        may run in a worker thread even if the log moves on to another day meanwhile.
+        """
+        if day != self._day:
+            return self.offset(day), lambda: None # Not open: everything was flushed when it was closed
+        fd = os.dup(self._file.fileno())
+
+        def sync():
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        return self._file.tell(), sync
+
+    def sync(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def replay(self, day, offset=0):
+        """Yields (user id, status, timestamp) for the day's events from `offset` on, in order."""
+        path = self.path_for(day)
+        if not path.exists():
+            return
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue # Torn write from a crash
+                yield event['u'], event['s'], event['t']
+
+    def sessions(self, day):
+        """{user id: [(online ts, offline ts or None if still online)]} rebuilt from the day's events."""
+        sessions = {}
+        for user_id, status, ts in self.replay(day):
+            user_sessions = sessions.setdefault(user_id, [])
+            if status == ONLINE:
+                user_sessions.append([ts, None])
+            elif user_sessions and user_sessions[-1][1] is None:
+                user_sessions[-1][1] = ts
+        return {user_id: [tuple(session) for session in user_sessions] for user_id, user_sessions in sessions.items()}
+
+
+def _format_ts(ts, tz):
+    return datetime.fromtimestamp(ts, tz).strftime('%I:%M:%S %p') if ts is not None else "still online"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the presence sessions recorded for a day.")
+    parser.add_argument('day', help="YYYY-MM-DD (the bot's TARGET_TIMEZONE date)")
+    parser.add_argument('--dir', default='presence_logs', help="Log directory (default: presence_logs)")
+    parser.add_argument('--tz', default='Asia/Dhaka', help="Timezone to show times in (default: Asia/Dhaka)")
+    parser.add_argument('--events', action='store_true', help="Print the raw transitions instead of sessions")
+    args = parser.parse_args()
+    tz = pytz.timezone(args.tz)
+
+    log = PresenceLog(args.dir)
+    if args.events:
+        for user_id, status, ts in log.replay(args.day):
+            print(f"{_format_ts(ts, tz)}  {user_id}  {status}")
+    else:
+        for user_id, user_sessions in sorted(log.sessions(args.day).items()):
+            total = sum(end - start for start, end in user_sessions if end is not None)
+            print(f"{user_id}: {len(user_sessions)} session(s), {total / 3600:.2f} h online")
+            for start, end in user_sessions:
+                print(f"    {_format_ts(start, tz)} - {_format_ts(end, tz)}")
@@ -0,0 +1,116 @@
+import collections
+from datetime import datetime, time, timedelta
+
+# ----------------------------------------------------------------------
+# Compiled work schedules for the Login_notification bots
+# ----------------------------------------------------------------------
+# SCHEDULED_USERS maps user IDs to day names ('Monday'...) or 'default', each
+# with "HH:MM" in/out times. It is compiled once into a table of 7 parsed
+# entries per user (day name resolved, default filled in), and the tracked IDs
+# into a frozenset of ints. Today's in/out times are localized to epoch
+# seconds the first time a user needs them each day, so a presence event
+# costs a set lookup and integer comparisons: no strftime, strptime or
+# localize on the hot path.
+
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# in_minutes/out_minutes: minutes after midnight, None if the time is missing or not valid "HH:MM"
+DaySchedule = collections.namedtuple('DaySchedule', 'in_text out_text in_minutes out_minutes')
+
+
+def parse_hhmm(text):
+    """'09:30' -> 570 (minutes after midnight); None if missing or invalid."""
+    if not text:
+        return None
+    try:
+        parsed = datetime.strptime(text, '%H:%M')
+    except ValueError:
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+
+def compile_day(entry):
+    if not entry:
+        return None
+    in_text, out_text = entry.get('in'), entry.get('out')
+    return DaySchedule(in_text, out_text, parse_hhmm(in_text), parse_hhmm(out_text))
+
+
+class ScheduleTable:
+    """SCHEDULED_USERS as per-user weekday rows, with today's boundaries cached in epoch seconds."""
+
+    def __init__(self, scheduled_users, tz):
+        self.tz = tz
+        self.compile(scheduled_users)
+
+    def compile(self, scheduled_users):
+        """(Re)builds the table; call again after changing SCHEDULED_USERS."""
+        rows = {}
+        for key, days in scheduled_users.items():
+            try:
+                user_id = int(key)
+            except ValueError:
+                print(f"Ignoring schedule for {key!r}: not a numeric Discord user ID.")
+                continue
+
+            default = compile_day(days.get('default'))
+            rows[user_id] = tuple(compile_day(days[name]) if name in days else default for name in WEEKDAY_NAMES)
+
+            for name, entry in days.items():
+                if name != 'default' and name not in WEEKDAY_NAMES:
+                    print(f"Ignoring unknown day {name!r} in the schedule of {key}.")
+                elif entry and entry.get('in') and parse_hhmm(entry['in']) is None:
+                    print(f"Invalid IN time {entry['in']!r} for {key} ({name}); expected HH:MM.")
+
+        self.rows = rows
+        self.tracked_ids = frozenset(rows)
+        self._day = None
+        self._day_key = None
+        self._day_start = self._day_end = 0
+        self._today = {}   # user id -> (schedule, in ts, out ts) for the cached day
+
+    def schedule_for(self, user_id, weekday):
+        """The user's DaySchedule for a weekday (0 = Monday), or None."""
+        row = self.rows.get(user_id)
+        return row[weekday] if row else None
+
+    def _at(self, day, minutes):
+        if minutes is None:
+            return None
+        return int(self.tz.localize(datetime.combine(day, time(minutes // 60, minutes % 60))).timestamp())
+
+    def boundaries(self, user_id, day):
+        """(schedule, in ts, out ts) on a date; the timestamps are None where a time is missing or invalid."""
+        schedule = self.schedule_for(user_id, day.weekday())
+        if schedule is None:
+            return None, None, None
+        return schedule, self._at(day, schedule.in_minutes), self._at(day, schedule.out_minutes)
+
+    def _roll(self, now_ts):
+        day = datetime.fromtimestamp(now_ts, self.tz).date()
+        self._day = day
+        self._day_key = day.strftime('%Y-%m-%d')
+        self._day_start = self._at(day, 0)
+        self._day_end = self._at(day + timedelta(days=1), 0)
+        self._today = {}
+
+    def today(self, user_id, now_ts):
+        """boundaries() for the local day containing `now_ts`, computed once per user per day."""
+        if not self._day_start <= now_ts < self._day_end:
+            self._roll(now_ts)
+        bounds = self._today.get(user_id)
+        if bounds is None:
+            bounds = self._today[user_id] = self.boundaries(user_id, self._day)
+        return bounds
+
+    def day_key(self, now_ts):
+        """'YYYY-MM-DD' of the local day containing `now_ts`."""
+        if not self._day_start <= now_ts < self._day_end:
+            self._roll(now_ts)
+        return self._day_key
+
+    def day_start(self, now_ts):
+        """Epoch seconds of the local midnight that starts the day containing `now_ts`."""
+        if not self._day_start <= now_ts < self._day_end:
+            self._roll(now_ts)
+        return self._day_start
@@ -0,0 +1,383 @@
+import asyncio
+import collections
+import json
+import random
+import time
+
+# ----------------------------------------------------------------------
+# Outbound delivery: message packing + per-route rate-limited queue
+# ----------------------------------------------------------------------
+# Reminders that come due together are rendered into "blocks", packed into as
+# few messages as the 2000-character limit allows, and handed to the Outbox.
+# The Outbox runs one worker per channel (Discord's rate-limit route for
+# channel.send) so a burst in one channel never delays another, and paces each
+# route with a token bucket instead of running into 429s. A 429 or 5xx that
+# gets through anyway is retried on its route with exponential backoff.
+#
+# Attendees who prefer DMs are reached through DMFanout: a small worker pool
+# looks up their DM channels (cached, so a big meeting costs one lookup per
+# attendee per bot run), remembers who has DMs closed, and hands each DM to
+# the Outbox, where every DM channel is its own route under the shared
+# global budget.
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Discord allows roughly 5 messages per 5 seconds per channel and 50 requests
+# per second per bot; stay just under both.
+ROUTE_RATE = 1.0        # tokens per second per channel
+ROUTE_BURST = 5         # bucket size per channel
+GLOBAL_RATE = 45.0      # tokens per second across all channels
+GLOBAL_BURST = 45
+MAX_IN_FLIGHT = 8       # concurrent channel.send calls across all channels
+
+# Sends failing with these HTTP statuses are retried with exponential backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_SEND_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+DELIVERY_MODES = ('channel', 'dm', 'both')
+DM_WORKERS = 8                  # concurrent DM channel lookups
+DM_CACHE_SIZE = 10000           # DM channels kept (discord.py itself keeps only the last 128)
+CLOSED_DM_RETRY_SECONDS = 6 * 3600 # After a refused DM, use the channel for this long before trying again
+DM_REFUSED_STATUSES = frozenset({403, 404}) # DMs closed / unknown user
+
+
+def _split_oversized(block, limit):
+    """Splits a single block that does not fit in one message, preferring line and space breaks."""
+    pieces = []
+    while len(block) > limit:
+        cut = block.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = block.rfind(' ', 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(block[:cut])
+        block = block[cut:].lstrip('\n ')
+    if block:
+        pieces.append(block)
+    return pieces
+
+
+def pack_messages(header, blocks, footer="", limit=DISCORD_MESSAGE_LIMIT):
+    """
+    Packs `blocks` into the fewest messages of at most `limit` characters.
+    Every message starts with `header`; `footer` is appended to the last one.
+    """
+    header = f"{header}\n" if header else ""
+    footer = f"\n{footer}" if footer else ""
+    room = limit - len(header) - len(footer)
+
+    pieces = []
+    for block in blocks:
+        pieces.extend(_split_oversized(block, room) if len(block) > room else [block])
+
+    messages = []
+    current = []
+    size = 0
+    for piece in pieces:
+        extra = len(piece) + (1 if current else 0)
+        if current and size + extra > room:
+            messages.append(header + "\n".join(current))
+            current, size = [], 0
+            extra = len(piece)
+        current.append(piece)
+        size += extra
+
+    if current or not messages:
+        messages.append(header + "\n".join(current))
+    messages[-1] += footer
+    return messages
+
+
+class TokenBucket:
+    """Classic token bucket; `acquire()` sleeps until a token is available."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_delay(error, attempt):
+    """Seconds to wait before retrying a send that failed with `error`, or None if it should not be retried."""
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None and getattr(error, 'status', None) not in RETRY_STATUSES:
+        return None
+    if attempt >= MAX_SEND_ATTEMPTS:
+        return None
+    delay = retry_after if retry_after else RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+    # Jitter keeps routes that failed together from retrying in lockstep
+    return min(delay, RETRY_MAX_SECONDS) * random.uniform(1.0, 1.25)
+
+
+class Outbox:
+    """Per-channel FIFO queues drained concurrently, each paced by its own token bucket."""
+
+    def __init__(self, route_rate=ROUTE_RATE, route_burst=ROUTE_BURST,
+                 global_rate=GLOBAL_RATE, global_burst=GLOBAL_BURST, max_in_flight=MAX_IN_FLIGHT):
+        self._route_rate = route_rate
+        self._route_burst = route_burst
+        self._global = TokenBucket(global_rate, global_burst)
+        self._max_in_flight = max_in_flight
+        self._in_flight = None # Semaphore, created on first use inside the running loop
+        self._queues = {}    # route (channel id) -> deque of (channel, content, view, on_sent, on_failed, make_file)
+        self._buckets = {}   # route -> TokenBucket
+        self._workers = {}   # route -> asyncio.Task
+        self.depth = 0       # messages queued but not yet sent
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def submit(self, channel, content, on_sent=None, view=None, on_failed=None, make_file=None):
+        """
+        Queues a message for `channel` and makes sure its route has a worker.
+        `on_sent` is called with no arguments once the message was delivered;
+        `view` (discord.ui.View) attaches message components; `on_failed` is
+        called with the exception if the message was given up on. `make_file`
+        returns a fresh discord.File to attach (a sent File is closed, so each
+        attempt needs its own).
+        """
+        route = channel.id
+        self._queues.setdefault(route, collections.deque()).append((channel, content, view, on_sent, on_failed, make_file))
+        self.depth += 1
+
+        if route not in self._workers:
+            self._workers[route] = asyncio.get_running_loop().create_task(self._drain(route))
+
+    def route_depths(self):
+        """Returns {channel id: pending messages} for routes with a backlog."""
+        return {route: len(queue) for route, queue in self._queues.items() if queue}
+
+    async def throttle(self):
+        """Waits for a slot in the bot-wide request budget; for API calls made outside the queue."""
+        await self._global.acquire()
+
+    async def join(self):
+        """Waits until every queued message has been attempted."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    async def _drain(self, route):
+        queue = self._queues[route]
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = TokenBucket(self._route_rate, self._route_burst)
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self._max_in_flight)
+
+        try:
+            while queue:
+                channel, content, view, on_sent, on_failed, make_file = queue.popleft()
+                try:
+                    await self._send(route, bucket, channel, content, view, on_sent, on_failed, make_file)
+                finally:
+                    self.depth -= 1
+        finally:
+            del self._workers[route]
+            if not queue:
+                del self._queues[route]
+
+    async def _send(self, route, bucket, channel, content, view, on_sent, on_failed, make_file=None):
+        """Sends one message, retrying rate limits and server errors; the route waits meanwhile."""
+        attempt = 1
+        while True:
+            await bucket.acquire()
+            await self._global.acquire()
+            extras = {}
+            if view is not None:
+                extras['view'] = view
+            if make_file is not None:
+                extras['file'] = make_file()
+            try:
+                async with self._in_flight:
+                    await channel.send(content, **extras)
+            except Exception as e: # A failed send must not stall the rest of the route
+                delay = retry_delay(e, attempt)
+                if delay is not None:
+                    self.retried += 1
+                    print(f"Send to channel {route} failed ({e}); retrying in {delay:.1f}s.")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                self.failed += 1
+                print(f"Failed to deliver message to channel {route}: {e}")
+                if on_failed is not None:
+                    on_failed(e)
+                return
+
+            self.sent += 1
+            if on_sent is not None:
+                on_sent()
+            return
+
+
+class DMFanout:
+    """Delivers messages to users' DMs: bounded DM channel lookups, a DM channel cache, closed-DM tracking."""
+
+    def __init__(self, outbox, open_dm, workers=DM_WORKERS, cache_size=DM_CACHE_SIZE,
+                 closed_seconds=CLOSED_DM_RETRY_SECONDS, clock=time.monotonic):
+        self._outbox = outbox
+        self._open_dm = open_dm              # async user id -> DM channel (raises if it can't be opened)
+        self._max_workers = workers
+        self._cache_size = cache_size
+        self._closed_seconds = closed_seconds
+        self._clock = clock
+        self._channels = collections.OrderedDict() # user id -> DM channel, least recently used first
+        self._closed = {}                    # user id -> clock time until which DMs are not attempted
+        self._pending = collections.deque()  # (user id, messages, view, on_sent, on_closed) awaiting a lookup
+        self._workers = set()
+        self.closed_count = 0                # DMs refused since the bot started
+
+    def dm_closed(self, user_id):
+        """True if the user refused a DM recently; reach them in the channel instead."""
+        until = self._closed.get(user_id)
+        if until is None:
+            return False
+        if self._clock() >= until:
+            del self._closed[user_id]
+            return False
+        return True
+
+    def mark_closed(self, user_id):
+        self._channels.pop(user_id, None)
+        self._closed[user_id] = self._clock() + self._closed_seconds
+        self.closed_count += 1
+
+    def reopen(self, user_id):
+        """Forgets a refused DM, e.g. after the user asked for DMs again."""
+        self._closed.pop(user_id, None)
+
+    def submit(self, user_id, messages, view=None, on_sent=None, on_closed=None):
+        """
+        Queues `messages` for the user's DMs. `view` and `on_sent` go with the last message.
+        `on_closed(user_id)` is called once if the user can't be DMed, so the caller can fall back.
+        """
+        channel = self._channels.get(user_id)
+        if channel is not None:
+            self._channels.move_to_end(user_id)
+            self._queue_messages(user_id, channel, messages, view, on_sent, on_closed)
+            return
+
+        self._pending.append((user_id, messages, view, on_sent, on_closed))
+        if len(self._workers) < self._max_workers:
+            worker = asyncio.get_running_loop().create_task(self._work())
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+
+    @property
+    def depth(self):
+        """DMs still waiting for their channel lookup."""
+        return len(self._pending)
+
+    async def join(self):
+        """Waits until every pending DM was handed to the Outbox (use Outbox.join() for delivery)."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers), return_exceptions=True)
+
+    async def _work(self):
+        while self._pending:
+            user_id, messages, view, on_sent, on_closed = self._pending.popleft()
+            channel = await self._channel_for(user_id)
+            if channel is None:
+                if on_closed is not None:
+                    on_closed(user_id)
+                continue
+            self._queue_messages(user_id, channel, messages, view, on_sent, on_closed)
+
+    async def _channel_for(self, user_id):
+        # An earlier item of the same burst may have opened it already
+        channel = self._channels.get(user_id)
+        if channel is not None or self.dm_closed(user_id):
+            return channel
+
+        await self._outbox.throttle() # Lookups count against the same global budget as sends
+        try:
+            channel = await self._open_dm(user_id)
+        except Exception as e:
+            if getattr(e, 'status', None) in DM_REFUSED_STATUSES:
+                self.mark_closed(user_id)
+            print(f"Could not open a DM with user {user_id}: {e}")
+            return None
+
+        self._channels[user_id] = channel
+        if len(self._channels) > self._cache_size:
+            self._channels.popitem(last=False)
+        return channel
+
+    def _queue_messages(self, user_id, channel, messages, view, on_sent, on_closed):
+        refused = []
+
+        def failed(error):
+            # Every message of a refused DM fails the same way; fall back once
+            if getattr(error, 'status', None) in DM_REFUSED_STATUSES and not refused:
+                refused.append(error)
+                self.mark_closed(user_id)
+                if on_closed is not None:
+                    on_closed(user_id)
+
+        for index, message in enumerate(messages, 1):
+            last = index == len(messages)
+            self._outbox.submit(channel, message, on_sent if last else None, view if last else None, failed)
+
+
+class DeliveryPreferences:
+    """Per-user choice of where reminders go: the meeting channel, DMs, or both."""
+
+    def __init__(self, path, default='channel'):
+        self.path = path
+        self.default = default
+        self.users = {}          # user id -> mode
+        self._dm_users = set()   # users whose mode includes DMs, for the all-channel fast path
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {self.path.name}. Using the default delivery mode.")
+            return
+        self.users = {}
+        self._dm_users = set()
+        for user_id, mode in data.get('users', {}).items():
+            if mode in DELIVERY_MODES:
+                self.set_mode(int(user_id), mode)
+
+    def to_json(self):
+        return {'users': {str(k): v for k, v in self.users.items()}}
+
+    def set_mode(self, user_id, mode):
+        self.users[user_id] = mode
+        if mode == 'channel':
+            self._dm_users.discard(user_id)
+        else:
+            self._dm_users.add(user_id)
+
+    def clear(self, user_id):
+        self.users.pop(user_id, None)
+        self._dm_users.discard(user_id)
+
+    def mode_for(self, user_id):
+        return self.users.get(user_id, self.default)
+
+    @property
+    def channel_only(self):
+        """True when nobody gets DMs, so channel mentions can be used as they are."""
+        return self.default == 'channel' and not self._dm_users
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import re
+
+# ----------------------------------------------------------------------
+# Bulk import of meeting schedules (!import)
+# ----------------------------------------------------------------------
+# An attached CSV (with a header row) or JSON file (a list of objects, or
+# {"meetings": [...]}) is decoded here into plain rows; Meeting_Reminder.py
+# validates each row like a !schedule command and commits them together.
+#
+# Columns / keys:
+#   time       - same formats as !schedule, e.g. "2025-12-31 02:30 PM"  (required)
+#   attendees  - mentions or user IDs (space separated) and member names (comma/semicolon separated)
+#   topic      - meeting topic
+#   channel    - channel ID, <#mention> or name; defaults to the channel !import was used in
+#   repeat, until, count - optional, same values as --repeat/--until/--count
+#   remind     - optional reminder offsets, same values as --remind (e.g. "60,30,5")
+
+IMPORT_COLUMNS = ('time', 'attendees', 'topic', 'channel', 'repeat', 'until', 'count', 'remind')
+MAX_IMPORT_BYTES = 1_000_000
+MAX_IMPORT_ROWS = 5000
+
+ATTENDEE_SPLIT_RE = re.compile(r'[,;]|\s+(?=<@|\d)')
+USER_REF_RE = re.compile(r'^(?:<@!?(\d+)>|(\d{15,21}))$')
+CHANNEL_REF_RE = re.compile(r'^(?:<#(\d+)>|(\d{15,21}))$')
+
+
+def _normalize(item):
+    """Lower-cases keys and turns every known value into a stripped string."""
+    row = {}
+    for key, value in item.items():
+        if key is None:
+            continue
+        key = key.strip().lower()
+        if key not in IMPORT_COLUMNS or value is None:
+            continue
+        if isinstance(value, list):
+            value = " ".join(str(v) for v in value)
+        row[key] = str(value).strip()
+    return row
+
+
+def read_import_file(filename, data):
+    """
+    Decodes an uploaded schedule. Returns [(row number, row dict)].
+    Raises ValueError with a user-facing message if the file as a whole can't be read.
+    """
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError("The file must be UTF-8 text.")
+
+    stripped = text.lstrip()
+    if filename.lower().endswith('.json') or stripped.startswith(('[', '{')):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON (line {e.lineno}): {e.msg}.")
+        if isinstance(items, dict):
+            items = items.get('meetings')
+        if not isinstance(items, list):
+            raise ValueError("JSON must be a list of meetings or an object with a `meetings` list.")
+        rows = []
+        for number, item in enumerate(items, 1):
+            rows.append((number, _normalize(item) if isinstance(item, dict) else None))
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or 'time' not in [name.strip().lower() for name in reader.fieldnames if name]:
+            raise ValueError("CSV needs a header row with at least a `time` column.")
+        # Row numbers are file lines, so they match what the user sees in a spreadsheet/editor
+        rows = [(reader.line_num, _normalize(item)) for item in reader]
+
+    if not rows:
+        raise ValueError("The file contains no meetings.")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"Too many meetings ({len(rows)}); the limit is {MAX_IMPORT_ROWS} per import.")
+    return rows
+
+
+def parse_attendees(value, resolve_name=None):
+    """
+    Returns the user IDs in an attendees field, in order and without duplicates.
+    `resolve_name(name)` maps a member name to an ID (or None). Raises ValueError for unknown entries.
+    """
+    user_ids = []
+    for token in ATTENDEE_SPLIT_RE.split(value or ""):
+        token = token.strip()
+        if not token:
+            continue
+        match = USER_REF_RE.match(token)
+        if match:
+            user_id = int(match.group(1) or match.group(2))
+        else:
+            user_id = resolve_name(token.lstrip('@')) if resolve_name else None
+            if user_id is None:
+                raise ValueError(f"unknown attendee `{token}`")
+        if user_id not in user_ids:
+            user_ids.append(user_id)
+    return user_ids
+
+
+def parse_channel_ref(value):
+    """Returns a channel ID for '<#id>' / 'id', the bare name for anything else, or None if empty."""
+    if not value:
+        return None
+    match = CHANNEL_REF_RE.match(value)
+    if match:
+        return int(match.group(1) or match.group(2))
+    return value.lstrip('#')
+
+
+def recurrence_args(row):
+    """The row's repeat options as !schedule arguments, for parse_recurrence_args()."""
+    args = []
+    for column in ('repeat', 'until', 'count'):
+        if row.get(column):
+            args += [f"--{column}", row[column]]
+    return args
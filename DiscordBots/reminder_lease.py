@@ -0,0 +1,97 @@
+import sqlite3
+import time
+
+# ----------------------------------------------------------------------
+# Leader lease for running several bot instances on shared storage
+# ----------------------------------------------------------------------
+# Every instance points at the same SQLite file. The holder of the lease is
+# the active instance: it fires reminders, answers commands and writes the
+# reminder files. It renews the lease every heartbeat; the others try to
+# take it on the same heartbeat and succeed once it has run out. Taking over
+# bumps the epoch, so a paused former holder can tell it was replaced.
+#
+# All decisions are made inside one IMMEDIATE transaction against the
+# injected clock, so two processes sharing a fake clock fail over exactly
+# like two real ones (see failover_check.py).
+
+LEASE_NAME = 'reminders'
+
+
+class ReminderLease:
+    """A time-limited, renewable single-holder lease stored in SQLite."""
+
+    def __init__(self, path, owner, ttl, clock=time.time):
+        self.path = path
+        self.owner = owner
+        self.ttl = ttl
+        self._clock = clock
+        self._db = None
+        self.expires = None    # End of our lease, or None while we don't hold it
+        self.epoch = None      # Takeover count of the lease we hold
+
+    def _connect(self):
+        if self._db is None:
+            # Autocommit mode; transactions are opened explicitly. Heartbeats run in worker threads.
+            self._db = sqlite3.connect(str(self.path), timeout=self.ttl / 2, isolation_level=None,
+                                       check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lease ("
+                " name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL, epoch INTEGER NOT NULL)"
+            )
+        return self._db
+
+    def acquire(self):
+        """
+        Takes the lease if it is free or has run out, or renews it if we hold it.
+        Returns True while we hold it. Blocking (SQLite I/O): call from a worker thread.
+        """
+        db = self._connect()
+        now = self._clock()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT owner, expires, epoch FROM lease WHERE name = ?", (LEASE_NAME,)).fetchone()
+            if row is None:
+                epoch = 1
+                db.execute("INSERT INTO lease VALUES (?, ?, ?, ?)", (LEASE_NAME, self.owner, now + self.ttl, epoch))
+            elif row[0] == self.owner:
+                # Still ours (nobody took it meanwhile, even if it ran out): renew
+                epoch = row[2]
+                db.execute("UPDATE lease SET expires = ? WHERE name = ?", (now + self.ttl, LEASE_NAME))
+            elif row[1] <= now:
+                epoch = row[2] + 1
+                db.execute("UPDATE lease SET owner = ?, expires = ?, epoch = ? WHERE name = ?",
+                           (self.owner, now + self.ttl, epoch, LEASE_NAME))
+            else:
+                db.execute("COMMIT")
+                self.expires = self.epoch = None
+                return False
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        self.expires = now + self.ttl
+        self.epoch = epoch
+        return True
+
+    def held(self):
+        """True while our last successful acquire/renew has not run out. No I/O."""
+        return self.expires is not None and self._clock() < self.expires
+
+    def release(self):
+        """Gives the lease up so a standby can take over on its next heartbeat (clean shutdown)."""
+        if self.expires is None:
+            return
+        self.expires = self.epoch = None
+        self._connect().execute("UPDATE lease SET expires = 0 WHERE name = ? AND owner = ?", (LEASE_NAME, self.owner))
+
+    def holder(self):
+        """(owner, expires, epoch) of the current lease, or None. For status output."""
+        return self._connect().execute(
+            "SELECT owner, expires, epoch FROM lease WHERE name = ?", (LEASE_NAME,)
+        ).fetchone()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
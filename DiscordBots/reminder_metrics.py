@@ -0,0 +1,152 @@
+import asyncio
+import bisect
+import os
+
+# ----------------------------------------------------------------------
+# Lightweight metrics for the reminder bot
+# ----------------------------------------------------------------------
+# Fixed-bucket histograms and counters with Prometheus text-format export,
+# so fire lag, tick time and persistence latency can be scraped (textfile
+# collector or the optional HTTP endpoint) and summarized by !stats.
+
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimates a quantile by linear interpolation inside the matching bucket."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1] # Overflow bucket: report its lower bound
+
+    def fraction_below(self, limit):
+        """Share of observations <= `limit` (exact when `limit` is a bucket bound)."""
+        if not self.count:
+            return None
+        index = bisect.bisect_right(self.buckets, limit)
+        return sum(self.counts[:index]) / self.count
+
+    def render(self, name, labels=""):
+        lines = []
+        cumulative = 0
+        sep = "," if labels else ""
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{upper}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class ReminderMetrics:
+    """All reminder-delivery instrumentation in one place."""
+
+    def __init__(self, intervals, sources=None):
+        self.fire_lag = {interval: Histogram(LAG_BUCKETS) for interval in intervals}
+        self.tick_duration = Histogram(DURATION_BUCKETS)
+        self.persist_duration = Histogram(DURATION_BUCKETS)
+        self.notifications_fired = 0
+        self.persisted_records = 0
+        # name -> (metric type, help text, zero-arg callable) read at export time (queue depth, send errors, ...)
+        self.sources = sources or {}
+
+    def observe_fire_lag(self, interval, seconds):
+        histogram = self.fire_lag.get(interval)
+        if histogram is None:
+            histogram = self.fire_lag[interval] = Histogram(LAG_BUCKETS)
+        histogram.observe(max(0.0, seconds))
+
+    def observe_tick(self, seconds, fired):
+        self.tick_duration.observe(seconds)
+        self.notifications_fired += fired
+
+    def observe_commit(self, seconds, records):
+        self.persist_duration.observe(seconds)
+        self.persisted_records += records
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP reminder_fire_lag_seconds Delay between a notification's scheduled time and its delivery.",
+            "# TYPE reminder_fire_lag_seconds histogram",
+        ]
+        for interval, histogram in sorted(self.fire_lag.items()):
+            lines.extend(histogram.render("reminder_fire_lag_seconds", f'interval="{interval}"'))
+
+        lines += [
+            "# HELP reminder_tick_duration_seconds Time spent processing one batch of due notifications.",
+            "# TYPE reminder_tick_duration_seconds histogram",
+        ]
+        lines.extend(self.tick_duration.render("reminder_tick_duration_seconds"))
+
+        lines += [
+            "# HELP reminder_persist_duration_seconds Time spent writing one batch of reminder changes.",
+            "# TYPE reminder_persist_duration_seconds histogram",
+        ]
+        lines.extend(self.persist_duration.render("reminder_persist_duration_seconds"))
+
+        lines += [
+            "# HELP reminder_notifications_fired_total Notifications taken off the scheduler.",
+            "# TYPE reminder_notifications_fired_total counter",
+            f"reminder_notifications_fired_total {self.notifications_fired}",
+            "# HELP reminder_persisted_records_total Reminder changes written to disk.",
+            "# TYPE reminder_persisted_records_total counter",
+            f"reminder_persisted_records_total {self.persisted_records}",
+        ]
+        for name, (metric_type, help_text, read) in self.sources.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {read()}"]
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def write_textfile(path, text):
+        """Writes rendered metrics atomically (for node_exporter's textfile collector). Safe to run in a thread."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    async def serve(self, host, port):
+        """Minimal HTTP endpoint answering every request with the metrics text."""
+
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            body = self.render_prometheus().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+            writer.close()
+
+        return await asyncio.start_server(handle, host, port)
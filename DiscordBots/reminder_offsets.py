@@ -0,0 +1,118 @@
+import json
+import re
+
+# ----------------------------------------------------------------------
+# Reminder offsets: when notifications go out before a meeting
+# ----------------------------------------------------------------------
+# A reminder carries its own offsets (minutes before the start, always ending
+# with 0 for the "starting now" message), chosen with --remind on !schedule,
+# taken from the server default, or left as None for the bot default. The
+# absolute fire times are computed once when the reminder is stored and
+# handed to the scheduler, so custom offsets cost nothing per tick.
+#
+#   --remind 60,30,5      minutes
+#   --remind 1d,2h,15m    days / hours / minutes
+
+MAX_OFFSETS = 6                  # Not counting the "starting now" message
+MAX_OFFSET_MINUTES = 7 * 24 * 60
+
+OFFSET_RE = re.compile(r'^(\d{1,5})\s*(m|mins?|minutes?|h|hrs?|hours?|d|days?)?$', re.IGNORECASE)
+UNIT_MINUTES = {'m': 1, 'h': 60, 'd': 24 * 60}
+
+
+def parse_offsets(text):
+    """
+    Parses '60,30,5' (or '1d,2h,15m') into offsets in minutes, largest first, ending with 0.
+    Raises ValueError with a user-facing message.
+    """
+    offsets = set()
+    for token in re.split(r'[,\s]+', text.strip()):
+        if not token:
+            continue
+        match = OFFSET_RE.match(token)
+        if not match:
+            raise ValueError(f"`{token}` is not a reminder offset; use minutes like `60,30,5` or `1d,2h,15m`.")
+        minutes = int(match.group(1)) * UNIT_MINUTES[(match.group(2) or 'm')[0].lower()]
+        if minutes > MAX_OFFSET_MINUTES:
+            raise ValueError(f"`{token}` is too early; reminders can start at most 7 days before a meeting.")
+        if minutes:
+            offsets.add(minutes)
+
+    if not offsets:
+        raise ValueError("Give at least one reminder offset, e.g. `--remind 60,30,5`.")
+    if len(offsets) > MAX_OFFSETS:
+        raise ValueError(f"At most {MAX_OFFSETS} reminders per meeting (plus the one when it starts).")
+    return tuple(sorted(offsets, reverse=True)) + (0,)
+
+
+def parse_offset_args(args):
+    """Pulls `--remind <offsets>` out of the !schedule arguments. Returns (offsets or None, remaining args)."""
+    args = list(args)
+    for i, arg in enumerate(args):
+        if arg.lower() == '--remind':
+            if i + 1 >= len(args):
+                raise ValueError("`--remind` needs a value, e.g. `--remind 60,30,5`.")
+            return parse_offsets(args[i + 1]), args[:i] + args[i + 2:]
+    return None, args
+
+
+def format_offset(minutes):
+    """'90 minutes', '2 hours', '1 day'."""
+    for unit, size in (('day', 24 * 60), ('hour', 60)):
+        if minutes >= size and minutes % size == 0:
+            count = minutes // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    return f"{minutes} minute{'s' if minutes != 1 else ''}"
+
+
+def offset_label(minutes):
+    """'15-minute', '2-hour', '1-day' (as in 'the 15-minute reminder')."""
+    count, unit = format_offset(minutes).split()
+    return f"{count}-{unit.rstrip('s')}"
+
+
+def join_words(words):
+    """'a', 'a and b', 'a, b and c'."""
+    words = list(words)
+    if len(words) < 2:
+        return "".join(words)
+    return f"{', '.join(words[:-1])} and {words[-1]}"
+
+
+def describe_offsets(offsets):
+    """'15, 10 and 2 minutes' or '1 day, 2 hours and 15 minutes' for the reminders before the start."""
+    parts = [format_offset(offset).split() for offset in offsets if offset]
+    units = {unit.rstrip('s') for _, unit in parts}
+    if len(units) == 1 and len(parts) > 1:
+        return f"{join_words(count for count, _ in parts)} {units.pop()}s"
+    return join_words(" ".join(part) for part in parts)
+
+
+class OffsetPreferences:
+    """Per-server default offsets, falling back to the bot default (None)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.guilds = {}   # guild id -> offsets tuple
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {self.path.name}. Using default reminder offsets.")
+            return
+        self.guilds = {}
+        for guild_id, offsets in data.get('guilds', {}).items():
+            try:
+                self.guilds[int(guild_id)] = parse_offsets(",".join(str(offset) for offset in offsets))
+            except ValueError:
+                print(f"Ignoring invalid reminder offsets for server {guild_id}: {offsets!r}")
+
+    def to_json(self):
+        return {'guilds': {str(k): list(v) for k, v in self.guilds.items()}}
+
+    def offsets_for(self, guild_id):
+        return self.guilds.get(guild_id)
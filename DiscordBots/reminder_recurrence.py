@@ -0,0 +1,173 @@
+import datetime
+
+from reminder_timezones import ZONE_CACHE
+
+# ----------------------------------------------------------------------
+# Recurrence rules for repeating meetings
+# ----------------------------------------------------------------------
+# A series is stored once; only its next occurrence is scheduled. When that
+# occurrence starts, the following one is computed from the rule.
+#
+# Command syntax (appended to !schedule):
+#   --repeat daily | weekdays | weekly | mon,wed,fri | 3d
+#   --until YYYY-MM-DD     last day an occurrence may fall on
+#   --count N              total number of occurrences, including the first
+
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+
+def _localize(tz, naive):
+    """Attaches `tz` to a naive local datetime (pytz needs localize() to pick the right offset)."""
+    return ZONE_CACHE.localize(tz, naive)
+
+
+class Recurrence:
+    """A repeat rule: every N days, or on a set of weekdays."""
+
+    __slots__ = ('every_days', 'weekdays', 'until', 'count')
+
+    def __init__(self, every_days=None, weekdays=None, until=None, count=None):
+        self.every_days = every_days                               # Every N days, or None
+        self.weekdays = frozenset(weekdays) if weekdays else None  # 0=Monday .. 6=Sunday
+        self.until = until                                         # datetime.date, inclusive
+        self.count = count                                         # Total occurrences
+
+    def matches(self, day):
+        return self.weekdays is None or day.weekday() in self.weekdays
+
+    def next_day(self, day):
+        """The first date after `day` that the rule allows."""
+        if self.every_days:
+            return day + datetime.timedelta(days=self.every_days)
+        day += datetime.timedelta(days=1)
+        while not self.matches(day):
+            day += datetime.timedelta(days=1)
+        return day
+
+    def first_occurrence(self, local_dt, tz):
+        """Moves a requested start forward to the first date that matches the rule."""
+        if self.matches(local_dt.date()):
+            return local_dt
+        return _localize(tz, datetime.datetime.combine(self.next_day(local_dt.date()), local_dt.time()))
+
+    def next_occurrence(self, local_dt, occurrence, tz, after=None):
+        """
+        Returns (local datetime, occurrence number) of the occurrence following `local_dt`
+        (occurrence number `occurrence`), skipping any that start at or before `after`.
+        Returns None once the series is over. Wall-clock time is kept across DST changes.
+        """
+        day = local_dt.date()
+        wall_time = local_dt.time().replace(tzinfo=None)
+        while True:
+            day = self.next_day(day)
+            occurrence += 1
+            if self.count is not None and occurrence > self.count:
+                return None
+            if self.until is not None and day > self.until:
+                return None
+
+            next_dt = _localize(tz, datetime.datetime.combine(day, wall_time))
+            if after is None or next_dt > after:
+                return next_dt, occurrence
+
+    def describe(self):
+        if self.every_days == 1:
+            text = "daily"
+        elif self.every_days:
+            text = f"every {self.every_days} days"
+        elif self.weekdays == frozenset(range(5)):
+            text = "every weekday"
+        else:
+            text = "every " + ", ".join(WEEKDAY_NAMES[d].capitalize() for d in sorted(self.weekdays))
+
+        if self.until is not None:
+            text += f" until {self.until.isoformat()}"
+        if self.count is not None:
+            text += f" ({self.count} times)"
+        return text
+
+    def to_json(self):
+        item = {}
+        if self.every_days:
+            item['every'] = self.every_days
+        if self.weekdays is not None:
+            item['days'] = sorted(self.weekdays)
+        if self.until is not None:
+            item['until'] = self.until.isoformat()
+        if self.count is not None:
+            item['count'] = self.count
+        return item
+
+    @classmethod
+    def from_json(cls, item):
+        until = item.get('until')
+        return cls(
+            item.get('every'),
+            item.get('days'),
+            datetime.date.fromisoformat(until) if until else None,
+            item.get('count'),
+        )
+
+
+def _parse_rule(rule, start_weekday):
+    rule = rule.lower()
+    if rule == 'daily':
+        return Recurrence(every_days=1)
+    if rule == 'weekdays':
+        return Recurrence(weekdays=range(5))
+    if rule == 'weekly':
+        return Recurrence(weekdays=[start_weekday])
+    if rule.endswith('d') and rule[:-1].isdigit() and int(rule[:-1]) > 0:
+        return Recurrence(every_days=int(rule[:-1]))
+
+    days = []
+    for name in rule.split(','):
+        name = name.strip()[:3]
+        if name not in WEEKDAY_NAMES:
+            raise ValueError(
+                f"Unknown repeat rule `{rule}`. Use `daily`, `weekdays`, `weekly`, "
+                f"a day list like `mon,wed,fri`, or `Nd` (e.g. `3d`)."
+            )
+        days.append(WEEKDAY_NAMES.index(name))
+    return Recurrence(weekdays=days)
+
+
+def parse_recurrence_args(args, start_weekday):
+    """
+    Pulls --repeat/--until/--count out of the !schedule arguments.
+    Returns (Recurrence or None, remaining args). Raises ValueError with a user-facing message.
+    """
+    options = {}
+    remaining = []
+    args = list(args)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.lower() in ('--repeat', '--until', '--count'):
+            if i + 1 >= len(args):
+                raise ValueError(f"`{arg}` needs a value.")
+            options[arg.lower()] = args[i + 1]
+            i += 2
+            continue
+        remaining.append(arg)
+        i += 1
+
+    if '--repeat' not in options:
+        if options:
+            raise ValueError("`--until` and `--count` only apply together with `--repeat`.")
+        return None, remaining
+
+    recurrence = _parse_rule(options['--repeat'], start_weekday)
+
+    if '--until' in options:
+        try:
+            recurrence.until = datetime.date.fromisoformat(options['--until'])
+        except ValueError:
+            raise ValueError("`--until` must be a date like `2025-12-31`.")
+
+    if '--count' in options:
+        if not options['--count'].isdigit() or int(options['--count']) < 1:
+            raise ValueError("`--count` must be a positive number.")
+        recurrence.count = int(options['--count'])
+
+    return recurrence, remaining
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+# ----------------------------------------------------------------------
+# Deadline-driven scheduler for reminder notifications
+# ----------------------------------------------------------------------
+# Every reminder contributes one heap entry per notification (15/10/2/0
+# minutes before the meeting). The checker sleeps until the earliest entry
+# is due instead of scanning every reminder once a minute, so an idle bot
+# does no work and a busy one only touches the entries that are actually due.
+
+
+def split_fire_times(meeting_ts, intervals, not_before, settled=()):
+    """
+    Splits a reminder's notifications (minutes before `meeting_ts`) around `not_before`.
+    Returns (missed intervals, [(fire_at, interval), ...] still ahead); intervals in
+    `settled` were already sent or deliberately skipped and appear in neither.
+    """
+    missed = []
+    upcoming = []
+    for interval in intervals:
+        if interval in settled:
+            continue
+        fire_at = meeting_ts - interval * 60
+        if fire_at >= not_before:
+            upcoming.append((fire_at, interval))
+        else:
+            missed.append(interval)
+    return missed, upcoming
+
+
+class ReminderScheduler:
+    """Min-heap of pending notifications ordered by absolute fire time (epoch seconds)."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []       # [fire_at, seq, interval, reminder] - reminder is None once discarded
+        self._entries = {}    # id(reminder) -> live heap entries for that reminder
+        self._counter = itertools.count()
+        self._dead = 0
+        self._wakeup = None   # Created lazily so it binds to the running event loop
+
+    def __len__(self):
+        return len(self._heap) - self._dead
+
+    def add(self, reminder, fire_times):
+        """
+        Queues notifications for a reminder.
+        `fire_times` is an iterable of (fire_at_epoch, interval) pairs.
+        """
+        old_deadline = self.next_deadline()
+        entries = self._entries.setdefault(id(reminder), [])
+
+        for fire_at, interval in fire_times:
+            entry = [fire_at, next(self._counter), interval, reminder]
+            heapq.heappush(self._heap, entry)
+            entries.append(entry)
+
+        if not entries:
+            del self._entries[id(reminder)]
+            return
+
+        # Wake the checker early if the new reminder is now the next one due
+        if old_deadline is None or self._heap[0][0] < old_deadline:
+            self._notify()
+
+    def discard(self, reminder):
+        """Drops all pending notifications for a reminder (lazy deletion)."""
+        entries = self._entries.pop(id(reminder), None)
+        if not entries:
+            return
+
+        head = self._heap[0]
+        was_head = any(entry is head for entry in entries)
+        for entry in entries:
+            entry[3] = None
+        self._dead += len(entries)
+
+        self._prune_head()
+        if self._dead > len(self._heap) // 2:
+            self._compact()
+
+        if was_head:
+            self._notify()
+
+    def next_deadline(self):
+        """Returns the epoch time of the next pending notification, or None when idle."""
+        self._prune_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Removes and returns every (reminder, interval) pair whose fire time is <= now."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            _, _, interval, reminder = entry
+            if reminder is None:
+                self._dead -= 1
+                continue
+
+            entries = self._entries.get(id(reminder))
+            if entries is not None:
+                entries[:] = [e for e in entries if e is not entry]
+                if not entries:
+                    del self._entries[id(reminder)]
+            due.append((reminder, interval))
+        return due
+
+    async def wait_due(self):
+        """Sleeps until at least one notification is due, then returns the due batch."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+
+        while True:
+            now = self._clock()
+            due = self.pop_due(now)
+            if due:
+                return due
+
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def clear(self):
+        """Drops every pending notification."""
+        self._heap = []
+        self._entries.clear()
+        self._dead = 0
+        self._notify()
+
+    def wake(self):
+        """Makes wait_due() re-read the clock now (for clocks that jump, e.g. in failover_check.py)."""
+        self._notify()
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _prune_head(self):
+        while self._heap and self._heap[0][3] is None:
+            heapq.heappop(self._heap)
+            self._dead -= 1
+
+    def _compact(self):
+        self._heap = [e for e in self._heap if e[3] is not None]
+        heapq.heapify(self._heap)
+        self._dead = 0
@@ -0,0 +1,174 @@
+import bisect
+import collections
+import heapq
+import math
+import re
+
+# ----------------------------------------------------------------------
+# Topic search (!find)
+# ----------------------------------------------------------------------
+# An inverted index from topic words to reminder IDs, kept in step with the
+# ReminderStore. A query word matches a topic word exactly, as a prefix
+# ("plan" -> "planning"), or by trigram similarity to absorb typos
+# ("hirign" -> "hiring"). Matches are weighted by how rare the word is, so
+# "budget" ranks above "sync". The vocabulary is much smaller than the number
+# of reminders, so expanding a query word costs the same at 100 or 100k
+# reminders; scoring only touches the reminders the caller may see.
+
+TOKEN_RE = re.compile(r"\w+")
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 3
+MIN_SIMILARITY = 0.4      # Dice coefficient over trigrams; a swapped letter pair scores 0.4-0.6
+MAX_EXPANSIONS = 50       # Topic words a single query word may expand to
+
+
+def tokenize(text):
+    """Lower-cased words of `text`, without duplicates, in order."""
+    return list(dict.fromkeys(TOKEN_RE.findall(text.lower())))
+
+
+def trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TopicIndex:
+    """Word and trigram index over reminder topics, updated per reminder."""
+
+    def __init__(self):
+        self._postings = {}      # word -> set of reminder ids
+        self._words = {}         # reminder id -> tuple of its topic words
+        self._times = {}         # reminder id -> meeting start, for ranking ties
+        self._vocabulary = []    # sorted words, for prefix lookups
+        self._trigrams = {}      # trigram -> set of words containing it
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, reminder):
+        words = tuple(tokenize(reminder.message))
+        self._words[reminder.id] = words
+        self._times[reminder.id] = reminder.time
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                bisect.insort(self._vocabulary, word)
+                for trigram in trigrams(word):
+                    self._trigrams.setdefault(trigram, set()).add(word)
+            postings.add(reminder.id)
+
+    def remove(self, reminder):
+        words = self._words.pop(reminder.id, ())
+        self._times.pop(reminder.id, None)
+        for word in words:
+            postings = self._postings[word]
+            postings.discard(reminder.id)
+            if postings:
+                continue
+            # Last reminder using this word: drop it from the vocabulary
+            del self._postings[word]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            for trigram in trigrams(word):
+                holders = self._trigrams[trigram]
+                holders.discard(word)
+                if not holders:
+                    del self._trigrams[trigram]
+
+    def clear(self):
+        self._postings.clear()
+        self._words.clear()
+        self._times.clear()
+        self._vocabulary.clear()
+        self._trigrams.clear()
+
+    def expand(self, term):
+        """Returns {topic word: match weight} for one query word."""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT_WEIGHT
+
+        if len(term) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for word in self._vocabulary[start:start + MAX_EXPANSIONS]:
+                if not word.startswith(term):
+                    break
+                matches.setdefault(word, PREFIX_WEIGHT)
+
+        if len(term) >= MIN_FUZZY_LENGTH:
+            term_trigrams = trigrams(term)
+            shared = collections.Counter()
+            for trigram in term_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            for word, count in shared.most_common(MAX_EXPANSIONS):
+                similarity = 2 * count / (len(term_trigrams) + len(word)) # A word has len(word) trigrams
+                if similarity >= MIN_SIMILARITY:
+                    matches.setdefault(word, FUZZY_WEIGHT * similarity)
+
+        return matches
+
+    def search(self, text, candidate_ids, limit=10):
+        """
+        Ranks the reminders in `candidate_ids` against the words of `text`.
+        Returns up to `limit` reminder ids: most query words matched first, then best score,
+        then earliest meeting. Reminders matching no word are left out.
+        """
+        terms = tokenize(text)
+        total = len(self._words) or 1
+        expansions = []
+        for term in terms:
+            weighted = {}
+            for word, weight in self.expand(term).items():
+                weighted[word] = weight * math.log(1 + total / len(self._postings[word]))
+            if weighted:
+                expansions.append(weighted)
+        if not expansions:
+            return []
+
+        posted = sum(len(self._postings[word]) for weighted in expansions for word in weighted)
+
+        ranked = []
+        if len(candidate_ids) <= posted:
+            # Few visible reminders (the usual case): check each one's words
+            for reminder_id in candidate_ids:
+                words = self._words.get(reminder_id)
+                if words:
+                    self._rank(ranked, reminder_id, words, expansions)
+        else:
+            # Rare words: score straight from their postings and keep the visible ones
+            candidates = set(candidate_ids)
+            totals = {}   # reminder id -> [query words matched, score]
+            for weighted in expansions:
+                best = {}
+                for word, weight in weighted.items():
+                    for reminder_id in self._postings[word]:
+                        if best.get(reminder_id, 0.0) < weight:
+                            best[reminder_id] = weight
+                for reminder_id, weight in best.items():
+                    total = totals.get(reminder_id)
+                    if total is None:
+                        totals[reminder_id] = [1, weight]
+                    else:
+                        total[0] += 1
+                        total[1] += weight
+            times = self._times
+            ranked = [
+                (-matched, -score, times[reminder_id], reminder_id)
+                for reminder_id, (matched, score) in totals.items() if reminder_id in candidates
+            ]
+
+        return [reminder_id for _, _, _, reminder_id in heapq.nsmallest(limit, ranked)]
+
+    def _rank(self, ranked, reminder_id, words, expansions):
+        matched, score = 0, 0.0
+        for weighted in expansions:
+            best = max((weighted.get(word, 0.0) for word in words), default=0.0)
+            if best:
+                matched += 1
+                score += best
+        if matched:
+            ranked.append((-matched, -score, self._times[reminder_id], reminder_id))
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+# ----------------------------------------------------------------------
+# Append-only journal storage for reminders
+# ----------------------------------------------------------------------
+# Layout on disk (all next to the base file):
+#   reminders.json             - base snapshot: JSON list of serialized reminders
+#   reminders.journal          - one compact JSON record per mutation since the snapshot
+#   reminders.journal.folding  - journal being folded into the base by a compaction
+#
+# Records are idempotent, so replaying a journal that was already folded into
+# the base (crash between replacing the base and deleting the folding file)
+# produces the same state.
+
+JOURNAL_SEPARATORS = (',', ':')
+
+
+def atomic_write_json(path, data, indent=None):
+    """Writes JSON to a temp file and swaps it in, so a crash never leaves a half-written file."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent, separators=None if indent else JOURNAL_SEPARATORS)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def apply_record(state, record):
+    """Applies one journal record to `state` (dict of reminder id -> serialized reminder)."""
+    op = record.get('op')
+
+    if op == 'add':
+        item = record['reminder']
+        state[str(item['id'])] = item
+
+    elif op == 'confirm':
+        item = state.get(str(record['id']))
+        if item is not None:
+            item.setdefault('confirmed_users', {})[str(record['user'])] = record.get('at')
+
+    elif op == 'decline':
+        item = state.get(str(record['id']))
+        if item is not None:
+            declined = item.setdefault('declined', [])
+            if record['user'] not in declined:
+                declined.append(record['user'])
+            item.get('confirmed_users', {}).pop(str(record['user']), None)
+
+    elif op == 'cancel':
+        for reminder_id in record['ids']:
+            state.pop(str(reminder_id), None)
+
+    elif op == 'fire':
+        reminder_id = str(record['id'])
+        if record['interval'] == 0:
+            # The final notification retires the reminder
+            state.pop(reminder_id, None)
+        elif reminder_id in state:
+            fired = state[reminder_id].setdefault('fired', [])
+            if record['interval'] not in fired:
+                fired.append(record['interval'])
+
+    else:
+        print(f"Skipping unknown journal record: {record!r}")
+
+
+class ReminderJournal:
+    """Base snapshot plus an append-only log of add/confirm/decline/cancel/fire records."""
+
+    def __init__(self, base_path):
+        self.base_path = Path(base_path)
+        self.journal_path = self.base_path.with_name(self.base_path.stem + '.journal')
+        self.folding_path = self.journal_path.with_name(self.journal_path.name + '.folding')
+        self.records_since_compaction = 0
+        self.legacy_items = 0 # Base items loaded without an ID; they get one only in memory until compacted
+        self._file = None
+
+    # --- Reading -------------------------------------------------------
+
+    def load(self):
+        """Replays base + folding + journal and returns the list of serialized reminders."""
+        state = {}
+        self.legacy_items = 0
+
+        if self.base_path.exists():
+            try:
+                with open(self.base_path, 'r') as f:
+                    for index, item in enumerate(json.load(f)):
+                        # Files written before reminder IDs existed get a placeholder key
+                        key = str(item['id']) if 'id' in item else f"legacy-{index}"
+                        if 'id' not in item:
+                            self.legacy_items += 1
+                        state[key] = item
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON from {self.base_path.name}. File might be empty or corrupted.")
+
+        replayed = 0
+        for path in (self.folding_path, self.journal_path):
+            replayed += self._replay(path, state)
+
+        self.records_since_compaction = replayed
+        return list(state.values())
+
+    def _replay(self, path, state):
+        if not path.exists():
+            return 0
+
+        count = 0
+        with open(path, 'r') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves at most one torn record at the tail
+                    print(f"Ignoring torn record at {path.name}:{line_no}")
+                    continue
+                apply_record(state, record)
+                count += 1
+        return count
+
+    # --- Writing -------------------------------------------------------
+
+    def write_records(self, records, fsync=False):
+        """Appends mutation records. Cost depends on the batch, not on the number of reminders."""
+        if self._file is None:
+            self._file = open(self.journal_path, 'a')
+            # Terminate a torn tail record so it can't swallow the next one
+            if self._file.tell() > 0:
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._file.write('\n')
+
+        self._file.write(''.join(json.dumps(record, separators=JOURNAL_SEPARATORS) + '\n' for record in records))
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Compaction ----------------------------------------------------
+
+    def begin_compaction(self):
+        """
+        Moves the live journal aside so new appends start a fresh file.
+        Must be called together with taking the snapshot (no await in between),
+        so the snapshot reflects every record in the folding file.
+        """
+        self.close()
+        if self.journal_path.exists():
+            if self.folding_path.exists():
+                # A previous compaction did not finish; keep its records in front of ours
+                with open(self.folding_path, 'a') as dst, open(self.journal_path, 'r') as src:
+                    dst.write(src.read())
+                self.journal_path.unlink()
+            else:
+                os.replace(self.journal_path, self.folding_path)
+        self.records_since_compaction = 0
+
+    def finish_compaction(self, snapshot):
+        """Writes the snapshot as the new base and discards the folded journal. Safe to run in a thread."""
+        atomic_write_json(self.base_path, snapshot)
+        if self.folding_path.exists():
+            self.folding_path.unlink()
+
+    def compact(self, snapshot):
+        """Synchronous compaction (used at startup)."""
+        self.begin_compaction()
+        self.finish_compaction(snapshot)
+
+
+# ----------------------------------------------------------------------
+# Write-behind persistence
+# ----------------------------------------------------------------------
+# Command handlers only queue a record; a background task gathers everything
+# that arrives within `window` seconds and writes it in a worker thread, so
+# handler latency never depends on file size or disk speed.
+#
+# Durability for the journal:
+#   'commit'   - fsync after every batch
+#   'interval' - fsync at most every `fsync_interval` seconds
+#
+# `fence()` is checked before every write; once it returns False (this
+# instance lost its lease to another one) queued changes are dropped instead
+# of being written over the new owner's files.
+
+
+class WriteBehindWriter:
+    """Coalesces reminder mutations into batched writes performed off the event loop."""
+
+    def __init__(self, journal, snapshot_fn, mode='journal', window=0.25,
+                 durability='interval', fsync_interval=1.0, on_commit=None, fence=None):
+        self.journal = journal
+        self.mode = mode                  # 'journal' appends records, 'snapshot' rewrites the base file
+        self.window = window
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self.commits = 0
+        self._snapshot_fn = snapshot_fn   # Returns the JSON list of all reminders; called on the loop
+        self._on_commit = on_commit       # Called with (seconds, records) after every batch
+        self._fence = fence               # Returns False once this instance may no longer write
+        self._pending = []
+        self._snapshot_dirty = False
+        self._lock = None
+        self._flush_task = None
+        self._sync_task = None
+        self._last_fsync = 0.0
+
+    @property
+    def pending(self):
+        return len(self._pending) + (1 if self._snapshot_dirty else 0)
+
+    def submit(self, op, **fields):
+        """Queues one mutation ('add', 'confirm', 'decline', 'cancel', 'fire'). Never touches the disk."""
+        if self.mode == 'journal':
+            self._pending.append({'op': op, **fields})
+            self.journal.records_since_compaction += 1
+        else:
+            self._snapshot_dirty = True
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        await self.flush()
+        # Changes submitted while that batch was being written saw this task still running
+        # and did not schedule their own flush; write them in the next window
+        while self.pending:
+            await asyncio.sleep(self.window)
+            await self.flush()
+
+    async def flush(self):
+        """Writes everything queued so far and waits for it to reach the file."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._commit()
+
+    async def begin_compaction(self):
+        """Flushes pending records, then snapshots and rotates the journal in one step."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._commit()
+            snapshot = self._snapshot_fn()
+            self.journal.begin_compaction()
+            return snapshot
+
+    def discard(self):
+        """Drops everything queued (this instance lost ownership of the files)."""
+        if self._pending:
+            print(f"Dropping {len(self._pending)} unwritten reminder changes: storage is owned by another instance.")
+        self._pending = []
+        self._snapshot_dirty = False
+
+    async def _commit(self):
+        if self._fence is not None and not self._fence():
+            self.discard()
+            return
+        started = time.perf_counter()
+        if self.mode == 'journal':
+            batch = self._pending[:]
+            if not batch:
+                return
+            fsync = self._should_fsync()
+            await asyncio.to_thread(self.journal.write_records, batch, fsync)
+            # Dropped only after the write succeeded; records queued meanwhile stay behind
+            del self._pending[:len(batch)]
+            records = len(batch)
+        else:
+            if not self._snapshot_dirty:
+                return
+            self._snapshot_dirty = False
+            snapshot = self._snapshot_fn()
+            await asyncio.to_thread(atomic_write_json, self.journal.base_path, snapshot, 4)
+            records = 1
+        self.commits += 1
+        if self._on_commit is not None:
+            self._on_commit(time.perf_counter() - started, records)
+
+    def _should_fsync(self):
+        if self.durability == 'commit':
+            return True
+
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            self._last_fsync = now
+            return True
+
+        # Make sure this batch still gets synced once the interval is up
+        if self._sync_task is None or self._sync_task.done():
+            delay = self.fsync_interval - (now - self._last_fsync)
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_later(delay))
+        return False
+
+    async def _sync_later(self, delay):
+        await asyncio.sleep(delay)
+        async with self._lock:
+            self._last_fsync = time.monotonic()
+            await asyncio.to_thread(self.journal.sync)
+
+    def flush_sync(self):
+        """Blocking flush for shutdown, after the event loop has stopped."""
+        if self._fence is not None and not self._fence():
+            self.discard()
+        elif self.mode == 'journal':
+            if self._pending:
+                self.journal.write_records(self._pending, fsync=True)
+                self._pending = []
+        elif self._snapshot_dirty:
+            atomic_write_json(self.journal.base_path, self._snapshot_fn(), indent=4)
+            self._snapshot_dirty = False
+        self.journal.close()
@@ -0,0 +1,280 @@
+import bisect
+import datetime
+from array import array
+
+from reminder_recurrence import Recurrence
+from reminder_timezones import ZONE_CACHE
+
+# ----------------------------------------------------------------------
+# Reminder record
+# ----------------------------------------------------------------------
+# Times are UTC epoch seconds and attendees a packed int64 array, so a record
+# costs a fixed handful of slots instead of a dict of boxed objects. Mention
+# and time strings are rendered once per zone and reused by every notification.
+
+
+class Reminder:
+    """A single scheduled meeting."""
+
+    __slots__ = (
+        'id', 'time', 'users', 'message', 'channel_id', 'scheduler_id',
+        'confirmed_users', 'fired', 'recurrence', 'occurrence', 'tz', 'declined', 'offsets',
+        '_mentions', '_time_text',
+    )
+
+    def __init__(self, id, time, users, message, channel_id, scheduler_id, confirmed_users=None, fired=None,
+                 recurrence=None, occurrence=1, tz=None, declined=None, offsets=None):
+        self.id = id
+        self.time = int(time)              # Meeting start, UTC epoch seconds
+        self.users = array('q', users)     # Attendee IDs (scheduler included)
+        self.message = message
+        self.channel_id = channel_id
+        self.scheduler_id = scheduler_id
+        self.confirmed_users = confirmed_users if confirmed_users is not None else {} # user_id -> ISO time confirmed
+        self.fired = fired if fired is not None else [] # Intervals already sent
+        self.recurrence = recurrence       # Recurrence rule for repeating meetings, else None
+        self.occurrence = occurrence       # 1-based position of this occurrence in its series
+        self.tz = tz                       # Zone name it was scheduled in (recurrence wall clock), None = bot default
+        self.declined = declined if declined is not None else [] # Attendees who can't make this occurrence
+        self.offsets = tuple(offsets) if offsets is not None else None # Minutes before start to notify, None = bot default
+        self._mentions = None
+        self._time_text = None
+
+    def __repr__(self):
+        return f"Reminder(id={self.id}, time={self.time}, message={self.message!r})"
+
+    @property
+    def mentions(self):
+        """'<@a> <@b> ...' for every attendee who hasn't declined, rendered once."""
+        if self._mentions is None:
+            declined = self.declined
+            self._mentions = " ".join([f"<@{uid}>" for uid in self.users if uid not in declined])
+        return self._mentions
+
+    def decline(self, user_id):
+        """Drops an attendee from the remaining notifications of this occurrence."""
+        if user_id not in self.declined:
+            self.declined.append(user_id)
+            self.confirmed_users.pop(user_id, None)
+            self._mentions = None
+
+    def local_time(self, tz):
+        return ZONE_CACHE.fromtimestamp(self.time, tz)
+
+    def time_text(self, tz):
+        """Meeting time as 'YYYY-MM-DD HH:MM AM/PM TZ', rendered once per timezone."""
+        if self._time_text is None:
+            self._time_text = {}
+        text = self._time_text.get(tz)
+        if text is None:
+            text = self._time_text[tz] = self.local_time(tz).strftime('%Y-%m-%d %I:%M %p %Z')
+        return text
+
+    def next_occurrence(self, tz, after=None):
+        """
+        Builds the following occurrence of a recurring meeting (same id, fresh confirmations),
+        skipping any that start at or before `after`. Returns None for one-off meetings and ended series.
+        """
+        if self.recurrence is None:
+            return None
+
+        following = self.recurrence.next_occurrence(self.local_time(tz), self.occurrence, tz, after)
+        if following is None:
+            return None
+
+        next_dt, occurrence = following
+        return Reminder(
+            self.id, next_dt.timestamp(), self.users, self.message, self.channel_id, self.scheduler_id,
+            recurrence=self.recurrence, occurrence=occurrence, tz=self.tz, offsets=self.offsets,
+        )
+
+    def to_json(self):
+        item = {
+            'id': self.id,
+            'ts': self.time,
+            'users': self.users.tolist(),
+            'message': self.message,
+            'channel_id': self.channel_id,
+            'scheduler_id': self.scheduler_id,
+            # Copied so a snapshot serialized in a worker thread never sees later mutations
+            'confirmed_users': dict(self.confirmed_users),
+            'fired': list(self.fired),
+        }
+        if self.recurrence is not None:
+            item['recurrence'] = self.recurrence.to_json()
+            item['occurrence'] = self.occurrence
+        if self.tz is not None:
+            item['tz'] = self.tz
+        if self.declined:
+            item['declined'] = list(self.declined)
+        if self.offsets is not None:
+            item['offsets'] = list(self.offsets)
+        return item
+
+    @classmethod
+    def from_json(cls, item, reminder_id=None):
+        """
+        Builds a Reminder from its JSON form. Also accepts the older layout that stored
+        an ISO 'time' string and string IDs.
+        """
+        if 'ts' in item:
+            ts = item['ts']
+        else:
+            ts = datetime.datetime.fromisoformat(item['time']).timestamp() // 60 * 60
+
+        recurrence = item.get('recurrence')
+        return cls(
+            item['id'] if 'id' in item else reminder_id,
+            ts,
+            map(int, item['users']),
+            item['message'],
+            int(item['channel_id']),
+            int(item['scheduler_id']),
+            {int(k): v for k, v in item.get('confirmed_users', {}).items()},
+            list(item.get('fired', [])),
+            Recurrence.from_json(recurrence) if recurrence is not None else None,
+            item.get('occurrence', 1),
+            item.get('tz'),
+            [int(uid) for uid in item.get('declined', [])],
+            item.get('offsets'),
+        )
+
+
+# ----------------------------------------------------------------------
+# Indexed in-memory reminder store
+# ----------------------------------------------------------------------
+# Primary index:   reminder id -> reminder
+# Secondary index: attendee id -> [(meeting_ts, reminder id), ...] sorted by time
+#                  scheduler id -> [(meeting_ts, reminder id), ...] sorted by time
+#
+# !ok needs "the next meeting of this user" (a bisect on the attendee index),
+# !list pages through a user's meetings with a (meeting_ts, id) cursor, so each
+# page starts with a bisect instead of a walk over everything before it.
+# An optional topic index (reminder_search.TopicIndex) is updated alongside.
+
+
+class ReminderStore:
+    """Holds active reminders keyed by their stable id with per-user indexes."""
+
+    def __init__(self, topic_index=None):
+        self._by_id = {}
+        self._by_attendee = {}
+        self._by_scheduler = {}
+        self.topic_index = topic_index
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._by_id
+
+    def get(self, reminder_id):
+        return self._by_id.get(reminder_id)
+
+    def add(self, reminder):
+        reminder_id = reminder.id
+        if reminder_id in self._by_id:
+            raise ValueError(f"Reminder {reminder_id} is already stored.")
+
+        self._by_id[reminder_id] = reminder
+        key = (reminder.time, reminder_id)
+        for user_id in reminder.users:
+            bisect.insort(self._by_attendee.setdefault(user_id, []), key)
+        bisect.insort(self._by_scheduler.setdefault(reminder.scheduler_id, []), key)
+        if self.topic_index is not None:
+            self.topic_index.add(reminder)
+
+    @staticmethod
+    def _unindex(index, owner_id, key):
+        entries = index.get(owner_id)
+        if not entries:
+            return
+        position = bisect.bisect_left(entries, key)
+        if position < len(entries) and entries[position] == key:
+            del entries[position]
+        if not entries:
+            del index[owner_id]
+
+    def remove(self, reminder_id):
+        """Removes and returns a reminder. Raises KeyError if it is not stored."""
+        reminder = self._by_id.pop(reminder_id)
+
+        key = (reminder.time, reminder_id)
+        for user_id in reminder.users:
+            self._unindex(self._by_attendee, user_id, key)
+        self._unindex(self._by_scheduler, reminder.scheduler_id, key)
+        if self.topic_index is not None:
+            self.topic_index.remove(reminder)
+
+        return reminder
+
+    def next_for_attendee(self, user_id, after):
+        """Returns the earliest reminder attended by `user_id` that starts strictly after epoch `after`."""
+        entries = self._by_attendee.get(user_id)
+        if not entries:
+            return None
+
+        index = bisect.bisect_right(entries, (after, float('inf')))
+        if index == len(entries):
+            return None
+        return self._by_id[entries[index][1]]
+
+    def ids_for_attendee(self, user_id, after):
+        """IDs of the meetings `user_id` attends that start strictly after epoch `after`, earliest first."""
+        entries = self._by_attendee.get(user_id)
+        if not entries:
+            return []
+        index = bisect.bisect_right(entries, (after, float('inf')))
+        return [reminder_id for _, reminder_id in entries[index:]]
+
+    def for_scheduler(self, scheduler_id):
+        """Returns the reminders created by `scheduler_id`, earliest first."""
+        return [self._by_id[reminder_id] for _, reminder_id in self._by_scheduler.get(scheduler_id, ())]
+
+    def page_for_scheduler(self, scheduler_id, after=None, limit=10, start=None, end=None,
+                           attendee_id=None, predicate=None):
+        """
+        One page of the meetings `scheduler_id` created, in time order.
+        `after` is the cursor returned with the previous page; `start`/`end` bound the meeting
+        time (epoch, end exclusive); `attendee_id` and `predicate` filter further.
+        Returns (reminders, cursor for the next page or None).
+        """
+        # Walk whichever index is already narrowed by the filters
+        if attendee_id is not None:
+            entries = self._by_attendee.get(attendee_id, ())
+        else:
+            entries = self._by_scheduler.get(scheduler_id, ())
+
+        if after is not None:
+            position = bisect.bisect_right(entries, after)
+        elif start is not None:
+            position = bisect.bisect_left(entries, (start,))
+        else:
+            position = 0
+
+        page = []
+        while position < len(entries):
+            key = entries[position]
+            position += 1
+            if end is not None and key[0] >= end:
+                break
+            reminder = self._by_id[key[1]]
+            if attendee_id is not None and reminder.scheduler_id != scheduler_id:
+                continue
+            if predicate is not None and not predicate(reminder):
+                continue
+            if len(page) == limit:
+                # There is at least one more match: the page ends at its last entry
+                return page, (page[-1].time, page[-1].id)
+            page.append(reminder)
+        return page, None
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_attendee.clear()
+        self._by_scheduler.clear()
+        if self.topic_index is not None:
+            self.topic_index.clear()
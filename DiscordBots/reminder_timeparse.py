@@ -0,0 +1,130 @@
+import calendar
+import collections
+import datetime
+import re
+
+from reminder_timezones import ZONE_CACHE
+
+# ----------------------------------------------------------------------
+# Time expressions for !schedule and !import
+# ----------------------------------------------------------------------
+# One compiled pattern recognizes every accepted form in a single match;
+# values are then range-checked directly, so a bad input costs one regex
+# match instead of a chain of strptime attempts and caught exceptions.
+#
+#   2025-12-31 02:30 PM    full date, 12-hour
+#   2025-12-31 14:30       full date, 24-hour
+#   02:30 PM / 2:30pm / 3pm   next occurrence of that time (today or tomorrow)
+#   11:2                   naked time: the next of 11:02 PM today or 11:02 AM tomorrow;
+#                          hours 0 and 13-23 are read as 24-hour
+#   today 5pm / tomorrow 9:30 / tomorrow 3pm    explicit day (24-hour without AM/PM)
+#   in 45m / in 2h / in 1h30m / in 90 minutes   relative to now
+
+TIME_RE = re.compile(
+    r"""
+    ^\s*(?:
+        in\s+(?=\d)
+            (?:(?P<in_hours>\d{1,3})\s*h(?:ours?|rs?)?\s*)?
+            (?:(?P<in_minutes>\d{1,4})\s*m(?:in(?:ute)?s?)?)?
+      |
+        (?:
+            (?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\s+
+          | (?P<day_word>today|tomorrow)\s+
+        )?
+        (?P<hour>\d{1,2})
+        (?: :(?P<minute>\d{1,2}) )?
+        \s*(?P<ampm>[ap])?(?(ampm)\.?m\.?)
+    )\s*$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+TimeParseResult = collections.namedtuple('TimeParseResult', 'when error message')
+
+FORMAT_HELP = (
+    "Use `\"YYYY-MM-DD HH:MM AM/PM\"`, `\"HH:MM AM/PM\"`, `\"tomorrow 3pm\"`, `\"in 45m\"`, "
+    "or just `\"HH:M\"` (e.g., `\"11:2\"` for 11:02 PM/AM, which smartly picks the next occurrence)."
+)
+
+
+def _fail(code, message):
+    return TimeParseResult(None, code, message)
+
+
+def _at(tz, day, hour, minute):
+    return ZONE_CACHE.localize(tz, datetime.datetime(day.year, day.month, day.day, hour, minute))
+
+
+def _next_at(tz, now, hour, minute):
+    """Today at hour:minute, or tomorrow if that is not after `now`."""
+    today = now.date()
+    when = _at(tz, today, hour, minute)
+    if when <= now:
+        when = _at(tz, today + datetime.timedelta(days=1), hour, minute)
+    return when
+
+
+def parse_time_expression(text, now, tz):
+    """
+    Parses a meeting time typed by a user in `tz`; `now` is the current time in `tz`.
+    Returns TimeParseResult(when, None, None) with an aware datetime, or
+    TimeParseResult(None, code, message) with a short code and a user-facing message.
+    """
+    match = TIME_RE.match(text)
+    if match is None:
+        if not text.strip():
+            return _fail('empty', "No time given. " + FORMAT_HELP)
+        return _fail('unrecognized', "Invalid date/time format. " + FORMAT_HELP)
+
+    g = match.group
+    if g('in_hours') is not None or g('in_minutes') is not None:
+        minutes = int(g('in_hours') or 0) * 60 + int(g('in_minutes') or 0)
+        if minutes == 0:
+            return _fail('bad_duration', "The meeting must be at least 1 minute away.")
+        # Added in UTC so the result carries the right offset across a DST change
+        return TimeParseResult(ZONE_CACHE.fromtimestamp(now.timestamp() + minutes * 60, tz), None, None)
+    if g('hour') is None:
+        return _fail('unrecognized', "Invalid date/time format. " + FORMAT_HELP)
+
+    hour = int(g('hour'))
+    minute = int(g('minute')) if g('minute') is not None else None
+    ampm = g('ampm').lower() if g('ampm') else None
+
+    # A bare number ("3") is not a time
+    if minute is None and ampm is None:
+        return _fail('unrecognized', "Invalid date/time format. " + FORMAT_HELP)
+    minute = minute or 0
+    if minute > 59:
+        return _fail('bad_minute', f"`{text.strip()}`: minutes must be between 00 and 59.")
+
+    if ampm is not None:
+        if not 1 <= hour <= 12:
+            return _fail('bad_hour', f"`{text.strip()}`: with AM/PM the hour must be between 1 and 12.")
+        hour = hour % 12 + (12 if ampm == 'p' else 0)
+    elif hour > 23:
+        return _fail('bad_hour', f"`{text.strip()}`: the hour must be between 0 and 23.")
+
+    # Explicit date
+    if g('year') is not None:
+        year, month, day = int(g('year')), int(g('month')), int(g('day'))
+        if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+            return _fail('bad_date', f"`{g('year')}-{g('month')}-{g('day')}` is not a valid date.")
+        return TimeParseResult(_at(tz, datetime.date(year, month, day), hour, minute), None, None)
+
+    # today / tomorrow
+    if g('day_word') is not None:
+        day = now.date()
+        if g('day_word').lower() == 'tomorrow':
+            day += datetime.timedelta(days=1)
+        return TimeParseResult(_at(tz, day, hour, minute), None, None)
+
+    # Time only with AM/PM, or a naked time that can only be 24-hour: the next occurrence
+    if ampm is not None or hour == 0 or hour > 12:
+        return TimeParseResult(_next_at(tz, now, hour, minute), None, None)
+
+    # Naked 1-12: PM today if still ahead, else AM tomorrow (12 means noon / midnight)
+    pm_hour = hour % 12 + 12
+    when = _at(tz, now.date(), pm_hour, minute)
+    if when <= now:
+        when = _at(tz, now.date() + datetime.timedelta(days=1), hour % 12, minute)
+    return TimeParseResult(when, None, None)
@@ -0,0 +1,125 @@
+import datetime
+import json
+
+import pytz
+
+# ----------------------------------------------------------------------
+# Timezones: per-(zone, day) offset cache and user/server preferences
+# ----------------------------------------------------------------------
+# Reminders are stored as UTC epochs; zones only matter when a typed time is
+# parsed or a meeting time is rendered. pytz resolves every conversion by
+# searching the zone's transition table, but a day almost never contains a
+# transition, so the resolved tzinfo is cached per (zone, day) and reused
+# with plain arithmetic. Days that do contain a transition fall back to pytz.
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MAX_CACHED_DAYS = 20000
+
+_MISSING = object()
+
+
+def zone_name(tz):
+    return getattr(tz, 'zone', None) or str(tz)
+
+
+class ZoneCache:
+    """Caches the fixed-offset tzinfo of each (zone, day) without a DST transition."""
+
+    def __init__(self, max_entries=MAX_CACHED_DAYS):
+        self.max_entries = max_entries
+        self._local_days = {}   # (zone, local date) -> tzinfo, or None if the day has a transition
+        self._utc_days = {}     # (zone, UTC day number) -> (tzinfo, UTC offset), or None
+
+    def _store(self, cache, key, value):
+        if len(cache) >= self.max_entries:
+            cache.clear()
+        cache[key] = value
+
+    def localize(self, tz, naive):
+        """Same result as tz.localize(naive) for pytz zones, without the transition search on most days."""
+        if not hasattr(tz, 'localize'):
+            return naive.replace(tzinfo=tz)
+
+        key = (zone_name(tz), naive.date())
+        tzinfo = self._local_days.get(key, _MISSING)
+        if tzinfo is _MISSING:
+            start = tz.localize(datetime.datetime.combine(key[1], datetime.time.min))
+            end = tz.localize(datetime.datetime.combine(key[1], datetime.time.max))
+            tzinfo = start.tzinfo if start.utcoffset() == end.utcoffset() else None
+            self._store(self._local_days, key, tzinfo)
+
+        if tzinfo is None:
+            return tz.localize(naive)
+        return naive.replace(tzinfo=tzinfo)
+
+    def fromtimestamp(self, ts, tz):
+        """Same result as datetime.fromtimestamp(ts, tz), served from the per-day cache."""
+        day = int(ts // 86400)
+        key = (zone_name(tz), day)
+        entry = self._utc_days.get(key, _MISSING)
+        if entry is _MISSING:
+            start = datetime.datetime.fromtimestamp(day * 86400, tz)
+            end = datetime.datetime.fromtimestamp(day * 86400 + 86399, tz)
+            offset = start.utcoffset()
+            entry = (start.tzinfo, offset) if offset == end.utcoffset() else None
+            self._store(self._utc_days, key, entry)
+
+        if entry is None:
+            return datetime.datetime.fromtimestamp(ts, tz)
+        tzinfo, offset = entry
+        return (EPOCH + datetime.timedelta(seconds=ts) + offset).replace(tzinfo=tzinfo)
+
+
+# Shared by every module that converts between epochs and local times
+ZONE_CACHE = ZoneCache()
+
+_ZONE_NAMES = None # lower-case name -> canonical pytz name, built on first lookup
+
+
+def find_zone(name):
+    """Looks up an IANA zone name case-insensitively (e.g. 'america/new_york'). Returns None if unknown."""
+    global _ZONE_NAMES
+    if _ZONE_NAMES is None:
+        _ZONE_NAMES = {zone.lower(): zone for zone in pytz.all_timezones}
+    zone = _ZONE_NAMES.get(name.strip().lower())
+    return pytz.timezone(zone) if zone else None
+
+
+class TimezonePreferences:
+    """Per-user and per-server timezone choices, falling back to the bot default."""
+
+    def __init__(self, path, default):
+        self.path = path
+        self.default = default
+        self.users = {}    # user id -> zone name
+        self.guilds = {}   # guild id -> zone name
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {self.path.name}. Using default timezones.")
+            return
+        self.users = {int(k): v for k, v in data.get('users', {}).items() if find_zone(v)}
+        self.guilds = {int(k): v for k, v in data.get('guilds', {}).items() if find_zone(v)}
+
+    def to_json(self):
+        return {
+            'users': {str(k): v for k, v in self.users.items()},
+            'guilds': {str(k): v for k, v in self.guilds.items()},
+        }
+
+    def zone_for(self, user_id, guild_id=None):
+        """The user's zone, else the server's, else the bot default."""
+        zone = self.users.get(user_id) or self.guilds.get(guild_id)
+        return pytz.timezone(zone) if zone else self.default
+
+    def source_for(self, user_id, guild_id=None):
+        if user_id in self.users:
+            return "your setting"
+        if guild_id in self.guilds:
+            return "server default"
+        return "bot default"
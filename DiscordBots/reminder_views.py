@@ -0,0 +1,132 @@
+import discord
+
+# ----------------------------------------------------------------------
+# Interactive message components for the reminder bot
+# ----------------------------------------------------------------------
+# ListPager turns a "fetch one page" callback into an embed with Prev/Next
+# buttons. Only the cursor of each visited page is kept, so a page is built
+# on demand from the store no matter how many meetings there are.
+#
+# Reminder messages carry "Got it" / "Snooze" / "Can't attend" buttons whose
+# custom_id names the action and the meetings of that message as
+# "<reminder id>-<occurrence>", e.g. "reminder:ok:12-1.15-4". A recurring
+# series keeps its reminder ID, so the occurrence number is what stops a
+# leftover button from an earlier occurrence from answering the next one.
+# Buttons sent before occurrences were encoded carry bare IDs ("12.15").
+# They are DynamicItems: nothing is kept per message and clicks keep working
+# after a restart, as long as ReminderAction is registered with
+# client.add_dynamic_items().
+
+LIST_TIMEOUT_SECONDS = 300
+CUSTOM_ID_LIMIT = 100 # Discord's limit on a component custom_id
+
+REMINDER_ACTIONS = {
+    'ok': ("Got it", discord.ButtonStyle.success, "✅"),
+    'snooze': ("Snooze 5m", discord.ButtonStyle.secondary, "💤"),
+    'decline': ("Can't attend", discord.ButtonStyle.danger, "🚫"),
+}
+
+
+class ListPager(discord.ui.View):
+    """Prev/Next pagination over a cursor-based page source."""
+
+    def __init__(self, owner_id, fetch_page, timeout=LIST_TIMEOUT_SECONDS):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.fetch_page = fetch_page  # (cursor, page number) -> (embed, next cursor or None)
+        self.cursors = [None]         # Start cursor of every page up to the current one
+        self.next_cursor = None
+        self.message = None
+
+    def render(self):
+        embed, self.next_cursor = self.fetch_page(self.cursors[-1], len(self.cursors))
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+        return embed
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("ℹ️ Only the person who ran `!list` can page through it.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction, button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+
+class ReminderAction(discord.ui.DynamicItem[discord.ui.Button],
+                     template=r'reminder:(?P<action>ok|snooze|decline):(?P<ids>\d+(?:-\d+)?(?:\.\d+(?:-\d+)?)*)'):
+    """A persistent reminder button; clicks go to `ReminderAction.handler`."""
+
+    # async handler(interaction, action, [(reminder id, occurrence or None)]), set by the bot at startup
+    handler = None
+
+    def __init__(self, action, meetings):
+        label, style, emoji = REMINDER_ACTIONS[action]
+        custom_id = f"reminder:{action}:{'.'.join(map(meeting_key, meetings))}"
+        super().__init__(discord.ui.Button(label=label, style=style, emoji=emoji, custom_id=custom_id))
+        self.action = action
+        self.meetings = meetings
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        meetings = []
+        for key in match['ids'].split('.'):
+            reminder_id, _, occurrence = key.partition('-')
+            meetings.append((int(reminder_id), int(occurrence) if occurrence else None))
+        return cls(match['action'], meetings)
+
+    async def callback(self, interaction):
+        if ReminderAction.handler is None:
+            return await interaction.response.send_message("ℹ️ The bot is still starting up, try again in a moment.", ephemeral=True)
+        await ReminderAction.handler(interaction, self.action, self.meetings)
+
+
+def meeting_key(meeting):
+    """(reminder id, occurrence) -> '12-4'; a missing occurrence (old buttons) -> '12'."""
+    reminder_id, occurrence = meeting
+    return str(reminder_id) if occurrence is None else f"{reminder_id}-{occurrence}"
+
+
+def reminder_buttons(meetings):
+    """A view with one row of reminder actions for the (reminder id, occurrence) pairs in a message."""
+    view = discord.ui.View(timeout=None)
+    for action in REMINDER_ACTIONS:
+        view.add_item(ReminderAction(action, meetings))
+    return view
+
+
+def button_batches(meetings):
+    """Splits (reminder id, occurrence) pairs into runs whose button custom_ids stay within Discord's limit."""
+    room = CUSTOM_ID_LIMIT - len("reminder::") - max(len(action) for action in REMINDER_ACTIONS)
+    batches = []
+    current, size = [], 0
+    for meeting in meetings:
+        extra = len(meeting_key(meeting)) + (1 if current else 0)
+        if current and size + extra > room:
+            batches.append(current)
+            current, size = [], 0
+            extra = len(meeting_key(meeting))
+        current.append(meeting)
+        size += extra
+    if current:
+        batches.append(current)
+    return batches